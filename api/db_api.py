@@ -1,123 +1,164 @@
+import time
 import requests
 import pandas as pd
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# =====================================
+# CONFIGURAÇÃO DOS ENDPOINTS
+# =====================================
+
+# nome -> (chave da url no secrets, chave da lista no JSON, parâmetros fixos)
+ENDPOINTS_API = {
+    "processos": ("url_processos", "processos", {"dataInicio": "2010-01-01", "dataFim": "2030-12-31"}),
+    "clientes": ("url_clientes", "clientes", None),
+    "tarefas": ("url_tarefas", "tarefas", None),
+}
+
+TIMEOUT_API = 30
+
+# =====================================
+# SESSÃO HTTP COMPARTILHADA
+# =====================================
+
+@st.cache_resource
+def obter_sessao_http():
+    """Cria uma sessão HTTP única (keep-alive, gzip e retentativas com backoff)"""
+    sessao = requests.Session()
+
+    retentativas = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"]
+    )
+    adaptador = HTTPAdapter(pool_connections=len(ENDPOINTS_API), pool_maxsize=8, max_retries=retentativas)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+
+    sessao.headers.update({
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive"
+    })
+    return sessao
+
+def _baixar_endpoint(nome, url, token, chave_lista, params=None, sessao=None):
+    """Baixa um endpoint da API e retorna (DataFrame, informações de tempo)"""
+    sessao = sessao or obter_sessao_http()
+    info = {"endpoint": nome, "status": None, "linhas": 0, "bytes": 0, "segundos": 0.0}
+    inicio = time.perf_counter()
 
-def baixar_dados_clientes():
-    """Baixa dados dos clientes da API usando secrets do Streamlit"""
     try:
-        # Usar configurações do secrets
-        url_clientes = st.secrets["api"]["url_clientes"]
-        token = st.secrets["api"]["token"]
-        
-        headers = {
-            "token": token
-        }
-        
-        response = requests.get(url_clientes, headers=headers, timeout=30)
-        
+        response = sessao.get(url, headers={"token": token}, params=params, timeout=TIMEOUT_API)
+        info["status"] = response.status_code
+        info["bytes"] = len(response.content)
+
         if response.status_code == 200:
             dados = response.json()
-            
-            # Extrair a lista de clientes do primeiro item
-            if isinstance(dados, list) and len(dados) > 0 and 'clientes' in dados[0]:
-                lista_clientes = dados[0]['clientes']
-                
-                # Converter para DataFrame
-                df = pd.DataFrame(lista_clientes)
-                
-                print(f"✅ Dados baixados com sucesso! {len(df)} clientes encontrados.")
-                return df
+
+            # Extrair a lista do primeiro item
+            if isinstance(dados, list) and len(dados) > 0 and chave_lista in dados[0]:
+                df = pd.DataFrame(dados[0][chave_lista])
+                info["linhas"] = len(df)
+                print(f"✅ Dados baixados com sucesso! {len(df)} {chave_lista} encontrados.")
             else:
                 print("❌ Estrutura de dados inesperada")
                 print(f"Dados recebidos: {dados}")
-                return pd.DataFrame()
-        
+                df = pd.DataFrame()
         else:
             print(f"❌ Erro na API: {response.status_code}")
             print(f"Resposta: {response.text}")
-            return pd.DataFrame()
-            
+            df = pd.DataFrame()
+
     except Exception as e:
         print(f"❌ Erro ao conectar com a API: {e}")
-        return pd.DataFrame()
+        df = pd.DataFrame()
 
-def baixar_dados_processos():
-    """Baixa dados dos processos da API usando secrets do Streamlit"""
+    info["segundos"] = time.perf_counter() - inicio
+    return df, info
+
+def _baixar_por_nome(nome, params_extra=None):
+    """Resolve url/token do secrets e baixa o endpoint configurado"""
+    chave_url, chave_lista, params = ENDPOINTS_API[nome]
     try:
         # Usar configurações do secrets
-        url_processos = st.secrets["api"]["url_processos"]
+        url = st.secrets["api"][chave_url]
         token = st.secrets["api"]["token"]
-        
-        # Adicionar parâmetros de data
-        url_completa = f"{url_processos}?dataInicio=2010-01-01&dataFim=2030-12-31"
-        
-        headers = {
-            "token": token
-        }
-        
-        response = requests.get(url_completa, headers=headers, timeout=30)
-        
-        if response.status_code == 200:
-            dados = response.json()
-            
-            # Extrair a lista de processos do primeiro item
-            if isinstance(dados, list) and len(dados) > 0 and 'processos' in dados[0]:
-                lista_processos = dados[0]['processos']
-                
-                # Converter para DataFrame
-                df = pd.DataFrame(lista_processos)
-                
-                print(f"✅ Dados baixados com sucesso! {len(df)} processos encontrados.")
-                return df
-            else:
-                print("❌ Estrutura de dados inesperada")
-                print(f"Dados recebidos: {dados}")
-                return pd.DataFrame()
-        
-        else:
-            print(f"❌ Erro na API: {response.status_code}")
-            print(f"Resposta: {response.text}")
-            return pd.DataFrame()
-            
     except Exception as e:
         print(f"❌ Erro ao conectar com a API: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(), {"endpoint": nome, "status": None, "linhas": 0, "bytes": 0, "segundos": 0.0}
+
+    if params_extra:
+        params = {**(params or {}), **params_extra}
+    return _baixar_endpoint(nome, url, token, chave_lista, params)
+
+def baixar_dados_clientes():
+    """Baixa dados dos clientes da API usando secrets do Streamlit"""
+    df, _ = _baixar_por_nome("clientes")
+    return df
+
+def baixar_dados_processos(data_inicio=None, data_fim=None):
+    """Baixa dados dos processos da API usando secrets do Streamlit"""
+    # Sem datas, usa a janela completa configurada em ENDPOINTS_API
+    params_extra = {}
+    if data_inicio:
+        params_extra["dataInicio"] = data_inicio
+    if data_fim:
+        params_extra["dataFim"] = data_fim
+
+    df, _ = _baixar_por_nome("processos", params_extra)
+    return df
 
 def baixar_dados_tarefas():
     """Baixa dados de tarefas da API usando secrets do Streamlit"""
-    try:
-        # Usar configurações do secrets
-        url_tarefas = st.secrets["api"]["url_tarefas"]
-        token = st.secrets["api"]["token"]
-        
-        headers = {
-            "token": token
-        }
-        
-        response = requests.get(url_tarefas, headers=headers, timeout=30)
-        
-        if response.status_code == 200:
-            dados = response.json()
-            
-            # Extrair a lista de tarefas do primeiro item
-            if isinstance(dados, list) and len(dados) > 0 and 'tarefas' in dados[0]:
-                lista_tarefas = dados[0]['tarefas']
-                
-                # Converter para DataFrame
-                df = pd.DataFrame(lista_tarefas)
-                
-                print(f"✅ Dados baixados com sucesso! {len(df)} tarefas encontrados.")
-                return df
-            else:
-                print("❌ Estrutura de dados inesperada")
-                print(f"Dados recebidos: {dados}")
-                return pd.DataFrame()
-        
-        else:
-            print(f"❌ Erro na API: {response.status_code}")
-            print(f"Resposta: {response.text}")
-            return pd.DataFrame()
-            
-    except Exception as e:
-        print(f"❌ Erro ao conectar com a API: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+    df, _ = _baixar_por_nome("tarefas")
+    return df
+
+# =====================================
+# DOWNLOAD PARALELO
+# =====================================
+
+def baixar_dados_paralelo(endpoints=("processos", "clientes", "tarefas"), params=None):
+    """
+    Baixa os endpoints em paralelo reaproveitando a sessão HTTP.
+    `params` permite sobrescrever parâmetros por endpoint (ex.: janela de datas).
+    Retorna (dict nome -> DataFrame, relatório de tempos por endpoint).
+    """
+    params = params or {}
+    # secrets e sessão são resolvidos na thread principal
+    sessao = obter_sessao_http()
+    token = st.secrets["api"]["token"]
+
+    tarefas = {}
+    with ThreadPoolExecutor(max_workers=len(endpoints)) as executor:
+        inicio = time.perf_counter()
+        for nome in endpoints:
+            chave_url, chave_lista, params_padrao = ENDPOINTS_API[nome]
+            url = st.secrets["api"][chave_url]
+            params_endpoint = {**(params_padrao or {}), **params.get(nome, {})} or None
+            tarefas[nome] = executor.submit(_baixar_endpoint, nome, url, token, chave_lista, params_endpoint, sessao)
+
+        dados = {}
+        relatorio = []
+        for nome, futuro in tarefas.items():
+            df, info = futuro.result()
+            dados[nome] = df
+            relatorio.append(info)
+        total = time.perf_counter() - inicio
+
+    relatorio_df = pd.DataFrame(relatorio)
+    exibir_relatorio_tempos(relatorio_df, total)
+    return dados, relatorio_df
+
+def exibir_relatorio_tempos(relatorio_df, total=None):
+    """Imprime o tempo de cada endpoint"""
+    print("⏱️ Tempos de download da API:")
+    for _, linha in relatorio_df.iterrows():
+        print(
+            f"   - {linha['endpoint']}: {linha['segundos']:.2f}s | "
+            f"status {linha['status']} | {linha['linhas']} linhas | {linha['bytes'] / 1024:.0f} KB"
+        )
+    if total is not None:
+        print(f"   = total (paralelo): {total:.2f}s")
@@ -1,13 +1,26 @@
 import streamlit as st
 import pandas as pd
 
-def aplicar_filtros_temporais(df_analise):
-    """Aplica filtros de ano e tipo principal"""
+from data.cache_compartilhado import obter_view_compartilhada
+from utils.text_processing import remover_categorias_vazias
+
+def aplicar_filtros_temporais(df_analise, versao_dados=None):
+    """
+    Aplica filtros de ano e tipo principal.
+    Com `versao_dados`, a view filtrada fica no cache compartilhado entre sessões
+    (df_analise deve ser tratado como somente leitura).
+    """
+    anos_selecionados, tipo_selecionado = selecionar_filtros_temporais(df_analise)
+    return obter_view_filtrada(df_analise, anos_selecionados, tipo_selecionado, versao_dados)
+
+def selecionar_filtros_temporais(df_analise):
+    """Desenha os filtros de ano e tipo principal e retorna (anos_selecionados, tipo_selecionado)"""
     
     st.subheader("🔍 Filtros")
     col_filtro1, col_filtro2 = st.columns(2)
     
-    df_filtrado = df_analise.copy()
+    anos_selecionados = None
+    tipo_selecionado = 'Todos'
     
     with col_filtro1:
         # Filtro de data
@@ -21,12 +34,6 @@ def aplicar_filtros_temporais(df_analise):
                     value=(int(min(anos_disponiveis)), int(max(anos_disponiveis))),
                     step=1
                 )
-                
-                # Aplicar filtro de data
-                df_filtrado = df_filtrado[
-                    (df_filtrado['data_convertida'].dt.year >= anos_selecionados[0]) &
-                    (df_filtrado['data_convertida'].dt.year <= anos_selecionados[1])
-                ]
     
     with col_filtro2:
         # Filtro de tipo
@@ -36,8 +43,29 @@ def aplicar_filtros_temporais(df_analise):
                 "⚖️ Tipo de Processo:",
                 tipos_disponiveis
             )
-            
-            if tipo_selecionado != 'Todos':
-                df_filtrado = df_filtrado[df_filtrado['tipoPrincipal'] == tipo_selecionado]
     
-    return df_filtrado
\ No newline at end of file
+    return anos_selecionados, tipo_selecionado
+
+def obter_view_filtrada(df_analise, anos_selecionados, tipo_selecionado, versao_dados=None):
+    """View filtrada, do cache compartilhado quando `versao_dados` é informada"""
+    def construir():
+        return filtrar_por_periodo_e_tipo(df_analise, anos_selecionados, tipo_selecionado)
+    
+    if versao_dados is None:
+        return construir()
+    
+    return obter_view_compartilhada((versao_dados, anos_selecionados, tipo_selecionado), construir)
+
+def filtrar_por_periodo_e_tipo(df_analise, anos_selecionados, tipo_selecionado):
+    """Recorta o DataFrame de análise pelo intervalo de anos e tipo principal"""
+    df_filtrado = df_analise
+    
+    if anos_selecionados is not None:
+        anos = df_filtrado['data_convertida'].dt.year
+        df_filtrado = df_filtrado[(anos >= anos_selecionados[0]) & (anos <= anos_selecionados[1])]
+    
+    if tipo_selecionado != 'Todos':
+        df_filtrado = df_filtrado[df_filtrado['tipoPrincipal'] == tipo_selecionado]
+    
+    # Categorias que sumiram com o filtro não devem aparecer nos rankings
+    return remover_categorias_vazias(df_filtrado)
@@ -4,6 +4,11 @@ import pandas as pd
 import requests
 import base64
 from datetime import datetime
+from components.functions_controle import (
+    filtrar_por_busca, salvar_dados_controle, atualizar_linha_fluxo, salvar_linha_controle,
+    linhas_por_status, contar_por_status, paginar_fila, interface_gargalos_fluxo,
+    interface_historico_linha, interface_tabela_em_data, interface_metricas_github
+)
 
 # =====================================
 # CONFIGURAÇÕES DE PERFIS - ALVARÁS
@@ -116,13 +121,13 @@ def interface_lista_alvaras(df, perfil_usuario):
     if status_filtro != "Todos" and "Status" in df.columns:
         df_filtrado = df_filtrado[df_filtrado["Status"] == status_filtro]
     
-    # Filtro por processo
+    # Filtro por processo (índice invertido, busca por prefixo)
     if processo_filtro:
-        df_filtrado = df_filtrado[df_filtrado["Processo"].astype(str).str.contains(processo_filtro, case=False, na=False)]
+        df_filtrado = filtrar_por_busca(df_filtrado, df, processo_filtro, ["Processo"])
     
     # Filtro por nome (parte)
     if nome_filtro:
-        df_filtrado = df_filtrado[df_filtrado["Parte"].astype(str).str.contains(nome_filtro, case=False, na=False)]
+        df_filtrado = filtrar_por_busca(df_filtrado, df, nome_filtro, ["Parte"])
     
     if mostrar_apenas_meus and perfil_usuario == "Financeiro":
         df_filtrado = df_filtrado[df_filtrado["Status"].isin([
@@ -170,8 +175,8 @@ def interface_lista_alvaras(df, perfil_usuario):
     if "preview_novas_linhas" in st.session_state and len(st.session_state["preview_novas_linhas"]) > 0:
         st.warning(f"⚠️ Você tem {len(st.session_state['preview_novas_linhas'])} linha(s) não salva(s)")
         if st.button("💾 Salvar Alterações", type="primary"):
-            from components.functions_controle import save_data_to_github_seguro
-            novo_sha = save_data_to_github_seguro(
+            from components.functions_controle import salvar_dados_controle
+            novo_sha = salvar_dados_controle(
                 st.session_state.df_editado_alvaras,
                 "lista_alvaras.csv",
                 "file_sha_alvaras"
@@ -310,12 +315,13 @@ def interface_anexar_documentos(df, processo):
             pdf_path = salvar_arquivo(pdf_alvara, processo, "alvara")
             
             # Atualizar status
-            idx = df[df["Processo"] == processo].index[0]
-            st.session_state.df_editado_alvaras.loc[idx, "Status"] = "Enviado para o Financeiro"
-            st.session_state.df_editado_alvaras.loc[idx, "Comprovante Conta"] = comprovante_path
-            st.session_state.df_editado_alvaras.loc[idx, "PDF Alvará"] = pdf_path
-            st.session_state.df_editado_alvaras.loc[idx, "Data Envio Financeiro"] = datetime.now().strftime("%d/%m/%Y %H:%M")
-            st.session_state.df_editado_alvaras.loc[idx, "Enviado Financeiro Por"] = st.session_state.get("usuario", "Sistema")
+            atualizar_linha_fluxo(st.session_state.df_editado_alvaras, "alvaras", linha_processo["ID"], {
+                "Status": "Enviado para o Financeiro",
+                "Comprovante Conta": comprovante_path,
+                "PDF Alvará": pdf_path,
+                "Data Envio Financeiro": datetime.now().strftime("%d/%m/%Y %H:%M"),
+                "Enviado Financeiro Por": st.session_state.get("usuario", "Sistema"),
+            })
             
             st.success("✅ Processo enviado para o Financeiro!")
             st.rerun()
@@ -335,7 +341,7 @@ def interface_acoes_financeiro(df_filtrado):
     if len(aguardando_financeiro) > 0:
         st.markdown("### 📤 Enviar para Rodrigo")
         
-        for _, processo in aguardando_financeiro.iterrows():
+        for _, processo in paginar_fila(aguardando_financeiro, "acoes_financeiro").iterrows():
             with st.expander(f"Processo: {processo['Processo']} - {processo['Parte']}"):
                 col_info, col_acao = st.columns([2, 1])
                 
@@ -352,10 +358,11 @@ def interface_acoes_financeiro(df_filtrado):
                 with col_acao:
                     if st.button(f"📤 Enviar para Rodrigo", key=f"enviar_Rodrigo_{processo['Processo']}"):
                         # Atualizar status
-                        idx = df_filtrado[df_filtrado["Processo"] == processo["Processo"]].index[0]
-                        st.session_state.df_editado_alvaras.loc[idx, "Status"] = "Financeiro - Enviado para Rodrigo"
-                        st.session_state.df_editado_alvaras.loc[idx, "Data Envio Rodrigo"] = datetime.now().strftime("%d/%m/%Y %H:%M")
-                        st.session_state.df_editado_alvaras.loc[idx, "Enviado Rodrigo Por"] = st.session_state.get("usuario", "Sistema")
+                        atualizar_linha_fluxo(st.session_state.df_editado_alvaras, "alvaras", processo["ID"], {
+                            "Status": "Financeiro - Enviado para Rodrigo",
+                            "Data Envio Rodrigo": datetime.now().strftime("%d/%m/%Y %H:%M"),
+                            "Enviado Rodrigo Por": st.session_state.get("usuario", "Sistema"),
+                        })
                         
                         st.success("✅ Processo enviado para o Rodrigo!")
                         st.rerun()
@@ -363,7 +370,7 @@ def interface_acoes_financeiro(df_filtrado):
     if len(enviados_Rodrigo) > 0:
         st.markdown("### ✅ Finalizar Processos")
         
-        for _, processo in enviados_Rodrigo.iterrows():
+        for _, processo in paginar_fila(enviados_Rodrigo, "acoes_finalizar").iterrows():
             with st.expander(f"Finalizar: {processo['Processo']} - {processo['Parte']}"):
                 comprovante_recebimento = st.file_uploader(
                     "Anexar comprovante de recebimento:",
@@ -378,11 +385,12 @@ def interface_acoes_financeiro(df_filtrado):
                         recebimento_path = salvar_arquivo(comprovante_recebimento, processo['Processo'], "recebimento")
                         
                         # Atualizar status
-                        idx = df_filtrado[df_filtrado["Processo"] == processo["Processo"]].index[0]
-                        st.session_state.df_editado_alvaras.loc[idx, "Status"] = "Finalizado"
-                        st.session_state.df_editado_alvaras.loc[idx, "Comprovante Recebimento"] = recebimento_path
-                        st.session_state.df_editado_alvaras.loc[idx, "Data Finalização"] = datetime.now().strftime("%d/%m/%Y %H:%M")
-                        st.session_state.df_editado_alvaras.loc[idx, "Finalizado Por"] = st.session_state.get("usuario", "Sistema")
+                        atualizar_linha_fluxo(st.session_state.df_editado_alvaras, "alvaras", processo["ID"], {
+                            "Status": "Finalizado",
+                            "Comprovante Recebimento": recebimento_path,
+                            "Data Finalização": datetime.now().strftime("%d/%m/%Y %H:%M"),
+                            "Finalizado Por": st.session_state.get("usuario", "Sistema"),
+                        })
                         
                         st.success("✅ Processo finalizado!")
                         st.rerun()
@@ -395,10 +403,10 @@ def interface_fluxo_trabalho(df, perfil_usuario):
     col_dash1, col_dash2, col_dash3, col_dash4 = st.columns(4)
     
     # Contadores por status
-    total_cadastrados = len(df[df["Status"] == "Cadastrado"]) if "Status" in df.columns else 0
-    total_financeiro = len(df[df["Status"] == "Enviado para o Financeiro"]) if "Status" in df.columns else 0
-    total_Rodrigo = len(df[df["Status"] == "Financeiro - Enviado para Rodrigo"]) if "Status" in df.columns else 0
-    total_finalizados = len(df[df["Status"] == "Finalizado"]) if "Status" in df.columns else 0
+    total_cadastrados = contar_por_status(df, "alvaras", "Cadastrado")
+    total_financeiro = contar_por_status(df, "alvaras", "Enviado para o Financeiro")
+    total_Rodrigo = contar_por_status(df, "alvaras", "Financeiro - Enviado para Rodrigo")
+    total_finalizados = contar_por_status(df, "alvaras", "Finalizado")
     
     with col_dash1:
         st.metric("📝 Cadastrados", total_cadastrados)
@@ -427,15 +435,12 @@ def interface_cadastrador_fluxo(df):
     st.markdown("### 👨‍💻 Ações do Cadastrador")
     
     # Processos que precisam de documentos
-    if "Status" in df.columns:
-        processos_pendentes = df[df["Status"] == "Cadastrado"]
-    else:
-        processos_pendentes = pd.DataFrame()
+    processos_pendentes = linhas_por_status(df, "alvaras", "Cadastrado")
     
     if len(processos_pendentes) > 0:
         st.markdown("#### 📎 Processos aguardando documentos:")
         
-        for _, processo in processos_pendentes.iterrows():
+        for _, processo in paginar_fila(processos_pendentes, "alvaras_cadastrados").iterrows():
             with st.expander(f"📋 {processo['Processo']} - {processo['Parte']}"):
                 col_info, col_acao = st.columns([2, 1])
                 
@@ -459,7 +464,7 @@ def interface_cadastrador_fluxo(df):
     
     # Histórico de processos enviados
     if "Status" in df.columns:
-        enviados = df[df["Status"] == "Enviado para o Financeiro"]
+        enviados = linhas_por_status(df, "alvaras", "Enviado para o Financeiro")
         if len(enviados) > 0:
             st.markdown("#### 📤 Processos enviados para o Financeiro:")
             st.dataframe(
@@ -472,18 +477,14 @@ def interface_financeiro_fluxo(df):
     st.markdown("### 💰 Ações do Financeiro")
     
     # Separar processos por etapa
-    if "Status" in df.columns:
-        aguardando_financeiro = df[df["Status"] == "Enviado para o Financeiro"]
-        aguardando_finalizacao = df[df["Status"] == "Financeiro - Enviado para Rodrigo"]
-    else:
-        aguardando_financeiro = pd.DataFrame()
-        aguardando_finalizacao = pd.DataFrame()
+    aguardando_financeiro = linhas_por_status(df, "alvaras", "Enviado para o Financeiro")
+    aguardando_finalizacao = linhas_por_status(df, "alvaras", "Financeiro - Enviado para Rodrigo")
     
     # ETAPA 3: Processos para enviar ao Rodrigo
     if len(aguardando_financeiro) > 0:
         st.markdown("#### 📤 Enviar para o Rodrigo:")
         
-        for _, processo in aguardando_financeiro.iterrows():
+        for _, processo in paginar_fila(aguardando_financeiro, "alvaras_financeiro").iterrows():
             with st.expander(f"📋 {processo['Processo']} - {processo['Parte']}"):
                 col_info, col_docs, col_acao = st.columns([2, 1, 1])
                 
@@ -505,18 +506,11 @@ def interface_financeiro_fluxo(df):
                 with col_acao:
                     if st.button(f"📤 Enviar para Rodrigo", key=f"enviar_Rodrigo_{processo['Processo']}"):
                         # Atualizar status
-                        idx = df[df["Processo"] == processo["Processo"]].index[0]
-                        st.session_state.df_editado_alvaras.loc[idx, "Status"] = "Financeiro - Enviado para Rodrigo"
-                        st.session_state.df_editado_alvaras.loc[idx, "Data Envio Rodrigo"] = datetime.now().strftime("%d/%m/%Y %H:%M")
-                        st.session_state.df_editado_alvaras.loc[idx, "Enviado Rodrigo Por"] = st.session_state.get("usuario", "Sistema")
-                        
-                        # Salvar no GitHub
-                        from components.functions_controle import save_data_to_github
-                        novo_sha = save_data_to_github(
-                            st.session_state.df_editado_alvaras,
-                            "lista_alvaras.csv",
-                            st.session_state.file_sha_alvaras
-                        )
+                        novo_sha = salvar_linha_controle(st.session_state.df_editado_alvaras, "alvaras", processo["ID"], {
+                            "Status": "Financeiro - Enviado para Rodrigo",
+                            "Data Envio Rodrigo": datetime.now().strftime("%d/%m/%Y %H:%M"),
+                            "Enviado Rodrigo Por": st.session_state.get("usuario", "Sistema"),
+                        }, "lista_alvaras.csv", "file_sha_alvaras")
                         st.session_state.file_sha_alvaras = novo_sha
                         
                         st.success("✅ Processo enviado para o Rodrigo!")
@@ -526,7 +520,7 @@ def interface_financeiro_fluxo(df):
     if len(aguardando_finalizacao) > 0:
         st.markdown("#### ✅ Finalizar Processos")
         
-        for _, processo in aguardando_finalizacao.iterrows():
+        for _, processo in paginar_fila(aguardando_finalizacao, "alvaras_finalizacao").iterrows():
             with st.expander(f"📋 {processo['Processo']} - {processo['Parte']} - FINALIZAR"):
                 col_info, col_anexo = st.columns([2, 1])
                 
@@ -557,19 +551,12 @@ def interface_financeiro_fluxo(df):
                             
                             if recebimento_url:
                                 # Atualizar status
-                                idx = df[df["Processo"] == processo["Processo"]].index[0]
-                                st.session_state.df_editado_alvaras.loc[idx, "Status"] = "Finalizado"
-                                st.session_state.df_editado_alvaras.loc[idx, "Comprovante Recebimento"] = recebimento_url
-                                st.session_state.df_editado_alvaras.loc[idx, "Data Finalização"] = datetime.now().strftime("%d/%m/%Y %H:%M")
-                                st.session_state.df_editado_alvaras.loc[idx, "Finalizado Por"] = st.session_state.get("usuario", "Sistema")
-                                
-                                # Salvar no GitHub
-                                from components.functions_controle import save_data_to_github
-                                novo_sha = save_data_to_github(
-                                    st.session_state.df_editado_alvaras,
-                                    "lista_alvaras.csv",
-                                    st.session_state.file_sha_alvaras
-                                )
+                                novo_sha = salvar_linha_controle(st.session_state.df_editado_alvaras, "alvaras", processo["ID"], {
+                                    "Status": "Finalizado",
+                                    "Comprovante Recebimento": recebimento_url,
+                                    "Data Finalização": datetime.now().strftime("%d/%m/%Y %H:%M"),
+                                    "Finalizado Por": st.session_state.get("usuario", "Sistema"),
+                                }, "lista_alvaras.csv", "file_sha_alvaras")
                                 st.session_state.file_sha_alvaras = novo_sha
                                 
                                 st.success("🎉 Processo finalizado com sucesso!")
@@ -578,7 +565,7 @@ def interface_financeiro_fluxo(df):
     
     # Mostrar processos finalizados recentemente
     if "Status" in df.columns:
-        finalizados_recentes = df[df["Status"] == "Finalizado"].tail(5)
+        finalizados_recentes = linhas_por_status(df, "alvaras", "Finalizado").tail(5)
         if len(finalizados_recentes) > 0:
             st.markdown("#### 🎉 Últimos processos finalizados:")
             st.dataframe(
@@ -618,6 +605,8 @@ def interface_visualizar_alvara(df, alvara_id, perfil_usuario):
         st.write(f"**Última atualização:** {linha_processo.get('Data Atualização', 'N/A')}")
         st.write(f"**Valor:** {linha_processo.get('Valor', 'N/A')}")
     
+    interface_historico_linha("lista_alvaras.csv", alvara_id)
+    
     # Adicionar mais visualizações de dados conforme necessário
 
 def interface_edicao_processo(df, alvara_id, status_atual, perfil_usuario):
@@ -682,25 +671,19 @@ def interface_edicao_processo(df, alvara_id, status_atual, perfil_usuario):
             
             if st.button("📤 Enviar para Financeiro", type="primary", key=f"enviar_fin_id_{alvara_id}"):
                 # Salvar arquivos
-                from components.functions_controle import salvar_arquivo, save_data_to_github_seguro
+                from components.functions_controle import salvar_arquivo
                 comprovante_url = salvar_arquivo(comprovante_conta, numero_processo, "comprovante")
                 pdf_url = salvar_arquivo(pdf_alvara, numero_processo, "alvara")
                 
                 if comprovante_url and pdf_url:
                     # Atualizar DataFrame
-                    idx = df[df["ID"] == alvara_id].index[0]
-                    st.session_state.df_editado_alvaras.loc[idx, "Status"] = "Enviado para o Financeiro"
-                    st.session_state.df_editado_alvaras.loc[idx, "Comprovante Conta"] = comprovante_url
-                    st.session_state.df_editado_alvaras.loc[idx, "PDF Alvará"] = pdf_url
-                    st.session_state.df_editado_alvaras.loc[idx, "Data Envio Financeiro"] = datetime.now().strftime("%d/%m/%Y %H:%M")
-                    st.session_state.df_editado_alvaras.loc[idx, "Enviado Financeiro Por"] = st.session_state.get("usuario", "Sistema")
-                    
-                    # Salvar no GitHub
-                    novo_sha = save_data_to_github_seguro(
-                        st.session_state.df_editado_alvaras,
-                        "lista_alvaras.csv",
-                        st.session_state.file_sha_alvaras
-                    )
+                    novo_sha = salvar_linha_controle(st.session_state.df_editado_alvaras, "alvaras", alvara_id, {
+                        "Status": "Enviado para o Financeiro",
+                        "Comprovante Conta": comprovante_url,
+                        "PDF Alvará": pdf_url,
+                        "Data Envio Financeiro": datetime.now().strftime("%d/%m/%Y %H:%M"),
+                        "Enviado Financeiro Por": st.session_state.get("usuario", "Sistema"),
+                    }, "lista_alvaras.csv", st.session_state.file_sha_alvaras)
                     st.session_state.file_sha_alvaras = novo_sha
                     
                     st.success("✅ Processo enviado para o Financeiro!")
@@ -741,18 +724,11 @@ def interface_edicao_processo(df, alvara_id, status_atual, perfil_usuario):
         
         if st.button("📤 Enviar para Rodrigo", type="primary", key=f"enviar_fin_id_{alvara_id}"):
             # Atualizar status
-            from components.functions_controle import save_data_to_github_seguro
-            idx = df[df["ID"] == alvara_id].index[0]
-            st.session_state.df_editado_alvaras.loc[idx, "Status"] = "Financeiro - Enviado para Rodrigo"
-            st.session_state.df_editado_alvaras.loc[idx, "Data Envio Rodrigo"] = datetime.now().strftime("%d/%m/%Y %H:%M")
-            st.session_state.df_editado_alvaras.loc[idx, "Enviado Rodrigo Por"] = st.session_state.get("usuario", "Sistema")
-            
-            # Salvar no GitHub
-            novo_sha = save_data_to_github_seguro(
-                st.session_state.df_editado_alvaras,
-                "lista_alvaras.csv",
-                st.session_state.file_sha_alvaras
-            )
+            novo_sha = salvar_linha_controle(st.session_state.df_editado_alvaras, "alvaras", alvara_id, {
+                "Status": "Financeiro - Enviado para Rodrigo",
+                "Data Envio Rodrigo": datetime.now().strftime("%d/%m/%Y %H:%M"),
+                "Enviado Rodrigo Por": st.session_state.get("usuario", "Sistema"),
+            }, "lista_alvaras.csv", st.session_state.file_sha_alvaras)
             st.session_state.file_sha_alvaras = novo_sha
             
             st.success("✅ Processo enviado para o Rodrigo!")
@@ -784,23 +760,17 @@ def interface_edicao_processo(df, alvara_id, status_atual, perfil_usuario):
         if comprovante_recebimento:
             if st.button("✅ Finalizar Processo", key=f"enviar_fin_id_{alvara_id}", type="primary"):
                 # Salvar comprovante de recebimento
-                from components.functions_controle import salvar_arquivo, save_data_to_github_seguro
+                from components.functions_controle import salvar_arquivo
                 recebimento_url = salvar_arquivo(comprovante_recebimento, numero_processo, "recebimento")
                 
                 if recebimento_url:
                     # Atualizar status
-                    idx = df[df["ID"] == alvara_id].index[0]
-                    st.session_state.df_editado_alvaras.loc[idx, "Status"] = "Finalizado"
-                    st.session_state.df_editado_alvaras.loc[idx, "Comprovante Recebimento"] = recebimento_url
-                    st.session_state.df_editado_alvaras.loc[idx, "Data Finalização"] = datetime.now().strftime("%d/%m/%Y %H:%M")
-                    st.session_state.df_editado_alvaras.loc[idx, "Finalizado Por"] = st.session_state.get("usuario", "Sistema")
-                    
-                    # Salvar no GitHub
-                    novo_sha = save_data_to_github_seguro(
-                        st.session_state.df_editado_alvaras,
-                        "lista_alvaras.csv",
-                        st.session_state.file_sha_alvaras
-                    )
+                    novo_sha = salvar_linha_controle(st.session_state.df_editado_alvaras, "alvaras", alvara_id, {
+                        "Status": "Finalizado",
+                        "Comprovante Recebimento": recebimento_url,
+                        "Data Finalização": datetime.now().strftime("%d/%m/%Y %H:%M"),
+                        "Finalizado Por": st.session_state.get("usuario", "Sistema"),
+                    }, "lista_alvaras.csv", st.session_state.file_sha_alvaras)
                     st.session_state.file_sha_alvaras = novo_sha
                     
                     st.success("🎉 Processo finalizado com sucesso!")
@@ -884,8 +854,8 @@ def interface_cadastro_alvara(df, perfil_usuario):
         
         with col_salvar:
             if st.button("💾 Salvar Todas as Linhas", type="primary"):
-                from components.functions_controle import save_data_to_github_seguro
-                novo_sha = save_data_to_github_seguro(
+                from components.functions_controle import salvar_dados_controle
+                novo_sha = salvar_dados_controle(
                     st.session_state.df_editado_alvaras,
                     "lista_alvaras.csv",
                     st.session_state.file_sha_alvaras
@@ -1320,3 +1290,8 @@ def interface_visualizar_dados(df):
                     for status, count in status_counts.items():
                         porcentagem = (count / len(status_validos)) * 100
                         st.write(f"• **{status}:** {count} ({porcentagem:.1f}%)")
+        
+        # Tempo por etapa e gargalos do fluxo
+        interface_gargalos_fluxo(df, "alvaras")
+        interface_tabela_em_data("lista_alvaras.csv")
+        interface_metricas_github("lista_alvaras.csv")
@@ -6,7 +6,10 @@ import base64
 from datetime import datetime
 from components.functions_controle import (
     gerar_id_unico, garantir_coluna_id,
-    get_github_api_info, save_data_to_github_seguro, load_data_from_github
+    get_github_api_info, salvar_dados_controle, carregar_dados_controle,
+    filtrar_por_busca, COLUNAS_BUSCA_BENEFICIOS,
+    salvar_linha_controle, linhas_por_status, paginar_fila, interface_gargalos_fluxo,
+    interface_historico_linha, interface_tabela_em_data, interface_metricas_github
 )
 
 # =====================================
@@ -94,23 +97,15 @@ def interface_lista_beneficios(df, perfil_usuario):
             filtro_busca = st.text_input("Buscar por nome ou processo")
     
     # Aplicar filtros
-    df_trabalho = df.copy()
+    df_trabalho = df
     
-    # Filtro por status
+    # Filtro por status (balde do índice do fluxo)
     if filtro_status != "Todos":
-        df_trabalho = df_trabalho[df_trabalho["Status"] == filtro_status]
+        df_trabalho = linhas_por_status(df, "beneficios", filtro_status)
     
-    # Filtro por termo de busca
+    # Filtro por termo de busca (índice invertido de nome, processo e CPF)
     if filtro_busca:
-        df_trabalho = df_trabalho[
-            df_trabalho.apply(
-                lambda row: any(
-                    filtro_busca.lower() in str(value).lower()
-                    for value in row.values
-                ),
-                axis=1
-            )
-        ]
+        df_trabalho = filtrar_por_busca(df_trabalho, df, filtro_busca, COLUNAS_BUSCA_BENEFICIOS)
     
     # Verificar se há dados
     if len(df_trabalho) == 0:
@@ -125,7 +120,7 @@ def interface_lista_beneficios(df, perfil_usuario):
     st.markdown(f"### 📋 Lista ({len(df_trabalho)} benefícios)")
     
     # Mostrar registros em tabela com botão para abrir
-    for _, row in df_trabalho.iterrows():
+    for _, row in paginar_fila(df_trabalho, "lista_beneficios").iterrows():
         col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
         
         with col1:
@@ -145,6 +140,12 @@ def interface_lista_beneficios(df, perfil_usuario):
                       on_click=lambda id=row.get('ID'): abrir_beneficio(id, df))
         
         st.divider()
+    
+    # Tempo por etapa e gargalos do fluxo
+    with st.expander("⏱️ Tempo por etapa e gargalos"):
+        interface_gargalos_fluxo(df, "beneficios")
+    interface_tabela_em_data("lista_beneficios.csv")
+    interface_metricas_github("lista_beneficios.csv")
 
 def abrir_beneficio(beneficio_id, df):
     """Abre um benefício para visualização/edição"""
@@ -222,7 +223,7 @@ def interface_cadastro_beneficio(df, perfil_usuario):
             )
             
             # Salvar no GitHub
-            novo_sha = save_data_to_github_seguro(
+            novo_sha = salvar_dados_controle(
                 st.session_state.df_editado_beneficios,
                 "lista_beneficios.csv",
                 "file_sha_beneficios"
@@ -272,6 +273,8 @@ def interface_edicao_beneficio(df, beneficio_id, perfil_usuario):
     
     st.write(f"**Observações:** {beneficio.get('Observações', '')}")
     
+    interface_historico_linha("lista_beneficios.csv", beneficio_id)
+    
     # Verificar se o usuário pode editar o status atual
     pode_editar = pode_editar_status_beneficios(status_atual, perfil_usuario)
     
@@ -323,35 +326,30 @@ def atualizar_status_beneficio(beneficio_id, novo_status, df):
     if "df_editado_beneficios" not in st.session_state:
         st.session_state.df_editado_beneficios = df.copy()
     
-    # Atualizar status
-    idx = st.session_state.df_editado_beneficios["ID"] == beneficio_id
-    
     # Obter usuário atual
     usuario_atual = st.session_state.get("usuario", "")
     data_atual = datetime.now().strftime("%d/%m/%Y %H:%M")
+    valores = {}
     
     # Atualizar campos com base no novo status
     if novo_status == "Enviado para administrativo":
-        st.session_state.df_editado_beneficios.loc[idx, "Data Envio Administrativo"] = data_atual
-        st.session_state.df_editado_beneficios.loc[idx, "Enviado Administrativo Por"] = usuario_atual
+        valores["Data Envio Administrativo"] = data_atual
+        valores["Enviado Administrativo Por"] = usuario_atual
     
     elif novo_status == "Implantado":
-        st.session_state.df_editado_beneficios.loc[idx, "Implantado"] = "Sim"
-        st.session_state.df_editado_beneficios.loc[idx, "Data Implantação"] = data_atual
-        st.session_state.df_editado_beneficios.loc[idx, "Implantado Por"] = usuario_atual
+        valores["Implantado"] = "Sim"
+        valores["Data Implantação"] = data_atual
+        valores["Implantado Por"] = usuario_atual
     
     elif novo_status == "Enviado para o financeiro":
-        st.session_state.df_editado_beneficios.loc[idx, "Data Envio Financeiro"] = data_atual
-        st.session_state.df_editado_beneficios.loc[idx, "Enviado Financeiro Por"] = usuario_atual
-    
-    # Atualizar status
-    st.session_state.df_editado_beneficios.loc[idx, "Status"] = novo_status
-    
-    # Salvar no GitHub
-    novo_sha = save_data_to_github_seguro(
-        st.session_state.df_editado_beneficios,
-        "lista_beneficios.csv",
-        "file_sha_beneficios"
+        valores["Data Envio Financeiro"] = data_atual
+        valores["Enviado Financeiro Por"] = usuario_atual
+    
+    # Atualizar status (a linha muda de balde no índice do fluxo)
+    valores["Status"] = novo_status
+    novo_sha = salvar_linha_controle(
+        st.session_state.df_editado_beneficios, "beneficios", beneficio_id, valores,
+        "lista_beneficios.csv", "file_sha_beneficios"
     )
     
     if novo_sha:
@@ -366,27 +364,19 @@ def atualizar_dados_finalizacao(beneficio_id, novo_status, df, comprovante, valo
     if "df_editado_beneficios" not in st.session_state:
         st.session_state.df_editado_beneficios = df.copy()
     
-    # Atualizar dados
-    idx = st.session_state.df_editado_beneficios["ID"] == beneficio_id
-    
     # Obter usuário atual
     usuario_atual = st.session_state.get("usuario", "")
     data_atual = datetime.now().strftime("%d/%m/%Y %H:%M")
     
     # Atualizar campos
-    st.session_state.df_editado_beneficios.loc[idx, "Status"] = novo_status
-    st.session_state.df_editado_beneficios.loc[idx, "Data Finalização"] = data_atual
-    st.session_state.df_editado_beneficios.loc[idx, "Finalizado Por"] = usuario_atual
-    st.session_state.df_editado_beneficios.loc[idx, "Comprovante Pagamento"] = comprovante
-    st.session_state.df_editado_beneficios.loc[idx, "Valor Pago"] = valor_pago
-    st.session_state.df_editado_beneficios.loc[idx, "Tipo Pagamento"] = tipo_pagamento
-    
-    # Salvar no GitHub
-    novo_sha = save_data_to_github_seguro(
-        st.session_state.df_editado_beneficios,
-        "lista_beneficios.csv",
-        "file_sha_beneficios"
-    )
+    novo_sha = salvar_linha_controle(st.session_state.df_editado_beneficios, "beneficios", beneficio_id, {
+        "Status": novo_status,
+        "Data Finalização": data_atual,
+        "Finalizado Por": usuario_atual,
+        "Comprovante Pagamento": comprovante,
+        "Valor Pago": valor_pago,
+        "Tipo Pagamento": tipo_pagamento,
+    }, "lista_beneficios.csv", "file_sha_beneficios")
     
     if novo_sha:
         st.session_state.file_sha_beneficios = novo_sha
@@ -400,7 +390,7 @@ def atualizar_dados_finalizacao(beneficio_id, novo_status, df, comprovante, valo
 
 def carregar_beneficios():
     """Carrega os dados de benefícios do GitHub"""
-    df, file_sha = load_data_from_github("lista_beneficios.csv")
+    df, file_sha = carregar_dados_controle("lista_beneficios.csv")
     
     # Garantir que o DataFrame tenha a coluna ID
     df = garantir_coluna_id(df)
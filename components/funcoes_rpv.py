@@ -168,8 +168,8 @@ def interface_lista_rpv(df, perfil_usuario):
     if "preview_novas_linhas_rpv" in st.session_state and len(st.session_state["preview_novas_linhas_rpv"]) > 0:
         st.warning(f"⚠️ Você tem {len(st.session_state['preview_novas_linhas_rpv'])} linha(s) não salva(s)")
         if st.button("💾 Salvar Alterações", type="primary"):
-            from components.functions_controle import save_data_to_github_seguro
-            novo_sha = save_data_to_github_seguro(
+            from components.functions_controle import salvar_dados_controle
+            novo_sha = salvar_dados_controle(
                 st.session_state.df_editado_rpv,
                 "lista_rpv.csv",
                 "file_sha_rpv"
@@ -296,6 +296,9 @@ def interface_edicao_rpv(df, rpv_id, status_atual, perfil_usuario):
     with col_info3:
         st.write(f"**Data Cadastro:** {linha_processo.get('Data Cadastro', 'N/A')}")
     
+    from components.functions_controle import interface_historico_linha
+    interface_historico_linha("lista_rpv.csv", rpv_id)
+    
     st.markdown("---")
     
     # ETAPA 1: Enviado -> Anexar PDF da RPV (Cadastrador)
@@ -324,18 +327,12 @@ def interface_edicao_rpv(df, rpv_id, status_atual, perfil_usuario):
                 
                 if pdf_url:
                     # Atualizar DataFrame
-                    idx = df[df["ID"] == rpv_id].index[0]
-                    st.session_state.df_editado_rpv.loc[idx, "PDF RPV"] = pdf_url
-                    st.session_state.df_editado_rpv.loc[idx, "Data Envio"] = datetime.now().strftime("%d/%m/%Y %H:%M")
-                    st.session_state.df_editado_rpv.loc[idx, "Enviado Por"] = st.session_state.get("usuario", "Sistema")
-                    
-                    # Salvar no GitHub
-                    from components.functions_controle import save_data_to_github_seguro
-                    novo_sha = save_data_to_github_seguro(
-                        st.session_state.df_editado_rpv,
-                        "lista_rpv.csv",
-                        "file_sha_rpv"
-                    )
+                    from components.functions_controle import salvar_linha_controle
+                    novo_sha = salvar_linha_controle(st.session_state.df_editado_rpv, "rpv", rpv_id, {
+                        "PDF RPV": pdf_url,
+                        "Data Envio": datetime.now().strftime("%d/%m/%Y %H:%M"),
+                        "Enviado Por": st.session_state.get("usuario", "Sistema"),
+                    }, "lista_rpv.csv", "file_sha_rpv")
                     st.session_state.file_sha_rpv = novo_sha
                     
                     st.success("✅ PDF da RPV enviado com sucesso!")
@@ -367,19 +364,13 @@ def interface_edicao_rpv(df, rpv_id, status_atual, perfil_usuario):
                 
                 if certidao_url:
                     # Atualizar DataFrame
-                    idx = df[df["ID"] == rpv_id].index[0]
-                    st.session_state.df_editado_rpv.loc[idx, "Status"] = "Certidão anexa"
-                    st.session_state.df_editado_rpv.loc[idx, "Certidão Anexada"] = certidao_url
-                    st.session_state.df_editado_rpv.loc[idx, "Data Certidão"] = datetime.now().strftime("%d/%m/%Y %H:%M")
-                    st.session_state.df_editado_rpv.loc[idx, "Anexado Certidão Por"] = st.session_state.get("usuario", "Sistema")
-                    
-                    # Salvar no GitHub
-                    from components.functions_controle import save_data_to_github_seguro
-                    novo_sha = save_data_to_github_seguro(
-                        st.session_state.df_editado_rpv,
-                        "lista_rpv.csv",
-                        "file_sha_rpv"
-                    )
+                    from components.functions_controle import salvar_linha_controle
+                    novo_sha = salvar_linha_controle(st.session_state.df_editado_rpv, "rpv", rpv_id, {
+                        "Status": "Certidão anexa",
+                        "Certidão Anexada": certidao_url,
+                        "Data Certidão": datetime.now().strftime("%d/%m/%Y %H:%M"),
+                        "Anexado Certidão Por": st.session_state.get("usuario", "Sistema"),
+                    }, "lista_rpv.csv", "file_sha_rpv")
                     st.session_state.file_sha_rpv = novo_sha
                     
                     st.success("✅ Certidão salva com sucesso!")
@@ -391,18 +382,12 @@ def interface_edicao_rpv(df, rpv_id, status_atual, perfil_usuario):
         
         if st.button("📤 Enviar para Rodrigo", type="primary", key=f"enviar_rodrigo_{rpv_id}"):
             # Atualizar DataFrame
-            idx = df[df["ID"] == rpv_id].index[0]
-            st.session_state.df_editado_rpv.loc[idx, "Status"] = "Enviado para Rodrigo"
-            st.session_state.df_editado_rpv.loc[idx, "Data Envio Rodrigo"] = datetime.now().strftime("%d/%m/%Y %H:%M")
-            st.session_state.df_editado_rpv.loc[idx, "Enviado Rodrigo Por"] = st.session_state.get("usuario", "Sistema")
-            
-            # Salvar no GitHub
-            from components.functions_controle import save_data_to_github_seguro
-            novo_sha = save_data_to_github_seguro(
-                st.session_state.df_editado_rpv,
-                "lista_rpv.csv",
-                "file_sha_rpv"
-            )
+            from components.functions_controle import salvar_linha_controle
+            novo_sha = salvar_linha_controle(st.session_state.df_editado_rpv, "rpv", rpv_id, {
+                "Status": "Enviado para Rodrigo",
+                "Data Envio Rodrigo": datetime.now().strftime("%d/%m/%Y %H:%M"),
+                "Enviado Rodrigo Por": st.session_state.get("usuario", "Sistema"),
+            }, "lista_rpv.csv", "file_sha_rpv")
             st.session_state.file_sha_rpv = novo_sha
             
             st.success("✅ RPV enviada para Rodrigo com sucesso!")
@@ -454,34 +439,28 @@ def interface_edicao_rpv(df, rpv_id, status_atual, perfil_usuario):
            valor_escritorio:
             
             if st.button("✅ Finalizar RPV", type="primary", key=f"finalizar_rpv_{rpv_id}"):
-                # Atualizar DataFrame
-                idx = df[df["ID"] == rpv_id].index[0]
-                
                 # Salvar arquivos se foram anexados
-                from components.functions_controle import salvar_arquivo
+                from components.functions_controle import salvar_arquivo, salvar_linha_controle
+                valores = {}
                 
                 if comprovante_saque:
                     saque_url = salvar_arquivo(comprovante_saque, numero_processo, "saque")
                     if saque_url:
-                        st.session_state.df_editado_rpv.loc[idx, "Comprovante Saque"] = saque_url
+                        valores["Comprovante Saque"] = saque_url
                 
                 if comprovante_pagamento:
                     pagamento_url = salvar_arquivo(comprovante_pagamento, numero_processo, "pagamento")
                     if pagamento_url:
-                        st.session_state.df_editado_rpv.loc[idx, "Comprovante Pagamento"] = pagamento_url
+                        valores["Comprovante Pagamento"] = pagamento_url
                 
                 # Atualizar status e valores
-                st.session_state.df_editado_rpv.loc[idx, "Status"] = "Finalizado"
-                st.session_state.df_editado_rpv.loc[idx, "Valor Final Escritório"] = valor_escritorio
-                st.session_state.df_editado_rpv.loc[idx, "Data Finalização"] = datetime.now().strftime("%d/%m/%Y %H:%M")
-                st.session_state.df_editado_rpv.loc[idx, "Finalizado Por"] = st.session_state.get("usuario", "Sistema")
-                
-                # Salvar no GitHub
-                from components.functions_controle import save_data_to_github_seguro
-                novo_sha = save_data_to_github_seguro(
-                    st.session_state.df_editado_rpv,
-                    "lista_rpv.csv",
-                    "file_sha_rpv"
+                valores["Status"] = "Finalizado"
+                valores["Valor Final Escritório"] = valor_escritorio
+                valores["Data Finalização"] = datetime.now().strftime("%d/%m/%Y %H:%M")
+                valores["Finalizado Por"] = st.session_state.get("usuario", "Sistema")
+                novo_sha = salvar_linha_controle(
+                    st.session_state.df_editado_rpv, "rpv", rpv_id, valores,
+                    "lista_rpv.csv", "file_sha_rpv"
                 )
                 st.session_state.file_sha_rpv = novo_sha
                 
@@ -499,10 +478,11 @@ def interface_fluxo_trabalho_rpv(df, perfil_usuario):
     col_dash1, col_dash2, col_dash3, col_dash4 = st.columns(4)
     
     # Contadores por status
-    total_enviados = len(df[df["Status"] == "Enviado"]) if "Status" in df.columns else 0
-    total_certidao = len(df[df["Status"] == "Certidão anexa"]) if "Status" in df.columns else 0
-    total_rodrigo = len(df[df["Status"] == "Enviado para Rodrigo"]) if "Status" in df.columns else 0
-    total_finalizados = len(df[df["Status"] == "Finalizado"]) if "Status" in df.columns else 0
+    from components.functions_controle import contar_por_status
+    total_enviados = contar_por_status(df, "rpv", "Enviado")
+    total_certidao = contar_por_status(df, "rpv", "Certidão anexa")
+    total_rodrigo = contar_por_status(df, "rpv", "Enviado para Rodrigo")
+    total_finalizados = contar_por_status(df, "rpv", "Finalizado")
     
     with col_dash1:
         st.metric("📝 Enviados", total_enviados)
@@ -533,8 +513,9 @@ def interface_cadastrador_fluxo_rpv(df):
     st.markdown("### 👨‍💻 Ações do Cadastrador")
     
     # Processos que precisam de PDF
+    from components.functions_controle import linhas_por_status, paginar_fila
     if "Status" in df.columns:
-        processos_pendentes = df[df["Status"] == "Enviado"]
+        processos_pendentes = linhas_por_status(df, "rpv", "Enviado")
         processos_sem_pdf = processos_pendentes[processos_pendentes["PDF RPV"].isna() | (processos_pendentes["PDF RPV"] == "")]
     else:
         processos_sem_pdf = pd.DataFrame()
@@ -542,7 +523,7 @@ def interface_cadastrador_fluxo_rpv(df):
     if len(processos_sem_pdf) > 0:
         st.markdown("#### 📎 RPVs aguardando anexação de PDF:")
         
-        for _, processo in processos_sem_pdf.iterrows():
+        for _, processo in paginar_fila(processos_sem_pdf, "rpv_sem_pdf").iterrows():
             with st.expander(f"📋 {processo['Processo']} - {processo['Beneficiário']}"):
                 col_info, col_acao = st.columns([2, 1])
                 
@@ -574,17 +555,18 @@ def interface_juridico_fluxo_rpv(df):
     st.markdown("### ⚖️ Ações do Jurídico")
     
     # Processos que solicitam certidão
+    from components.functions_controle import linhas_por_status, paginar_fila
     if "Solicitar Certidão" in df.columns and "Status" in df.columns:
-        solicitados = df[(df["Solicitar Certidão"] == "Sim") & 
-                         (df["Status"] == "Enviado") & 
-                         (~df["PDF RPV"].isna() & df["PDF RPV"] != "")]
+        enviados = linhas_por_status(df, "rpv", "Enviado")
+        solicitados = enviados[(enviados["Solicitar Certidão"] == "Sim") & 
+                               (~enviados["PDF RPV"].isna() & enviados["PDF RPV"] != "")]
     else:
         solicitados = pd.DataFrame()
     
     if len(solicitados) > 0:
         st.markdown("#### 📑 RPVs com solicitação de certidão:")
         
-        for _, processo in solicitados.iterrows():
+        for _, processo in paginar_fila(solicitados, "rpv_certidao").iterrows():
             with st.expander(f"📋 {processo['Processo']} - {processo['Beneficiário']}"):
                 col_info, col_docs, col_acao = st.columns([2, 1, 1])
                 
@@ -608,7 +590,7 @@ def interface_juridico_fluxo_rpv(df):
     
     # Histórico de certidões anexadas
     if "Status" in df.columns:
-        certidoes_anexadas = df[df["Status"] == "Certidão anexa"]
+        certidoes_anexadas = linhas_por_status(df, "rpv", "Certidão anexa")
         if len(certidoes_anexadas) > 0:
             st.markdown("#### 📤 Certidões anexadas recentemente:")
             st.dataframe(
@@ -621,18 +603,15 @@ def interface_financeiro_fluxo_rpv(df):
     st.markdown("### 💰 Ações do Financeiro")
     
     # Separar processos por etapa
-    if "Status" in df.columns:
-        com_certidao = df[df["Status"] == "Certidão anexa"]
-        com_rodrigo = df[df["Status"] == "Enviado para Rodrigo"]
-    else:
-        com_certidao = pd.DataFrame()
-        com_rodrigo = pd.DataFrame()
+    from components.functions_controle import linhas_por_status, paginar_fila
+    com_certidao = linhas_por_status(df, "rpv", "Certidão anexa")
+    com_rodrigo = linhas_por_status(df, "rpv", "Enviado para Rodrigo")
     
     # ETAPA 3: RPVs para enviar ao Rodrigo
     if len(com_certidao) > 0:
         st.markdown("#### 📤 Enviar para o Rodrigo:")
         
-        for _, processo in com_certidao.iterrows():
+        for _, processo in paginar_fila(com_certidao, "rpv_financeiro").iterrows():
             with st.expander(f"📋 {processo['Processo']} - {processo['Beneficiário']}"):
                 col_info, col_docs, col_acao = st.columns([2, 1, 1])
                 
@@ -652,18 +631,12 @@ def interface_financeiro_fluxo_rpv(df):
                 
                 with col_acao:
                     if st.button(f"📤 Enviar para Rodrigo", key=f"enviar_rodrigo_fluxo_{processo['ID']}"):
-                        idx = df[df["ID"] == processo["ID"]].index[0]
-                        st.session_state.df_editado_rpv.loc[idx, "Status"] = "Enviado para Rodrigo"
-                        st.session_state.df_editado_rpv.loc[idx, "Data Envio Rodrigo"] = datetime.now().strftime("%d/%m/%Y %H:%M")
-                        st.session_state.df_editado_rpv.loc[idx, "Enviado Rodrigo Por"] = st.session_state.get("usuario", "Sistema")
-                        
-                        # Salvar no GitHub
-                        from components.functions_controle import save_data_to_github_seguro
-                        novo_sha = save_data_to_github_seguro(
-                            st.session_state.df_editado_rpv,
-                            "lista_rpv.csv",
-                            "file_sha_rpv"
-                        )
+                        from components.functions_controle import salvar_linha_controle
+                        novo_sha = salvar_linha_controle(st.session_state.df_editado_rpv, "rpv", processo["ID"], {
+                            "Status": "Enviado para Rodrigo",
+                            "Data Envio Rodrigo": datetime.now().strftime("%d/%m/%Y %H:%M"),
+                            "Enviado Rodrigo Por": st.session_state.get("usuario", "Sistema"),
+                        }, "lista_rpv.csv", "file_sha_rpv")
                         st.session_state.file_sha_rpv = novo_sha
                         
                         st.success("✅ RPV enviada para o Rodrigo!")
@@ -673,7 +646,7 @@ def interface_financeiro_fluxo_rpv(df):
     if len(com_rodrigo) > 0:
         st.markdown("#### ✅ Finalizar RPVs:")
         
-        for _, processo in com_rodrigo.iterrows():
+        for _, processo in paginar_fila(com_rodrigo, "rpv_finalizar").iterrows():
             with st.expander(f"📋 {processo['Processo']} - {processo['Beneficiário']} - FINALIZAR"):
                 if st.button(f"✅ Finalizar RPV", key=f"ir_finalizar_{processo['ID']}"):
                     st.session_state['rpv_aberto'] = processo['ID']
@@ -681,7 +654,7 @@ def interface_financeiro_fluxo_rpv(df):
     
     # Mostrar processos finalizados recentemente
     if "Status" in df.columns:
-        finalizados_recentes = df[df["Status"] == "Finalizado"].tail(5)
+        finalizados_recentes = linhas_por_status(df, "rpv", "Finalizado").tail(5)
         if len(finalizados_recentes) > 0:
             st.markdown("#### 🎉 Últimos processos finalizados:")
             st.dataframe(
@@ -731,12 +704,10 @@ def interface_visualizar_dados_rpv(df):
     if certidao_filtro != "Todos" and "Solicitar Certidão" in df.columns:
         df_filtrado = df_filtrado[df_filtrado["Solicitar Certidão"] == certidao_filtro]
     
-    # Filtro por pesquisa
+    # Filtro por pesquisa (índice invertido de nome, processo e CPF)
     if pesquisa:
-        mask = df_filtrado.apply(lambda row: any(
-            pesquisa.lower() in str(value).lower() for value in row.values
-        ), axis=1)
-        df_filtrado = df_filtrado[mask]
+        from components.functions_controle import filtrar_por_busca, COLUNAS_BUSCA_RPV
+        df_filtrado = filtrar_por_busca(df_filtrado, df, pesquisa, COLUNAS_BUSCA_RPV)
     
     # Exibir dados
     if len(df_filtrado) > 0:
@@ -751,6 +722,14 @@ def interface_visualizar_dados_rpv(df):
             st.markdown(href, unsafe_allow_html=True)
     else:
         st.info("Nenhuma RPV encontrada com os filtros aplicados")
+    
+    # Tempo por etapa e gargalos do fluxo
+    from components.functions_controle import (
+        interface_gargalos_fluxo, interface_tabela_em_data, interface_metricas_github
+    )
+    interface_gargalos_fluxo(df, "rpv")
+    interface_tabela_em_data("lista_rpv.csv")
+    interface_metricas_github("lista_rpv.csv")
 
 def interface_cadastro_rpv(df, perfil_usuario):
     """Interface para cadastrar novos RPVs"""
@@ -795,11 +774,15 @@ def interface_cadastro_rpv(df, perfil_usuario):
             st.warning("⚠️ CPF inválido. Verifique e tente novamente.")
             return
         
-        # Verificar se processo já existe
-        if "Processo" in df.columns and processo_formatado in df["Processo"].values:
+        # Verificar se processo já existe (nesta sessão ou gravado por outro usuário)
+        from components.functions_controle import BACKEND_ARMAZENAMENTO, buscar_por_processo_sqlite
+        existentes = df[df["Processo"] == processo_formatado] if "Processo" in df.columns else df.iloc[0:0]
+        if existentes.empty and BACKEND_ARMAZENAMENTO == "sqlite":
+            existentes = buscar_por_processo_sqlite("lista_rpv.csv", processo_formatado)
+        if not existentes.empty:
             st.warning(f"⚠️ Processo {processo_formatado} já cadastrado")
             # Mostrar detalhes do processo existente
-            proc_existente = df[df["Processo"] == processo_formatado].iloc[0]
+            proc_existente = existentes.iloc[0]
             st.info(f"**Beneficiário:** {proc_existente.get('Beneficiário', 'N/A')}\n"
                     f"**Status:** {proc_existente.get('Status', 'N/A')}")
             return
@@ -842,8 +825,8 @@ def interface_cadastro_rpv(df, perfil_usuario):
         st.session_state.df_editado_rpv = pd.concat([st.session_state.df_editado_rpv, nova_linha_df], ignore_index=True)
         
         # Salvar no GitHub
-        from components.functions_controle import save_data_to_github_seguro
-        novo_sha = save_data_to_github_seguro(
+        from components.functions_controle import salvar_dados_controle
+        novo_sha = salvar_dados_controle(
             st.session_state.df_editado_rpv,
             "lista_rpv.csv",
             "file_sha_rpv"
@@ -871,8 +854,8 @@ def interface_cadastro_rpv(df, perfil_usuario):
             st.markdown(f"**RPV {i+1}:** {linha['Processo']} - {linha['Beneficiário']}")
         
         if st.button("💾 Salvar Todas Pendentes", type="primary"):
-            from components.functions_controle import save_data_to_github_seguro
-            novo_sha = save_data_to_github_seguro(
+            from components.functions_controle import salvar_dados_controle
+            novo_sha = salvar_dados_controle(
                 st.session_state.df_editado_rpv,
                 "lista_rpv.csv",
                 "file_sha_rpv"
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from components.functions_controle import mostrar_diferencas, comparar_dataframes
 
 @st.cache_data
 def load_data(file_path):
@@ -25,28 +26,3 @@ def save_data(df, file_path, suffix=""):
         novo_arquivo = file_path.replace('.xlsx', f'_{timestamp}.xlsx')
         df.to_excel(novo_arquivo, index=False)
         return novo_arquivo
-
-def mostrar_diferencas(df_original, df_editado):
-    diff = []
-    if len(df_editado) > len(df_original):
-        novas_linhas = df_editado.iloc[len(df_original):]
-        diff.append("Novas linhas adicionadas:")
-        diff.append(novas_linhas)
-    alteracoes = []
-    linhas_comuns = min(len(df_original), len(df_editado))
-    for i in range(linhas_comuns):
-        for col in df_original.columns:
-            val_orig = df_original.iloc[i][col]
-            val_edit = df_editado.iloc[i][col]
-            if (pd.isna(val_orig) and pd.isna(val_edit)):
-                continue
-            if str(val_orig) != str(val_edit):
-                alteracoes.append(
-                    f"Linha {i+1}, Coluna '{col}': '{val_orig if not pd.isna(val_orig) else ''}' → '{val_edit if not pd.isna(val_edit) else ''}'"
-                )
-    if alteracoes:
-        diff.append("Células alteradas:")
-        diff.extend(alteracoes)
-    if not diff:
-        diff.append("Nenhuma diferença encontrada.")
-    return diff
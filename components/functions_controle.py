@@ -1,9 +1,31 @@
 # components/functions_controle.py
 import streamlit as st
 import pandas as pd
+import numpy as np
 import requests
 import base64
+import json
+import pickle
+import re
+import sqlite3
+import threading
+import time
+import itertools
+import weakref
+from collections import OrderedDict, deque
+from pathlib import Path
+from bisect import bisect_left, insort
 from datetime import datetime
+from functools import partial
+from io import StringIO
+from packaging.version import Version
+from unidecode import unidecode
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from data.anexos_store import guardar_anexo, interpretar_referencia, caminho_anexo, tipo_mime
+from data.metricas_fluxo import indicadores_fluxo
+from data.sincronizacao import PASTA_CACHE
 
 # =====================================
 # CONFIGURAÇÕES DE PERFIS
@@ -189,37 +211,202 @@ def garantir_coluna_id(df, coluna_id="ID"):
 # FUNÇÕES GITHUB API
 # =====================================
 
+# Abaixo deste nº de requisições restantes, esperar a janela do limite reabrir
+LIMITE_MINIMO_REQUISICOES_GITHUB = 5
+ESPERA_MAXIMA_LIMITE_GITHUB_SEGUNDOS = 60
+LATENCIAS_GUARDADAS_GITHUB = 500
+
+@st.cache_resource
+def _cliente_github():
+    """
+    Cliente único do processo: sessão com pool de conexões, credenciais lidas
+    uma vez do secrets, estado do limite de requisições e métricas de latência.
+    """
+    credenciais = st.secrets["github"]
+
+    sessao = requests.Session()
+    retentativas = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True
+    )
+    adaptador = HTTPAdapter(pool_connections=2, pool_maxsize=8, max_retries=retentativas)
+    sessao.mount("https://", adaptador)
+    sessao.headers.update({
+        "Authorization": f'token {credenciais["token"]}',
+        "Accept": "application/vnd.github+json",
+        "X-GitHub-Api-Version": "2022-11-28"
+    })
+
+    return {
+        "sessao": sessao,
+        "repositorio": f'https://api.github.com/repos/{credenciais["repo_owner"]}/{credenciais["repo_name"]}',
+        "lock": threading.Lock(),
+        "limite": {"restantes": None, "reinicio": None},
+        "metricas": {},
+        "latencias": deque(maxlen=LATENCIAS_GUARDADAS_GITHUB),
+    }
+
+def url_conteudo_github(caminho):
+    """URL da API de conteúdo para um caminho do repositório"""
+    return f'{_cliente_github()["repositorio"]}/contents/{caminho}'
+
 def get_github_api_info(filename):
     """Obtém informações da API do GitHub"""
-    repo_owner = st.secrets["github"]["repo_owner"]
-    repo_name = st.secrets["github"]["repo_name"]
-    branch = "main"
-    api_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/contents/bases/processos/{filename}"
-    return api_url, branch
+    return url_conteudo_github(f"bases/processos/{filename}"), "main"
+
+def _aguardar_limite_github(cliente):
+    """Espera a janela do limite reabrir quando restam poucas requisições"""
+    with cliente["lock"]:
+        restantes = cliente["limite"]["restantes"]
+        reinicio = cliente["limite"]["reinicio"]
+
+    if restantes is None or restantes > LIMITE_MINIMO_REQUISICOES_GITHUB or reinicio is None:
+        return
+
+    espera = reinicio - time.time()
+    if espera > 0:
+        espera = min(espera, ESPERA_MAXIMA_LIMITE_GITHUB_SEGUNDOS)
+        print(f"⏳ Limite da API do GitHub quase no fim ({restantes} restantes), aguardando {espera:.0f}s")
+        time.sleep(espera)
+
+def _registrar_resposta_github(cliente, metodo, url, status, segundos, r=None):
+    """Atualiza o limite (cabeçalhos X-RateLimit-*) e as métricas por tipo de chamada"""
+    tipo = f"{metodo} {'blob' if '/git/blobs/' in url else 'conteúdo'}"
+
+    with cliente["lock"]:
+        if r is not None and r.headers.get("X-RateLimit-Remaining") is not None:
+            cliente["limite"]["restantes"] = int(r.headers["X-RateLimit-Remaining"])
+            cliente["limite"]["reinicio"] = int(r.headers.get("X-RateLimit-Reset", 0)) or None
+
+        metrica = cliente["metricas"].setdefault(tipo, {"chamadas": 0, "erros": 0, "segundos_total": 0.0, "segundos_max": 0.0})
+        metrica["chamadas"] += 1
+        metrica["erros"] += status is None or (status >= 400 and status not in (404, 409, 422))
+        metrica["segundos_total"] += segundos
+        metrica["segundos_max"] = max(metrica["segundos_max"], segundos)
+        cliente["latencias"].append((datetime.now(), tipo, status, segundos))
+
+def _limite_excedido(r):
+    return r.status_code == 429 or (
+        r.status_code == 403 and (r.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in r.headers)
+    )
+
+def requisicao_github(metodo, url, **kwargs):
+    """
+    Requisição à API do GitHub pela sessão compartilhada, com timeout padrão,
+    espera quando o limite está no fim e uma nova tentativa após 403/429 de limite.
+    """
+    cliente = _cliente_github()
+    kwargs.setdefault("timeout", TIMEOUT_GITHUB_SEGUNDOS)
+
+    for tentativa in range(2):
+        _aguardar_limite_github(cliente)
+
+        inicio = time.perf_counter()
+        try:
+            r = cliente["sessao"].request(metodo, url, **kwargs)
+        except Exception:
+            _registrar_resposta_github(cliente, metodo, url, None, time.perf_counter() - inicio)
+            raise
+        _registrar_resposta_github(cliente, metodo, url, r.status_code, time.perf_counter() - inicio, r)
+
+        if tentativa == 0 and _limite_excedido(r):
+            espera = float(r.headers.get("Retry-After") or 0) or (
+                int(r.headers.get("X-RateLimit-Reset", 0)) - time.time()
+            )
+            time.sleep(min(max(espera, 1), ESPERA_MAXIMA_LIMITE_GITHUB_SEGUNDOS))
+            continue
+        return r
+
+    return r
+
+def metricas_github():
+    """Resumo das chamadas à API do GitHub neste processo (por tipo) e limite restante"""
+    cliente = _cliente_github()
+    with cliente["lock"]:
+        metricas = {tipo: dict(m) for tipo, m in cliente["metricas"].items()}
+        latencias = list(cliente["latencias"])
+        limite = dict(cliente["limite"])
+
+    resumo = pd.DataFrame.from_dict(metricas, orient="index")
+    if len(resumo):
+        resumo["segundos_medio"] = resumo["segundos_total"] / resumo["chamadas"]
+        recentes = pd.DataFrame(latencias, columns=["momento", "tipo", "status", "segundos"])
+        resumo["p95_recente"] = recentes.groupby("tipo")["segundos"].quantile(0.95)
+    return {"resumo": resumo, "limite": limite}
+
+@st.cache_resource
+def _estado_cache_github():
+    """CSVs já baixados no processo: ETag, SHA do blob e DataFrame lido, por arquivo"""
+    return {"lock": threading.Lock(), "arquivos": {}}
+
+def _guardar_cache_github(filename, sha, etag, df):
+    estado = _estado_cache_github()
+    with estado["lock"]:
+        estado["arquivos"][filename] = {"sha": sha, "etag": etag, "df": df}
+
+def _ler_csv_texto(content):
+    df = pd.read_csv(StringIO(content), sep=';')
+    # GARANTIR QUE TODOS OS REGISTROS TENHAM ID ÚNICO
+    return garantir_coluna_id(df, "ID")
+
+def _conteudo_arquivo_github(api_url, file_data):
+    """Texto do arquivo: inline (base64) ou, acima de 1 MB, pelo blob em formato raw"""
+    if file_data.get("encoding") != "none":
+        return base64.b64decode(file_data["content"]).decode("utf-8")
+
+    blob_url = api_url.split("/contents/")[0] + f"/git/blobs/{file_data['sha']}"
+    r = requisicao_github("GET", blob_url, headers={"Accept": "application/vnd.github.raw"})
+    r.raise_for_status()
+    return r.content.decode("utf-8")
+
+def _baixar_csv_github(filename):
+    """
+    GET condicional do CSV no GitHub (If-None-Match com o ETag guardado).
+    Retorna (status_code, df, sha); um 304 volta como 200 com o DataFrame do
+    cache. df/sha são None se não for 200.
+    """
+    api_url, branch = get_github_api_info(filename)
+    estado = _estado_cache_github()
+    with estado["lock"]:
+        cache = estado["arquivos"].get(filename)
+
+    headers = {"If-None-Match": cache["etag"]} if cache and cache["etag"] else {}
+    r = requisicao_github("GET", api_url, headers=headers)
+
+    if r.status_code == 304:
+        return 200, cache["df"].copy(), cache["sha"]
+    if r.status_code != 200:
+        return r.status_code, None, None
+
+    file_data = r.json()
+    sha = file_data["sha"]
+
+    if cache and cache["sha"] == sha:
+        # Mesmo blob (ETag mudou ou foi gravado por este processo): não reler o CSV
+        df = cache["df"]
+    else:
+        df = _ler_csv_texto(_conteudo_arquivo_github(api_url, file_data))
+
+    _guardar_cache_github(filename, sha, r.headers.get("ETag"), df)
+    return r.status_code, df.copy(), sha
 
 def load_data_from_github(filename):
     """Carrega dados do GitHub com garantia de ID único"""
     try:
-        api_url, branch = get_github_api_info(filename)
-        headers = {
-            "Authorization": f'token {st.secrets["github"]["token"]}',
-            "Accept": "application/vnd.github+json"
-        }
-        r = requests.get(api_url, headers=headers)
+        status_code, df, sha = _baixar_csv_github(filename)
         
-        if r.status_code == 200:
-            file_data = r.json()
-            content = base64.b64decode(file_data["content"]).decode("utf-8")
-            from io import StringIO
-            df = pd.read_csv(StringIO(content), sep=';')
-            
-            # GARANTIR QUE TODOS OS REGISTROS TENHAM ID ÚNICO
-            df = garantir_coluna_id(df, "ID")
-            
-            return df, file_data["sha"]
+        if status_code == 200:
+            # Guardar a versão: base do merge quando esta sessão salvar
+            guardar_base_sessao(filename, sha, df)
+            return df, sha
         else:
             # Se o arquivo não existir, criar DataFrame vazio
             df_vazio = criar_dataframe_vazio_por_tipo(filename)
+            if status_code == 404:
+                guardar_base_sessao(filename, None, df_vazio)
             return df_vazio, None
             
     except Exception as e:
@@ -272,49 +459,33 @@ def criar_dataframe_vazio_por_tipo(filename):
 
 
 def save_data_to_github_seguro(df, filename, session_state_key):
-    """Salva DataFrame no GitHub com recarga automática do SHA"""
+    """
+    Registra as alterações da sessão na fila de gravação do GitHub.
+    Retorna a versão a guardar na sessão (base da próxima gravação) ou None.
+    """
     try:
-        # SEMPRE RECARREGAR SHA ANTES DE SALVAR
-        st.info("🔄 Sincronizando com GitHub...")
-        df_atual, sha_atual = load_data_from_github(filename)
-        
-        if not sha_atual:
-            st.error("❌ Não foi possível obter SHA do arquivo")
+        base = obter_base_sessao(filename, resolver_versao_sessao(session_state_key))
+        if base is None:
+            st.error(MENSAGEM_BASE_DESCONHECIDA)
             return None
         
-        # Salvar com SHA atualizado
-        api_url, branch = get_github_api_info(filename)
-        headers = {
-            "Authorization": f'token {st.secrets["github"]["token"]}',
-            "Accept": "application/vnd.github+json"
-        }
+        erro_anterior = obter_erro_fila_github(filename)
+        if erro_anterior:
+            st.warning(f"⚠️ Última gravação no GitHub falhou e será repetida: {erro_anterior}")
         
-        from io import StringIO
-        csv_buffer = StringIO()
-        df.to_csv(csv_buffer, index=False, sep=';')
-        content = base64.b64encode(csv_buffer.getvalue().encode("utf-8")).decode("utf-8")
+        nova_versao, linhagem = enfileirar_alteracoes_github(df, filename, base)
+        guardar_base_sessao(filename, nova_versao, df, linhagem)
         
-        data = {
-            "message": f"Atualização via Streamlit {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}",
-            "content": content,
-            "branch": branch,
-            "sha": sha_atual
-        }
+        # Atualizar versão no session_state
+        if session_state_key:
+            st.session_state[session_state_key] = nova_versao
         
-        r = requests.put(api_url, headers=headers, json=data)
-        
-        if r.status_code in [200, 201]:
-            novo_sha = r.json()["content"]["sha"]
-            
-            # Atualizar SHA no session_state
-            if session_state_key:
-                st.session_state[session_state_key] = novo_sha
-            
-            st.success("✅ Alterações salvas no GitHub com sucesso!")
-            return novo_sha
-        else:
-            st.error(f"❌ Erro ao salvar no GitHub: {r.status_code} - {r.text}")
-            return None
+        # Só o diário em disco está garantido: o commit sai depois, pelo worker
+        st.info(
+            f"🕓 Alterações na fila de envio ao GitHub ({contar_pendencias_github(filename)} pendente(s)). "
+            f"O commit sai em até {JANELA_COMMIT_GITHUB_SEGUNDOS} s."
+        )
+        return nova_versao
             
     except Exception as e:
         st.error(f"❌ Erro ao salvar dados: {e}")
@@ -330,11 +501,1102 @@ def save_data_local(df, filename):
         st.error(f"❌ Erro ao salvar localmente: {e}")
         return False
 
+# =====================================
+# FILA DE GRAVAÇÃO NO GITHUB (WRITE-BEHIND)
+# =====================================
+
+# Alterações de todas as sessões dentro da janela viram um único commit
+JANELA_COMMIT_GITHUB_SEGUNDOS = 3
+TENTATIVAS_COMMIT_GITHUB = 5
+TIMEOUT_GITHUB_SEGUNDOS = 30
+# Depois de TENTATIVAS_COMMIT_GITHUB falhas seguidas o worker continua, neste intervalo
+INTERVALO_MAXIMO_REENVIO_GITHUB_SEGUNDOS = 300
+
+# Diário em disco com as pendências de cada arquivo até o PUT dar certo
+# (retomado quando o processo reinicia)
+PASTA_FILA_GITHUB = PASTA_CACHE / "fila_github"
+
+# Versões guardadas por sessão (e por arquivo) como base do merge
+MAX_BASES_SESSAO = 4
+
+MENSAGEM_BASE_DESCONHECIDA = (
+    "❌ A versão em que suas edições se baseiam não está mais disponível. "
+    "Recarregue a página e refaça a alteração."
+)
+
+@st.cache_resource
+def _estado_fila_github():
+    """Estado único do processo: pendências, versões conhecidas e worker por arquivo"""
+    estado = {"lock": threading.Lock(), "arquivos": {}, "contador": itertools.count(1)}
+    _retomar_diarios_github(estado)
+    return estado
+
+def _estado_arquivo_github(estado, filename):
+    return estado["arquivos"].setdefault(filename, {
+        "pendentes": [],
+        "em_envio": [],
+        "base_exportada": None,
+        "ids_remapeados": {},
+        "thread": None,
+        "erro": None,
+    })
+
+def _caminho_diario_github(filename):
+    return PASTA_FILA_GITHUB / f"{Path(filename).stem}.pkl"
+
+def _gravar_diario_github(filename, arquivo):
+    """Grava em disco o lote em envio + as pendências do arquivo (chamar com o lock)"""
+    itens = arquivo["em_envio"] + arquivo["pendentes"]
+    caminho = _caminho_diario_github(filename)
+    if not itens:
+        caminho.unlink(missing_ok=True)
+        return
+
+    PASTA_FILA_GITHUB.mkdir(parents=True, exist_ok=True)
+    arquivo_tmp = caminho.with_suffix(".tmp")
+    with open(arquivo_tmp, "wb") as f:
+        pickle.dump({
+            "filename": filename,
+            "pendentes": itens,
+            "ids_remapeados": arquivo["ids_remapeados"],
+        }, f)
+    arquivo_tmp.replace(caminho)
+
+def _retomar_diarios_github(estado):
+    """Recoloca na fila as pendências que ficaram no disco (processo reiniciado)"""
+    if not PASTA_FILA_GITHUB.exists():
+        return
+
+    for caminho in PASTA_FILA_GITHUB.glob("*.pkl"):
+        try:
+            with open(caminho, "rb") as f:
+                diario = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Diário da fila do GitHub ilegível ({caminho.name}): {e}")
+            continue
+
+        filename = diario["filename"]
+        arquivo = _estado_arquivo_github(estado, filename)
+        arquivo["pendentes"] = diario["pendentes"]
+        arquivo["ids_remapeados"] = diario["ids_remapeados"]
+        if arquivo["pendentes"]:
+            print(f"📂 {filename}: {len(arquivo['pendentes'])} alterações pendentes retomadas do disco")
+            _iniciar_worker_github(filename, estado, arquivo)
+
+def _iniciar_worker_github(filename, estado, arquivo):
+    """Sobe o worker do arquivo se houver pendências e ele não estiver rodando (chamar com o lock)"""
+    if arquivo["pendentes"] and (arquivo["thread"] is None or not arquivo["thread"].is_alive()):
+        arquivo["thread"] = threading.Thread(
+            target=_processar_fila_github, args=(filename, estado), daemon=True
+        )
+        arquivo["thread"].start()
+
+def _celulas_diferentes(base, novo):
+    """
+    Máscara (linhas × colunas) das células diferentes entre dois DataFrames já
+    alinhados. Compara coluna a coluna: vazio (NaN/None/'') equivale a vazio e
+    só as células com valores diferentes são comparadas também como texto e
+    como número (5.0 lido do CSV == '5' digitado).
+    """
+    mascara = np.zeros(base.shape, dtype=bool)
+
+    for j in range(base.shape[1]):
+        valores_base = base.iloc[:, j].to_numpy(dtype=object)
+        valores_novos = novo.iloc[:, j].to_numpy(dtype=object)
+        vazio_base = pd.isna(valores_base) | (valores_base == "")
+        vazio_novo = pd.isna(valores_novos) | (valores_novos == "")
+
+        candidatos = np.flatnonzero(vazio_base != vazio_novo)
+        mascara[candidatos, j] = True
+
+        ambos = np.flatnonzero(~vazio_base & ~vazio_novo)
+        iguais = valores_base[ambos] == valores_novos[ambos]
+        if not isinstance(iguais, np.ndarray) or iguais.shape != ambos.shape:
+            iguais = np.zeros(len(ambos), dtype=bool)
+        candidatos = ambos[~iguais.astype(bool)]
+
+        if len(candidatos):
+            texto_base = valores_base[candidatos].astype(str)
+            texto_novo = valores_novos[candidatos].astype(str)
+            candidatos = candidatos[texto_base != texto_novo]
+
+        if len(candidatos):
+            # 1.0 lido do CSV como número e '1' digitado são o mesmo valor
+            numero_base = pd.to_numeric(pd.Series(valores_base[candidatos]), errors="coerce").to_numpy()
+            numero_novo = pd.to_numeric(pd.Series(valores_novos[candidatos]), errors="coerce").to_numpy()
+            mascara[candidatos[~(numero_base == numero_novo)], j] = True
+
+    return mascara
+
+def _indexar_por_id(df, coluna_id="ID"):
+    # Índice object: isin/difference em índice de strings do pyarrow convertem valor a valor
+    df = df.set_axis(pd.Index(df[coluna_id].astype(str), dtype=object, name=coluna_id))
+    return df[~df.index.duplicated(keep="last")]
+
+def guardar_base_sessao(filename, versao, df, linhagem=None):
+    """
+    Guarda no session_state uma cópia do DataFrame como base de merge para
+    `versao` (linhagem None = versão publicada). Cada sessão tem as suas:
+    gravações de outros usuários não despejam a base desta.
+    """
+    bases = st.session_state.setdefault("_bases_controle", {}).setdefault(filename, OrderedDict())
+    if versao not in bases:
+        bases[versao] = (df.copy(), linhagem)
+    bases.move_to_end(versao)
+    while len(bases) > MAX_BASES_SESSAO:
+        bases.popitem(last=False)
+
+def obter_base_sessao(filename, versao):
+    """(df, linhagem) guardados pela sessão para a versão, ou None se desconhecida"""
+    return st.session_state.get("_bases_controle", {}).get(filename, {}).get(versao)
+
+def resolver_versao_sessao(session_state_key):
+    """Versão base da sessão: aceita tanto a chave do session_state quanto o próprio SHA"""
+    if session_state_key in st.session_state:
+        return st.session_state[session_state_key]
+    return session_state_key
+
+def calcular_alteracoes(df_base, df_novo, coluna_id="ID"):
+    """
+    Diferença por ID entre a versão base e a editada: células alteradas
+    {id: {coluna: (texto_base, valor_novo)}}, linhas novas e IDs removidos.
+    """
+    base = _indexar_por_id(df_base, coluna_id)
+    novo = _indexar_por_id(df_novo, coluna_id)
+
+    ids_comuns = novo.index.intersection(base.index)
+    colunas = [c for c in novo.columns if c != coluna_id]
+
+    valores_base = base.reindex(index=ids_comuns, columns=colunas)
+    valores_novos = novo.loc[ids_comuns, colunas]
+    diferentes = _celulas_diferentes(valores_base, valores_novos)
+
+    alteracoes = {}
+    for i, j in zip(*np.nonzero(diferentes)):
+        valor_base = valores_base.iat[i, j]
+        alteracoes.setdefault(ids_comuns[i], {})[colunas[j]] = (
+            "" if pd.isna(valor_base) else str(valor_base), valores_novos.iat[i, j]
+        )
+
+    return {
+        "alteracoes": alteracoes,
+        "novas": novo[~novo.index.isin(base.index)].to_dict("records"),
+        "removidos": list(base.index.difference(novo.index)),
+    }
+
+def aplicar_alteracoes(df_remoto, lote, ids_remapeados, coluna_id="ID"):
+    """
+    Merge de três vias, linha a linha por ID, das alterações enfileiradas sobre
+    a versão atual do GitHub. Célula alterada dos dois lados conta como conflito
+    (vale a alteração mais recente). Retorna (df, nº de conflitos).
+    """
+    df = df_remoto.astype(object).reset_index(drop=True)
+    posicao = {id_: i for i, id_ in enumerate(df[coluna_id].astype(str))}
+    novas_linhas = []
+    removidas = set()
+    conflitos = 0
+    proximo_id = None
+
+    for item in lote:
+        remap = ids_remapeados.setdefault(item["linhagem"], {})
+
+        for linha in item["novas"]:
+            linha = dict(linha)
+            id_ = str(linha.get(coluna_id))
+            if id_ in posicao:
+                # Outra sessão cadastrou com o mesmo ID: gerar o próximo livre
+                # (maior ID calculado uma vez por lote, depois só incrementado)
+                if proximo_id is None:
+                    ids_numericos = pd.to_numeric(
+                        pd.Series(list(posicao), dtype=object), errors="coerce"
+                    ).dropna()
+                    proximo_id = int(ids_numericos.max()) + 1 if len(ids_numericos) else 1
+                while str(proximo_id) in posicao:
+                    proximo_id += 1
+                novo_id = proximo_id
+                remap[id_] = str(novo_id)
+                linha[coluna_id] = novo_id
+                id_ = str(novo_id)
+            posicao[id_] = len(df) + len(novas_linhas)
+            novas_linhas.append(linha)
+
+        for id_, celulas in item["alteracoes"].items():
+            id_ = remap.get(id_, id_)
+            if id_ not in posicao or posicao[id_] in removidas:
+                conflitos += 1  # linha removida no GitHub
+                continue
+
+            i = posicao[id_]
+            for col, (texto_base, valor_novo) in celulas.items():
+                if i < len(df):
+                    if col not in df.columns:
+                        df[col] = None
+                    atual = df.at[i, col]
+                    texto_atual = "" if pd.isna(atual) else str(atual)
+                    if texto_atual not in (texto_base, "" if pd.isna(valor_novo) else str(valor_novo)):
+                        conflitos += 1
+                    df.at[i, col] = valor_novo
+                else:
+                    novas_linhas[i - len(df)][col] = valor_novo
+
+        for id_ in item["removidos"]:
+            id_ = remap.get(id_, id_)
+            if id_ in posicao:
+                removidas.add(posicao.pop(id_))
+
+    if novas_linhas:
+        df = pd.concat([df, pd.DataFrame(novas_linhas)], ignore_index=True)
+    if removidas:
+        df = df.drop(index=sorted(removidas)).reset_index(drop=True)
+
+    return df, conflitos
+
+def enfileirar_alteracoes_github(df, filename, base):
+    """
+    Calcula o diff de `df` contra a base (df, linhagem) e coloca na fila.
+    Sem base (só a exportação do SQLite) compara com o GitHub atual.
+    Retorna (identificador da nova versão pendente, linhagem).
+    """
+    estado = _estado_fila_github()
+
+    if base is None:
+        status_code, df_base, sha = _baixar_csv_github(filename)
+        if status_code == 404:
+            df_base = criar_dataframe_vazio_por_tipo(filename)
+        elif status_code != 200:
+            raise RuntimeError(f"GitHub respondeu {status_code} ao baixar {filename}")
+        linhagem = None
+    else:
+        df_base, linhagem = base
+
+    item = calcular_alteracoes(df_base, df)
+
+    with estado["lock"]:
+        arquivo = _estado_arquivo_github(estado, filename)
+        numero = next(estado["contador"])
+        nova_versao = f"pendente-{numero}"
+        # Linhagem: sequência de gravações de uma sessão (IDs remapeados valem só nela)
+        linhagem = linhagem or f"sessao-{numero}"
+        item["linhagem"] = linhagem
+        _enfileirar_item_github(filename, estado, arquivo, item)
+
+    return nova_versao, linhagem
+
+def _enfileirar_item_github(filename, estado, arquivo, item):
+    """Põe o item na fila (e no diário em disco) e garante o worker (chamar com o lock)"""
+    if item["alteracoes"] or item["novas"] or item["removidos"]:
+        arquivo["pendentes"].append(item)
+        try:
+            _gravar_diario_github(filename, arquivo)
+        except Exception:
+            # Sem diário em disco a alteração não entra na fila
+            arquivo["pendentes"].pop()
+            raise
+
+    _iniciar_worker_github(filename, estado, arquivo)
+
+def obter_erro_fila_github(filename):
+    """Último erro de gravação do arquivo (None se a última gravação deu certo)"""
+    estado = _estado_fila_github()
+    with estado["lock"]:
+        return _estado_arquivo_github(estado, filename)["erro"]
+
+def contar_pendencias_github(filename):
+    """Alterações do arquivo ainda sem commit confirmado no GitHub"""
+    estado = _estado_fila_github()
+    with estado["lock"]:
+        arquivo = _estado_arquivo_github(estado, filename)
+        return len(arquivo["em_envio"]) + len(arquivo["pendentes"])
+
+def _copiar_ids_remapeados(estado, filename):
+    """Cópia dos IDs remapeados do arquivo para o merge rodar fora do lock"""
+    with estado["lock"]:
+        ids_remapeados = _estado_arquivo_github(estado, filename)["ids_remapeados"]
+        return {linhagem: dict(remap) for linhagem, remap in ids_remapeados.items()}
+
+def _mesclar_ids_remapeados(arquivo, ids_remapeados):
+    """Devolve ao estado os IDs remapeados por um merge já gravado (chamar com o lock)"""
+    for linhagem, remap in ids_remapeados.items():
+        arquivo["ids_remapeados"].setdefault(linhagem, {}).update(remap)
+
+def _processar_fila_github(filename, estado):
+    """Worker: a cada janela junta as pendências do arquivo num único commit"""
+    arquivo = estado["arquivos"][filename]
+    falhas = 0
+
+    while True:
+        time.sleep(min(
+            JANELA_COMMIT_GITHUB_SEGUNDOS * (2 ** min(falhas, 16)),
+            INTERVALO_MAXIMO_REENVIO_GITHUB_SEGUNDOS
+        ))
+
+        with estado["lock"]:
+            lote, arquivo["pendentes"] = arquivo["pendentes"], []
+            if not lote:
+                arquivo["thread"] = None
+                return
+            # Continua no diário até o PUT dar certo
+            arquivo["em_envio"] = lote
+
+        ids_remapeados = _copiar_ids_remapeados(estado, filename)
+        erro = _gravar_lote_github(filename, lote, ids_remapeados)
+
+        with estado["lock"]:
+            arquivo["erro"] = erro
+            arquivo["em_envio"] = []
+            if erro is None:
+                falhas = 0
+                _mesclar_ids_remapeados(arquivo, ids_remapeados)
+                try:
+                    _gravar_diario_github(filename, arquivo)
+                except Exception as e:
+                    print(f"⚠️ Não foi possível atualizar o diário de {filename}: {e}")
+                continue
+            # Devolver o lote para a frente da fila (o diário em disco já tem os dois)
+            arquivo["pendentes"] = lote + arquivo["pendentes"]
+            falhas += 1
+            if falhas == TENTATIVAS_COMMIT_GITHUB:
+                print(
+                    f"❌ Gravação de {filename} falhou {falhas}x, nova tentativa a cada "
+                    f"{INTERVALO_MAXIMO_REENVIO_GITHUB_SEGUNDOS} s (pendências no diário em disco)"
+                )
+
+def _gravar_lote_github(filename, lote, ids_remapeados):
+    """
+    Baixa a versão atual, aplica o merge e faz o PUT. `ids_remapeados` é uma
+    cópia (ver _copiar_ids_remapeados). Retorna None ou a mensagem de erro
+    """
+    try:
+        api_url, branch = get_github_api_info(filename)
+
+        for _ in range(TENTATIVAS_COMMIT_GITHUB):
+            status_code, df_remoto, sha_remoto = _baixar_csv_github(filename)
+            if status_code == 404:
+                df_remoto = criar_dataframe_vazio_por_tipo(filename)
+            elif status_code != 200:
+                return f"GET {status_code}"
+
+            df_final, conflitos = aplicar_alteracoes(df_remoto, lote, ids_remapeados)
+
+            csv_buffer = StringIO()
+            df_final.to_csv(csv_buffer, index=False, sep=';')
+            content = base64.b64encode(csv_buffer.getvalue().encode("utf-8")).decode("utf-8")
+
+            data = {
+                "message": f"Atualização via Streamlit {datetime.now().strftime('%d/%m/%Y %H:%M:%S')} ({len(lote)} alterações)",
+                "content": content,
+                "branch": branch
+            }
+            if sha_remoto:
+                data["sha"] = sha_remoto
+
+            r = requisicao_github("PUT", api_url, json=data)
+
+            if r.status_code in [200, 201]:
+                novo_sha = r.json()["content"]["sha"]
+                # Próximo GET deste SHA reaproveita o CSV já conhecido (mesma tipagem do read_csv)
+                _guardar_cache_github(filename, novo_sha, None, _ler_csv_texto(csv_buffer.getvalue()))
+                aviso = f", {conflitos} conflito(s) resolvidos pela alteração mais recente" if conflitos else ""
+                print(f"💾 {filename}: {len(lote)} alterações em um commit{aviso}")
+                return None
+
+            if r.status_code not in [409, 422]:
+                return f"PUT {r.status_code} - {r.text[:200]}"
+
+            # SHA mudou entre o GET e o PUT (commit de fora da fila): refazer o merge
+            print(f"🔄 {filename} mudou no GitHub durante a gravação, refazendo merge")
+
+        return "conflito de SHA persistente"
+
+    except Exception as e:
+        return str(e)
+
+# =====================================
+# ARMAZENAMENTO DAS TABELAS DE CONTROLE
+# =====================================
+
+# "github": CSV inteiro no repositório via API de conteúdo
+# "sqlite": banco local (WAL) com gravação por linha; o GitHub vira cópia exportada.
+# Opcional: o banco fica no disco do servidor (data/), que precisa ser persistente.
+BACKEND_ARMAZENAMENTO = "github"
+SINCRONIZAR_SQLITE_COM_GITHUB = True
+
+ARQUIVO_BANCO_CONTROLE = Path(__file__).parent.parent / "data" / "controle_processos.sqlite3"
+
+# Colunas com índice para as consultas por etapa e por número do processo
+COLUNAS_INDEXADAS = ["Status", "Processo", "Nº DO PROCESSO"]
+
+def carregar_dados_controle(filename):
+    """Carrega a tabela de controle do backend configurado. Retorna (df, versão)"""
+    if BACKEND_ARMAZENAMENTO == "sqlite":
+        return load_data_sqlite(filename)
+    return load_data_from_github(filename)
+
+def salvar_dados_controle(df, filename, session_state_key):
+    """Salva a tabela de controle no backend configurado. Retorna a nova versão ou None"""
+    if BACKEND_ARMAZENAMENTO == "sqlite":
+        return save_data_sqlite(df, filename, session_state_key)
+    return save_data_to_github_seguro(df, filename, session_state_key)
+
+# =====================================
+# BACKEND SQLITE
+# =====================================
+
+def _nome_tabela(filename):
+    return Path(filename).stem
+
+def _q(identificador):
+    """Identificador SQL entre aspas (as colunas têm espaços e acentos)"""
+    return '"' + str(identificador).replace('"', '""') + '"'
+
+def _valor_sqlite(valor):
+    """Texto gravado na coluna (5.0 vira '5', como os IDs vindos do CSV)"""
+    if pd.isna(valor):
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+def _conectar_banco():
+    """Conexão nova por operação (seguro entre threads); transações controladas à mão"""
+    ARQUIVO_BANCO_CONTROLE.parent.mkdir(exist_ok=True)
+    conn = sqlite3.connect(ARQUIVO_BANCO_CONTROLE, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS _tabelas_controle "
+        "(tabela TEXT PRIMARY KEY, versao INTEGER NOT NULL, migrado_em TEXT, exportado_seq INTEGER)"
+    )
+    # Bancos criados antes da exportação com base persistente
+    if "exportado_seq" not in [linha[1] for linha in conn.execute("PRAGMA table_info(_tabelas_controle)")]:
+        conn.execute("ALTER TABLE _tabelas_controle ADD COLUMN exportado_seq INTEGER")
+    _criar_tabelas_eventos(conn)
+    return conn
+
+def _garantir_tabela(conn, tabela, colunas):
+    """Cria a tabela (ID como chave) e acrescenta colunas novas e índices"""
+    conn.execute(f'CREATE TABLE IF NOT EXISTS {_q(tabela)} ("ID" TEXT PRIMARY KEY NOT NULL)')
+    existentes = [linha[1] for linha in conn.execute(f"PRAGMA table_info({_q(tabela)})")]
+
+    for col in colunas:
+        if col not in existentes:
+            conn.execute(f"ALTER TABLE {_q(tabela)} ADD COLUMN {_q(col)} TEXT")
+            existentes.append(col)
+
+    for col in COLUNAS_INDEXADAS:
+        if col in existentes:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {_q(f'idx_{tabela}_{col}')} ON {_q(tabela)} ({_q(col)})")
+
+def _inferir_tipos(df):
+    """Mesma tipagem do read_csv: colunas só com números viram numéricas"""
+    for col in df.columns:
+        preenchidos = df[col].notna()
+        if preenchidos.any():
+            numeros = pd.to_numeric(df[col], errors="coerce")
+            if numeros.notna().sum() == preenchidos.sum():
+                df[col] = numeros
+    return df
+
+def _versao_tabela(conn, tabela):
+    linha = conn.execute("SELECT versao FROM _tabelas_controle WHERE tabela = ?", (tabela,)).fetchone()
+    return linha[0] if linha else None
+
+def _ler_tabela_sqlite(conn, tabela):
+    """(df, nº da versão) da tabela, na ordem de cadastro"""
+    versao = _versao_tabela(conn, tabela)
+    df = pd.read_sql_query(f"SELECT * FROM {_q(tabela)} ORDER BY rowid", conn)
+    return _inferir_tipos(df), versao
+
+def _incrementar_versao(conn, tabela):
+    conn.execute("UPDATE _tabelas_controle SET versao = versao + 1 WHERE tabela = ?", (tabela,))
+    return _versao_tabela(conn, tabela)
+
+def _gravar_mudancas_sqlite(conn, tabela, colunas, mudancas):
+    """Aplica só as células/linhas alteradas (saída de calcular_alteracoes)"""
+    _garantir_tabela(conn, tabela, colunas)
+
+    for id_linha, celulas in mudancas["alteracoes"].items():
+        atribuicoes = ", ".join(f"{_q(col)} = ?" for col in celulas)
+        valores = [_valor_sqlite(valor_novo) for _, valor_novo in celulas.values()]
+        conn.execute(f'UPDATE {_q(tabela)} SET {atribuicoes} WHERE "ID" = ?', valores + [id_linha])
+
+    if mudancas["novas"]:
+        colunas_sql = ", ".join(_q(col) for col in colunas)
+        marcadores = ", ".join("?" for _ in colunas)
+        conn.executemany(
+            f"INSERT INTO {_q(tabela)} ({colunas_sql}) VALUES ({marcadores})",
+            [[_valor_sqlite(linha.get(col)) for col in colunas] for linha in mudancas["novas"]]
+        )
+
+    if mudancas["removidos"]:
+        conn.executemany(f'DELETE FROM {_q(tabela)} WHERE "ID" = ?', [(i,) for i in mudancas["removidos"]])
+
+def migrar_csv_para_sqlite(filename, caminho_csv=None):
+    """
+    Migração única do CSV (do GitHub ou de `caminho_csv`) para o SQLite.
+    Não faz nada se a tabela já foi migrada. Retorna o nº de linhas migradas.
+    """
+    tabela = _nome_tabela(filename)
+
+    if caminho_csv is not None:
+        df = pd.read_csv(caminho_csv, sep=';')
+    else:
+        status_code, df, _ = _baixar_csv_github(filename)
+        if status_code == 404:
+            df = criar_dataframe_vazio_por_tipo(filename)
+        elif status_code != 200:
+            raise RuntimeError(f"GitHub respondeu {status_code} ao baixar {filename}")
+
+    df = garantir_coluna_id(df, "ID")
+
+    # IDs repetidos no CSV não cabem na chave primária: renumerar os repetidos
+    repetidos = df["ID"].astype(str).duplicated()
+    if repetidos.any():
+        proximo = gerar_id_unico(df, "ID")
+        df.loc[repetidos, "ID"] = range(proximo, proximo + repetidos.sum())
+        print(f"⚠️ {repetidos.sum()} IDs repetidos em {filename} renumerados na migração")
+
+    conn = _conectar_banco()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        if _versao_tabela(conn, tabela) is not None:
+            conn.execute("ROLLBACK")
+            return 0
+
+        _gravar_mudancas_sqlite(conn, tabela, list(df.columns), {
+            "alteracoes": {}, "novas": df.to_dict("records"), "removidos": []
+        })
+        # O estado migrado é a base da primeira exportação para o GitHub
+        seq = _ultimo_evento(conn, tabela)
+        conn.execute(
+            "INSERT INTO _tabelas_controle (tabela, versao, migrado_em, exportado_seq) VALUES (?, 1, ?, ?)",
+            (tabela, datetime.now().isoformat(), seq)
+        )
+        # Ponto de partida do log de transições
+        _gravar_snapshot(conn, tabela, seq, df)
+        conn.execute("COMMIT")
+        print(f"📦 {filename} migrado para SQLite: {len(df)} linhas")
+        return len(df)
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def load_data_sqlite(filename):
+    """Carrega a tabela do SQLite (migrando o CSV na primeira vez)"""
+    try:
+        tabela = _nome_tabela(filename)
+        conn = _conectar_banco()
+        try:
+            if _versao_tabela(conn, tabela) is None:
+                migrar_csv_para_sqlite(filename)
+
+            # Leitura num snapshot consistente (WAL permite ler durante gravações)
+            conn.execute("BEGIN")
+            df, numero = _ler_tabela_sqlite(conn, tabela)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        df = garantir_coluna_id(df, "ID")
+        versao = f"sqlite-{numero}"
+        guardar_base_sessao(filename, versao, df)
+        return df, versao
+
+    except Exception as e:
+        st.error(f"Erro ao carregar dados: {e}")
+        df_vazio = criar_dataframe_vazio_por_tipo(filename)
+        return df_vazio, None
+
+def save_data_sqlite(df, filename, session_state_key):
+    """
+    Grava no SQLite só as linhas que a sessão alterou, com o mesmo merge de
+    três vias da fila do GitHub, numa única transação.
+    Retorna a versão a guardar na sessão (base da próxima gravação) ou None.
+    """
+    try:
+        tabela = _nome_tabela(filename)
+        base = obter_base_sessao(filename, resolver_versao_sessao(session_state_key))
+        if base is None:
+            # Comparar com o banco atual desfaria as alterações de outros usuários
+            st.error(MENSAGEM_BASE_DESCONHECIDA)
+            return None
+        df_base, linhagem = base
+        estado = _estado_fila_github()
+
+        conn = _conectar_banco()
+        try:
+            if _versao_tabela(conn, tabela) is None:
+                migrar_csv_para_sqlite(filename)
+
+            conn.execute("BEGIN IMMEDIATE")
+            df_atual, _ = _ler_tabela_sqlite(conn, tabela)
+
+            numero = next(estado["contador"])
+            linhagem = linhagem or f"sessao-{numero}"
+
+            item = calcular_alteracoes(df_base, df)
+            item["linhagem"] = linhagem
+            ids_remapeados = _copiar_ids_remapeados(estado, filename)
+            df_final, conflitos = aplicar_alteracoes(df_atual, [item], ids_remapeados)
+
+            mudancas = calcular_alteracoes(df_atual, df_final)
+            _gravar_mudancas_sqlite(conn, tabela, list(df_final.columns), mudancas)
+            _garantir_snapshot_inicial(conn, tabela, lambda: df_atual)
+            _registrar_eventos(conn, tabela, mudancas, st.session_state.get("usuario"))
+            _talvez_gravar_snapshot(conn, tabela, lambda: df_final)
+            _incrementar_versao(conn, tabela)
+            seq = _ultimo_evento(conn, tabela)
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        with estado["lock"]:
+            _mesclar_ids_remapeados(_estado_arquivo_github(estado, filename), ids_remapeados)
+
+        nova_versao = f"local-{numero}"
+        guardar_base_sessao(filename, nova_versao, df, linhagem)
+
+        if session_state_key:
+            st.session_state[session_state_key] = nova_versao
+
+        if SINCRONIZAR_SQLITE_COM_GITHUB:
+            exportar_sqlite_para_github(filename, df_final, seq)
+
+        if conflitos:
+            st.warning(f"⚠️ {conflitos} campo(s) também foram alterados por outro usuário; valeu a sua alteração.")
+        st.success("✅ Alterações salvas com sucesso!")
+        return nova_versao
+
+    except Exception as e:
+        st.error(f"❌ Erro ao salvar dados: {e}")
+        return None
+
+def atualizar_linha_sqlite(filename, id_linha, valores):
+    """
+    Atualiza colunas de uma linha pelo ID numa transação, sem reler a tabela.
+    Retorna {coluna: texto anterior} ou None se a linha não existe.
+    """
+    tabela = _nome_tabela(filename)
+    conn = _conectar_banco()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        _garantir_tabela(conn, tabela, list(valores))
+        _garantir_snapshot_inicial(conn, tabela, lambda: _ler_tabela_sqlite(conn, tabela)[0])
+        anterior = conn.execute(
+            f"SELECT {', '.join(_q(col) for col in valores)} FROM {_q(tabela)} WHERE \"ID\" = ?", (str(id_linha),)
+        ).fetchone()
+        atribuicoes = ", ".join(f"{_q(col)} = ?" for col in valores)
+        cursor = conn.execute(
+            f'UPDATE {_q(tabela)} SET {atribuicoes} WHERE "ID" = ?',
+            [_valor_sqlite(v) for v in valores.values()] + [str(id_linha)]
+        )
+        if cursor.rowcount:
+            celulas = {
+                col: (texto or "", valor) for (col, valor), texto in zip(valores.items(), anterior)
+                if (texto or "") != (_valor_sqlite(valor) or "")
+            }
+            _registrar_eventos(
+                conn, tabela, {"alteracoes": {str(id_linha): celulas}, "novas": [], "removidos": []},
+                st.session_state.get("usuario")
+            )
+            _talvez_gravar_snapshot(conn, tabela, lambda: _ler_tabela_sqlite(conn, tabela)[0])
+            _incrementar_versao(conn, tabela)
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    if not cursor.rowcount:
+        return None
+    if SINCRONIZAR_SQLITE_COM_GITHUB:
+        _exportar_linha_para_github(filename, id_linha, valores)
+    return {col: texto or "" for col, texto in zip(valores, anterior)}
+
+def salvar_linha_controle(df, nome, id_linha, valores, filename, session_state_key):
+    """
+    Grava `valores` ({coluna: valor}) na linha do ID: no DataFrame da sessão
+    (índice do fluxo `nome`) e no backend. No SQLite é o UPDATE de uma linha,
+    sem reler a tabela nem comparar as demais; no GitHub vai pela fila.
+    Retorna a versão a guardar na sessão ou None.
+    """
+    if BACKEND_ARMAZENAMENTO != "sqlite":
+        if atualizar_linha_fluxo(df, nome, id_linha, valores) is None:
+            st.error(f"❌ Registro {id_linha} não encontrado")
+            return None
+        return save_data_to_github_seguro(df, filename, session_state_key)
+
+    try:
+        versao = resolver_versao_sessao(session_state_key)
+        bases = st.session_state.get("_bases_controle", {}).get(filename, {})
+        if versao not in bases:
+            st.error(MENSAGEM_BASE_DESCONHECIDA)
+            return None
+        if atualizar_linha_fluxo(df, nome, id_linha, valores) is None:
+            st.error(f"❌ Registro {id_linha} não encontrado")
+            return None
+        df_base, linhagem = bases[versao]
+
+        # Linha cadastrada nesta sessão pode ter ganho outro ID ao ser gravada
+        estado = _estado_fila_github()
+        with estado["lock"]:
+            remap = _estado_arquivo_github(estado, filename)["ids_remapeados"].get(linhagem, {})
+        id_banco = remap.get(str(id_linha), str(id_linha))
+
+        anteriores_banco = atualizar_linha_sqlite(filename, id_banco, valores)
+        if anteriores_banco is None:
+            # Linha ainda não gravada (ou removida no banco): gravação completa com merge
+            return save_data_sqlite(df, filename, session_state_key)
+        anteriores_base = _atualizar_celulas(df_base, id_linha, valores) or {}
+
+        conflitos = sum(
+            anteriores_banco[col] not in (anteriores_base.get(col, ""), _valor_sqlite(valor) or "")
+            for col, valor in valores.items()
+        )
+
+        # A base desta sessão já tem a linha gravada: vira a base da nova versão
+        numero = next(estado["contador"])
+        nova_versao = f"local-{numero}"
+        del bases[versao]
+        bases[nova_versao] = (df_base, linhagem or f"sessao-{numero}")
+
+        if session_state_key:
+            st.session_state[session_state_key] = nova_versao
+
+        if conflitos:
+            st.warning(f"⚠️ {conflitos} campo(s) também foram alterados por outro usuário; valeu a sua alteração.")
+        return nova_versao
+
+    except Exception as e:
+        st.error(f"❌ Erro ao salvar dados: {e}")
+        return None
+
+def _atualizar_celulas(df, id_linha, valores, coluna_id="ID"):
+    """Grava `valores` na linha do ID (no próprio DataFrame). Retorna {coluna: texto anterior} ou None"""
+    linhas = df.index[df[coluna_id].astype(str) == str(id_linha)]
+    if len(linhas) == 0:
+        return None
+
+    rotulo = linhas[0]
+    anteriores = {}
+    for col, valor in valores.items():
+        anteriores[col] = (_valor_sqlite(df.at[rotulo, col]) or "") if col in df.columns else ""
+        df.loc[rotulo, col] = valor
+    return anteriores
+
+def buscar_linhas_sqlite(filename, coluna, valor):
+    """Linhas em que `coluna` == `valor` (Status e Processo usam índice)"""
+    tabela = _nome_tabela(filename)
+    conn = _conectar_banco()
+    try:
+        df = pd.read_sql_query(
+            f"SELECT * FROM {_q(tabela)} WHERE {_q(coluna)} = ? ORDER BY rowid", conn, params=(str(valor),)
+        )
+    finally:
+        conn.close()
+    return _inferir_tipos(df)
+
+def buscar_por_processo_sqlite(filename, processo):
+    """Linhas de um número de processo (benefícios usam a coluna 'Nº DO PROCESSO')"""
+    coluna = "Nº DO PROCESSO" if filename == "lista_acompanhamento.csv" else "Processo"
+    return buscar_linhas_sqlite(filename, coluna, processo)
+
+def exportar_sqlite_para_github(filename, df=None, seq=None):
+    """
+    Coloca o estado da tabela SQLite (`df`, após o evento `seq`) na fila de
+    gravação do GitHub (cópia/backup). Só as diferenças desde a última
+    exportação são enviadas, com merge de três vias sobre o GitHub atual.
+    """
+    try:
+        tabela = _nome_tabela(filename)
+        if df is None:
+            conn = _conectar_banco()
+            try:
+                conn.execute("BEGIN")
+                df, _ = _ler_tabela_sqlite(conn, tabela)
+                seq = _ultimo_evento(conn, tabela)
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+
+        estado = _estado_fila_github()
+        with estado["lock"]:
+            base = _estado_arquivo_github(estado, filename)["base_exportada"]
+
+        # Primeira exportação do processo: base gravada no banco (última exportação
+        # ou o estado migrado), não o GitHub atual, que desfaria alterações de fora
+        if base is None:
+            df_base = _base_exportacao_persistida(filename)
+            if df_base is not None:
+                base = (df_base, None)
+
+        nova_versao, linhagem = enfileirar_alteracoes_github(df, filename, base)
+
+        with estado["lock"]:
+            _estado_arquivo_github(estado, filename)["base_exportada"] = (df.copy(), linhagem)
+
+        if seq is not None:
+            conn = _conectar_banco()
+            try:
+                conn.execute(
+                    "UPDATE _tabelas_controle SET exportado_seq = MAX(COALESCE(exportado_seq, 0), ?) WHERE tabela = ?",
+                    (seq, tabela)
+                )
+            finally:
+                conn.close()
+        return nova_versao
+
+    except Exception as e:
+        print(f"⚠️ Exportação de {filename} para o GitHub falhou: {e}")
+        return None
+
+def _base_exportacao_persistida(filename):
+    """
+    Estado da tabela na última exportação registrada no banco; em tabelas
+    migradas antes do registro, o estado migrado (primeiro snapshot).
+    None sem snapshot: aí a exportação compara com o GitHub atual.
+    """
+    tabela = _nome_tabela(filename)
+    conn = _conectar_banco()
+    try:
+        linha = conn.execute("SELECT exportado_seq FROM _tabelas_controle WHERE tabela = ?", (tabela,)).fetchone()
+        seq = linha[0] if linha else None
+        if seq is None:
+            seq = conn.execute("SELECT MIN(seq) FROM _snapshots_controle WHERE tabela = ?", (tabela,)).fetchone()[0]
+    finally:
+        conn.close()
+
+    if seq is None:
+        return None
+    df = reconstruir_tabela(filename, ate_seq=seq)
+    return garantir_coluna_id(df, "ID") if df is not None else None
+
+def _exportar_linha_para_github(filename, id_linha, valores):
+    """Exporta só as células de uma linha (sem reler a tabela) quando a exportação já tem base"""
+    try:
+        estado = _estado_fila_github()
+        with estado["lock"]:
+            arquivo = _estado_arquivo_github(estado, filename)
+            if arquivo["base_exportada"] is not None:
+                df_base, linhagem = arquivo["base_exportada"]
+                anteriores = _atualizar_celulas(df_base, id_linha, valores)
+                if anteriores is not None:
+                    celulas = {col: (anteriores[col], valor) for col, valor in valores.items()}
+                    _enfileirar_item_github(filename, estado, arquivo, {
+                        "alteracoes": {str(id_linha): celulas}, "novas": [], "removidos": [],
+                        "linhagem": linhagem,
+                    })
+                    return
+    except Exception as e:
+        print(f"⚠️ Exportação de {filename} para o GitHub falhou: {e}")
+        return
+
+    # Primeira exportação do processo (ou linha fora da base): diff completo
+    exportar_sqlite_para_github(filename)
+
+# =====================================
+# LOG DE TRANSIÇÕES (EVENTOS + SNAPSHOTS)
+# =====================================
+
+# Um snapshot da tabela a cada N eventos: reconstruir um momento só relê os eventos desde o último
+INTERVALO_SNAPSHOT_EVENTOS = 500
+
+def _criar_tabelas_eventos(conn):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS _eventos_controle ("
+        "seq INTEGER PRIMARY KEY AUTOINCREMENT, tabela TEXT NOT NULL, id_linha TEXT NOT NULL, "
+        "tipo TEXT NOT NULL, status_anterior TEXT, status_novo TEXT, valores TEXT, "
+        "usuario TEXT, momento TEXT NOT NULL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_eventos_tabela_seq ON _eventos_controle (tabela, seq)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_eventos_tabela_id ON _eventos_controle (tabela, id_linha, seq)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS _snapshots_controle ("
+        "tabela TEXT NOT NULL, seq INTEGER NOT NULL, momento TEXT NOT NULL, dados TEXT NOT NULL, "
+        "PRIMARY KEY (tabela, seq))"
+    )
+
+def _ultimo_evento(conn, tabela):
+    linha = conn.execute("SELECT MAX(seq) FROM _eventos_controle WHERE tabela = ?", (tabela,)).fetchone()
+    return linha[0] or 0
+
+def _gravar_snapshot(conn, tabela, seq, df):
+    """Estado completo da tabela após o evento `seq` (valores como texto, como nas colunas)"""
+    dados = {
+        "colunas": list(df.columns),
+        "linhas": [[_valor_sqlite(v) for v in linha] for linha in df.itertuples(index=False, name=None)],
+    }
+    conn.execute(
+        "INSERT OR REPLACE INTO _snapshots_controle (tabela, seq, momento, dados) VALUES (?, ?, ?, ?)",
+        (tabela, seq, datetime.now().isoformat(timespec="seconds"), json.dumps(dados, ensure_ascii=False))
+    )
+
+def _garantir_snapshot_inicial(conn, tabela, ler_estado_atual):
+    """Tabela sem snapshot (migrada antes do log): o estado atual vira o ponto de partida"""
+    if conn.execute("SELECT 1 FROM _snapshots_controle WHERE tabela = ? LIMIT 1", (tabela,)).fetchone() is None:
+        _gravar_snapshot(conn, tabela, _ultimo_evento(conn, tabela), ler_estado_atual())
+
+def _registrar_eventos(conn, tabela, mudancas, usuario):
+    """
+    Acrescenta um evento por linha cadastrada, alterada ou removida (na mesma
+    transação da gravação). Mudança de Status vira evento do tipo 'transicao'.
+    Retorna o nº de eventos gravados.
+    """
+    momento = datetime.now().isoformat(timespec="seconds")
+    eventos = []
+
+    for id_linha, celulas in mudancas["alteracoes"].items():
+        valores = {col: _valor_sqlite(valor_novo) for col, (_, valor_novo) in celulas.items()}
+        if "Status" in celulas:
+            tipo, anterior, novo = "transicao", celulas["Status"][0] or None, valores["Status"]
+        else:
+            tipo, anterior, novo = "alteracao", None, None
+        eventos.append((tabela, str(id_linha), tipo, anterior, novo, json.dumps(valores, ensure_ascii=False), usuario, momento))
+
+    for linha in mudancas["novas"]:
+        valores = {col: _valor_sqlite(v) for col, v in linha.items() if _valor_sqlite(v) is not None}
+        eventos.append((
+            tabela, _valor_sqlite(linha.get("ID")), "cadastro", None, valores.get("Status"),
+            json.dumps(valores, ensure_ascii=False), usuario, momento
+        ))
+
+    for id_linha in mudancas["removidos"]:
+        eventos.append((tabela, str(id_linha), "remocao", None, None, None, usuario, momento))
+
+    conn.executemany(
+        "INSERT INTO _eventos_controle "
+        "(tabela, id_linha, tipo, status_anterior, status_novo, valores, usuario, momento) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        eventos
+    )
+    return len(eventos)
+
+def _talvez_gravar_snapshot(conn, tabela, ler_estado_atual):
+    """Snapshot novo quando já há INTERVALO_SNAPSHOT_EVENTOS eventos desde o último"""
+    ultimo_snapshot = conn.execute(
+        "SELECT MAX(seq) FROM _snapshots_controle WHERE tabela = ?", (tabela,)
+    ).fetchone()[0] or 0
+    seq = _ultimo_evento(conn, tabela)
+    if seq - ultimo_snapshot >= INTERVALO_SNAPSHOT_EVENTOS:
+        _gravar_snapshot(conn, tabela, seq, ler_estado_atual())
+
+def historico_transicoes(filename, id_linha=None, tipos=None):
+    """Eventos da tabela (ou de uma linha) em ordem, com o momento já convertido em datetime"""
+    consulta = "SELECT * FROM _eventos_controle WHERE tabela = ?"
+    parametros = [_nome_tabela(filename)]
+    if id_linha is not None:
+        consulta += " AND id_linha = ?"
+        parametros.append(str(id_linha))
+    if tipos:
+        consulta += f" AND tipo IN ({', '.join('?' for _ in tipos)})"
+        parametros.extend(tipos)
+
+    conn = _conectar_banco()
+    try:
+        eventos = pd.read_sql_query(consulta + " ORDER BY seq", conn, params=parametros)
+    finally:
+        conn.close()
+
+    eventos["momento"] = pd.to_datetime(eventos["momento"])
+    return eventos
+
+def reconstruir_tabela(filename, ate_momento=None, ate_seq=None):
+    """
+    Estado da tabela no momento (datetime) ou no evento informado, a partir do
+    último snapshot anterior mais a repetição dos eventos seguintes.
+    Sem limites, devolve o estado após o último evento.
+    """
+    tabela = _nome_tabela(filename)
+    limite_momento = ate_momento.isoformat(timespec="seconds") if ate_momento is not None else None
+
+    conn = _conectar_banco()
+    try:
+        conn.execute("BEGIN")
+        consulta = "SELECT seq, dados FROM _snapshots_controle WHERE tabela = ?"
+        parametros = [tabela]
+        if ate_seq is not None:
+            consulta += " AND seq <= ?"
+            parametros.append(ate_seq)
+        if limite_momento is not None:
+            consulta += " AND momento <= ?"
+            parametros.append(limite_momento)
+        snapshot = conn.execute(consulta + " ORDER BY seq DESC LIMIT 1", parametros).fetchone()
+        if snapshot is None:
+            conn.execute("COMMIT")
+            return None
+
+        consulta = "SELECT id_linha, tipo, valores FROM _eventos_controle WHERE tabela = ? AND seq > ?"
+        parametros = [tabela, snapshot[0]]
+        if ate_seq is not None:
+            consulta += " AND seq <= ?"
+            parametros.append(ate_seq)
+        if limite_momento is not None:
+            consulta += " AND momento <= ?"
+            parametros.append(limite_momento)
+        eventos = conn.execute(consulta + " ORDER BY seq", parametros).fetchall()
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    dados = json.loads(snapshot[1])
+    colunas = list(dados["colunas"])
+    linhas = {str(linha[colunas.index("ID")]): dict(zip(colunas, linha)) for linha in dados["linhas"]}
+
+    for id_linha, tipo, valores in eventos:
+        if tipo == "remocao":
+            linhas.pop(id_linha, None)
+            continue
+        valores = json.loads(valores)
+        colunas += [col for col in valores if col not in colunas]
+        if tipo == "cadastro":
+            linhas[id_linha] = valores
+        elif id_linha in linhas:
+            linhas[id_linha].update(valores)
+
+    df = pd.DataFrame.from_records(list(linhas.values()), columns=colunas)
+    return _inferir_tipos(df)
+
 # =====================================
 # FUNÇÕES DE ARQUIVO E UPLOAD
 # =====================================
 
+# "github": um arquivo por upload no repositório (URL de download na planilha)
+# "local": conteúdo no disco do servidor por hash (data/anexos_store.py), sem
+# duplicatas. Só usar com data/anexos em volume persistente e compartilhado:
+# é a única cópia, e some num novo deploy ou em outra instância.
+BACKEND_ANEXOS = "github"
+
+# A partir do Streamlit 1.52 download_button aceita uma função: o arquivo só é
+# lido no clique. O servidor de mídia já atende pedidos com Range para esses downloads.
+DOWNLOAD_SOB_DEMANDA = Version(st.__version__) >= Version("1.52")
+
 def salvar_arquivo(arquivo, processo, tipo):
+    """Salva arquivo binário (PDF, imagem) no backend de anexos. Retorna a referência/URL ou None"""
+    if BACKEND_ANEXOS == "github":
+        return _salvar_arquivo_github(arquivo, processo, tipo)
+
+    try:
+        referencia, novo = guardar_anexo(arquivo, f"{processo}_{tipo}_{arquivo.name}")
+        if novo:
+            st.success(f"✅ Arquivo {arquivo.name} salvo com sucesso!")
+        else:
+            st.success(f"✅ Arquivo {arquivo.name} já estava salvo, reaproveitado!")
+        return referencia
+
+    except Exception as e:
+        st.error(f"❌ Erro ao processar arquivo: {e}")
+        return None
+
+def _salvar_arquivo_github(arquivo, processo, tipo):
     """Salva arquivo binário (PDF, imagem) no GitHub"""
     try:
         # Gerar nome único para o arquivo
@@ -342,16 +1604,8 @@ def salvar_arquivo(arquivo, processo, tipo):
         nome_arquivo = f"anexos/{processo}_{tipo}_{timestamp}_{arquivo.name}"
         
         # Preparar dados para GitHub API
-        repo_owner = st.secrets["github"]["repo_owner"]
-        repo_name = st.secrets["github"]["repo_name"]
         branch = "main"
-        
-        api_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/contents/{nome_arquivo}"
-        
-        headers = {
-            "Authorization": f'token {st.secrets["github"]["token"]}',
-            "Accept": "application/vnd.github+json"
-        }
+        api_url = url_conteudo_github(nome_arquivo)
         
         # Converter arquivo para base64
         arquivo_bytes = arquivo.read()
@@ -364,7 +1618,7 @@ def salvar_arquivo(arquivo, processo, tipo):
         }
         
         # Enviar para GitHub
-        response = requests.put(api_url, headers=headers, json=data)
+        response = requisicao_github("PUT", api_url, json=data)
         
         if response.status_code in [200, 201]:
             # Retornar URL de download do arquivo
@@ -380,55 +1634,101 @@ def salvar_arquivo(arquivo, processo, tipo):
         return None
 
 def baixar_arquivo_github(url_arquivo, nome_display):
-    """Cria link para download de arquivo do GitHub"""
-    if url_arquivo and str(url_arquivo).strip():
+    """Botão de download para anexo local ou link para arquivo antigo do GitHub"""
+    if pd.isna(url_arquivo) or not str(url_arquivo).strip():
+        return False
+
+    partes = interpretar_referencia(url_arquivo)
+    if partes is None:
         st.markdown(f"📎 **[{nome_display}]({url_arquivo})**")
         return True
-    return False
+
+    caminho = caminho_anexo(url_arquivo)
+    if caminho is None:
+        st.warning(f"⚠️ {nome_display}: arquivo não encontrado no servidor")
+        return False
+
+    _, nome_arquivo = partes
+    botao = partial(
+        st.download_button, f"📎 {nome_display}", file_name=nome_arquivo, mime=tipo_mime(nome_arquivo)
+    )
+    if DOWNLOAD_SOB_DEMANDA:
+        # O Streamlit lê o arquivo aberto só quando o botão é clicado
+        botao(data=partial(open, caminho, "rb"))
+    else:
+        with open(caminho, "rb") as arquivo:
+            botao(data=arquivo)
+    return True
 
 # =====================================
 # FUNÇÕES DE ANÁLISE E COMPARAÇÃO
 # =====================================
 
+def comparar_dataframes(df_original, df_editado, coluna_id="ID"):
+    """
+    Diferenças entre duas versões de uma tabela, alinhadas por `coluna_id`
+    (ou pela posição, se não houver a coluna). Retorna dict com 'alteradas'
+    (uma linha por célula: chave, coluna, antes, depois), 'novas' e
+    'removidas' (as linhas) e 'colunas_novas'/'colunas_removidas'.
+    """
+    if coluna_id in df_original.columns and coluna_id in df_editado.columns:
+        original = _indexar_por_id(df_original, coluna_id)
+        editado = _indexar_por_id(df_editado, coluna_id)
+        chave = coluna_id
+    else:
+        original = df_original.set_axis(pd.RangeIndex(1, len(df_original) + 1))
+        editado = df_editado.set_axis(pd.RangeIndex(1, len(df_editado) + 1))
+        chave = "Linha"
+
+    chaves_comuns = original.index.intersection(editado.index, sort=False)
+    colunas = [c for c in original.columns if c in editado.columns and c != coluna_id]
+
+    valores_antes = original.loc[chaves_comuns, colunas]
+    valores_depois = editado.loc[chaves_comuns, colunas]
+    linhas, cols = np.nonzero(_celulas_diferentes(valores_antes, valores_depois))
+
+    alteradas = pd.DataFrame({
+        chave: chaves_comuns[linhas],
+        "Coluna": np.asarray(colunas, dtype=object)[cols],
+        "Antes": valores_antes.to_numpy(dtype=object)[linhas, cols],
+        "Depois": valores_depois.to_numpy(dtype=object)[linhas, cols],
+    })
+
+    return {
+        "alteradas": alteradas,
+        "novas": editado[~editado.index.isin(original.index)].reset_index(drop=True),
+        "removidas": original[~original.index.isin(editado.index)].reset_index(drop=True),
+        "colunas_novas": [c for c in editado.columns if c not in original.columns],
+        "colunas_removidas": [c for c in original.columns if c not in editado.columns],
+    }
+
 def mostrar_diferencas(df_original, df_editado):
-    """Mostra diferenças entre DataFrames"""
+    """Mostra diferenças entre DataFrames (linhas alinhadas pelo ID)"""
+    resultado = comparar_dataframes(df_original, df_editado)
     diff = []
-    
-    # Verificar novas linhas
-    if len(df_editado) > len(df_original):
-        novas_linhas = df_editado.iloc[len(df_original):]
+
+    if len(resultado["novas"]):
         diff.append("Novas linhas adicionadas:")
-        diff.append(novas_linhas)
-    
-    # Verificar alterações
-    alteracoes = []
-    linhas_comuns = min(len(df_original), len(df_editado))
-    
-    for i in range(linhas_comuns):
-        for col in df_original.columns:
-            if col in df_editado.columns:
-                val_orig = df_original.iloc[i][col]
-                val_edit = df_editado.iloc[i][col]
-                
-                # Pular se ambos são NaN
-                if (pd.isna(val_orig) and pd.isna(val_edit)):
-                    continue
-                
-                # Comparar valores
-                if str(val_orig) != str(val_edit):
-                    alteracoes.append(
-                        f"Linha {i+1}, Coluna '{col}': "
-                        f"'{val_orig if not pd.isna(val_orig) else ''}' → "
-                        f"'{val_edit if not pd.isna(val_edit) else ''}'"
-                    )
-    
-    if alteracoes:
+        diff.append(resultado["novas"])
+
+    if len(resultado["removidas"]):
+        diff.append("Linhas removidas:")
+        diff.append(resultado["removidas"])
+
+    alteradas = resultado["alteradas"]
+    if len(alteradas):
+        chave = alteradas.columns[0]
+        antes = alteradas["Antes"].where(alteradas["Antes"].notna(), "")
+        depois = alteradas["Depois"].where(alteradas["Depois"].notna(), "")
         diff.append("Células alteradas:")
-        diff.extend(alteracoes)
-    
+        diff.extend(
+            f"{chave} {k}, Coluna '{col}': '{a}' → '{d}'"
+            for k, col, a, d in zip(alteradas[chave], alteradas["Coluna"], antes, depois)
+        )
+
     if not diff:
         diff.append("Nenhuma diferença encontrada.")
-    
+
     return diff
 
 def validar_cpf(cpf):
@@ -452,6 +1752,355 @@ def formatar_processo(processo):
     
     return numeros
 
+# =====================================
+# FUNÇÕES DE BUSCA (ÍNDICE INVERTIDO)
+# =====================================
+
+# Colunas de identificação (só são preenchidas no cadastro da linha)
+COLUNAS_BUSCA_ALVARAS = ["Processo", "Parte", "CPF"]
+COLUNAS_BUSCA_RPV = ["Processo", "Beneficiário", "CPF"]
+COLUNAS_BUSCA_BENEFICIOS = ["Nº DO PROCESSO", "PARTE", "CPF", "Processo", "Beneficiário"]
+
+_REGEX_TERMO = re.compile(r"[a-z0-9]+")
+_REGEX_NAO_DIGITO = re.compile(r"\D")
+_REGEX_CONSULTA_NUMERICA = re.compile(r"[\d.\-/ ]*\d[\d.\-/ ]*")
+
+def tokenizar_busca(valor):
+    """Termos de um valor: minúsculas, sem acentos; números formatados entram também só com os dígitos"""
+    texto = str(valor)
+    texto = (texto if texto.isascii() else unidecode(texto)).lower()
+    termos = _REGEX_TERMO.findall(texto)
+    digitos = _REGEX_NAO_DIGITO.sub("", texto)
+    if digitos and digitos not in termos:
+        termos.append(digitos)
+    return termos
+
+def termos_consulta(texto):
+    """Termos digitados na busca (processo/CPF formatado vira só os dígitos)"""
+    texto = str(texto).strip()
+    if _REGEX_CONSULTA_NUMERICA.fullmatch(texto):
+        return [_REGEX_NAO_DIGITO.sub("", texto)]
+    return _REGEX_TERMO.findall(unidecode(texto).lower())
+
+def construir_indice_busca(df, colunas):
+    """Índice invertido termo -> posições das linhas, com termos ordenados para busca por prefixo"""
+    tabelas = []
+
+    for col in colunas:
+        if col not in df.columns:
+            continue
+        # Tokeniza cada valor distinto uma vez só (NaN fica com código -1 e sai no merge)
+        codigos, valores = pd.factorize(df[col])
+        termos_valores = [tokenizar_busca(v) for v in valores.tolist()]
+        pares = pd.DataFrame({
+            "codigo": np.repeat(np.arange(len(valores)), [len(t) for t in termos_valores]),
+            "termo": [termo for termos in termos_valores for termo in termos],
+        })
+        linhas = pd.DataFrame({"codigo": codigos, "posicao": np.arange(len(df))})
+        tabelas.append(linhas.merge(pares, on="codigo")[["termo", "posicao"]])
+
+    if not tabelas:
+        return {
+            "termos": [],
+            "posicoes": np.array([], dtype=np.intp),
+            "inicios": np.zeros(1, dtype=np.intp),
+            "total_linhas": len(df),
+        }
+
+    ocorrencias = pd.concat(tabelas, ignore_index=True).drop_duplicates()
+    ids_termos, termos = pd.factorize(ocorrencias["termo"], sort=True)
+
+    # Posições de todos os termos num único array, na ordem dos termos:
+    # termos com o mesmo prefixo são vizinhos, então a busca vira uma fatia
+    ordem = np.lexsort((ocorrencias["posicao"].to_numpy(), ids_termos))
+    inicios = np.concatenate([[0], np.cumsum(np.bincount(ids_termos, minlength=len(termos)))])
+
+    return {
+        "termos": termos.tolist(),
+        "posicoes": ocorrencias["posicao"].to_numpy()[ordem],
+        "inicios": inicios,
+        "total_linhas": len(df),
+    }
+
+def buscar_no_indice(indice, texto):
+    """Posições das linhas em que todos os termos da busca aparecem (como prefixo de algum termo)"""
+    resultado = None
+
+    for termo in termos_consulta(texto):
+        inicio = bisect_left(indice["termos"], termo)
+        fim = bisect_left(indice["termos"], termo + "\x7f", lo=inicio)
+        if inicio == fim:
+            return np.array([], dtype=np.intp)
+
+        posicoes = np.unique(indice["posicoes"][indice["inicios"][inicio]:indice["inicios"][fim]])
+        resultado = posicoes if resultado is None else np.intersect1d(resultado, posicoes, assume_unique=True)
+
+    return np.arange(indice["total_linhas"]) if resultado is None else resultado
+
+def obter_indice_busca(df, colunas):
+    """
+    Índice guardado na sessão para o DataFrame carregado. É refeito quando o
+    DataFrame é substituído (recarga, cadastro, concat/copy) ou muda de forma.
+    """
+    chave = f"_indice_busca_{'|'.join(colunas)}"
+    entrada = st.session_state.get(chave)
+
+    if (entrada is None or entrada["df"]() is not df
+            or entrada["forma"] != (len(df), tuple(df.columns))):
+        entrada = {
+            "df": weakref.ref(df),
+            "forma": (len(df), tuple(df.columns)),
+            "indice": construir_indice_busca(df, colunas),
+        }
+        st.session_state[chave] = entrada
+
+    return entrada["indice"]
+
+def filtrar_por_busca(df_filtrado, df, texto, colunas):
+    """Aplica a busca (índice de `df`) sobre `df_filtrado`, que é um recorte de `df`"""
+    if not texto or not str(texto).strip():
+        return df_filtrado
+
+    posicoes = buscar_no_indice(obter_indice_busca(df, colunas), texto)
+    return df_filtrado[df_filtrado.index.isin(df.index[posicoes])]
+
+# =====================================
+# ÍNDICE DO FLUXO DE TRABALHO (STATUS E ID)
+# =====================================
+
+# Processos por página nas filas do fluxo (cada um vira um expander com widgets)
+ITENS_POR_PAGINA_FLUXO = 20
+
+def construir_indice_fluxo(df, coluna_status="Status", coluna_id="ID"):
+    """Posições das linhas por status (em ordem crescente) e ID -> posição"""
+    por_status = {}
+    if coluna_status in df.columns:
+        status = pd.Series(df[coluna_status].to_numpy())
+        por_status = {s: posicoes.tolist() for s, posicoes in status.groupby(status, sort=False).indices.items()}
+
+    por_id = {}
+    if coluna_id in df.columns:
+        # Percorrido de trás para frente: com ID repetido vale a primeira linha (como .index[0])
+        ids = df[coluna_id].astype(str).tolist()
+        por_id = dict(zip(reversed(ids), range(len(ids) - 1, -1, -1)))
+
+    return {"por_status": por_status, "por_id": por_id}
+
+def _entrada_indice_fluxo(df, nome):
+    chave = f"_indice_fluxo_{nome}"
+    entrada = st.session_state.get(chave)
+
+    if (entrada is None or entrada["df"]() is not df
+            or entrada["forma"] != (len(df), tuple(df.columns))):
+        entrada = {
+            "df": weakref.ref(df),
+            "forma": (len(df), tuple(df.columns)),
+            "indice": construir_indice_fluxo(df),
+        }
+        st.session_state[chave] = entrada
+
+    return entrada
+
+def obter_indice_fluxo(df, nome):
+    """
+    Índice do fluxo guardado na sessão para o DataFrame editado (`nome`:
+    alvaras, rpv, beneficios). É refeito quando o DataFrame é substituído
+    ou muda de forma; mudanças de status feitas por atualizar_linha_fluxo
+    só movem a linha de balde.
+    """
+    return _entrada_indice_fluxo(df, nome)["indice"]
+
+def localizar_linha(df, nome, id_linha):
+    """Rótulo da linha com o ID (None se não existir), sem varrer o DataFrame"""
+    posicao = obter_indice_fluxo(df, nome)["por_id"].get(str(id_linha))
+    return None if posicao is None else df.index[posicao]
+
+def contar_por_status(df, nome, status):
+    return len(obter_indice_fluxo(df, nome)["por_status"].get(status, []))
+
+def linhas_por_status(df, nome, status):
+    """Linhas de uma etapa do fluxo, na ordem do DataFrame, lidas pelo balde do índice"""
+    if "Status" not in df.columns:
+        return df.iloc[0:0]
+
+    fila = df.iloc[obter_indice_fluxo(df, nome)["por_status"].get(status, [])]
+
+    if (fila["Status"] != status).any():
+        # Status alterado fora de atualizar_linha_fluxo: refazer o índice
+        print(f"⚠️ Índice do fluxo de {nome} desatualizado, reconstruindo")
+        st.session_state.pop(f"_indice_fluxo_{nome}", None)
+        fila = df.iloc[obter_indice_fluxo(df, nome)["por_status"].get(status, [])]
+
+    return fila
+
+def atualizar_linha_fluxo(df, nome, id_linha, valores):
+    """
+    Grava `valores` ({coluna: valor}) na linha do ID, no próprio DataFrame, e
+    move a linha de balde se o Status mudou. Retorna o rótulo ou None se o ID não existe.
+    """
+    entrada = _entrada_indice_fluxo(df, nome)
+    indice = entrada["indice"]
+    posicao = indice["por_id"].get(str(id_linha))
+    if posicao is None:
+        return None
+
+    rotulo = df.index[posicao]
+    status_anterior = df.at[rotulo, "Status"] if "Status" in df.columns else None
+
+    for col, valor in valores.items():
+        df.loc[rotulo, col] = valor
+
+    novo_status = valores.get("Status", status_anterior)
+    if novo_status != status_anterior:
+        balde = indice["por_status"].get(status_anterior, [])
+        i = bisect_left(balde, posicao)
+        if i < len(balde) and balde[i] == posicao:
+            del balde[i]
+        insort(indice["por_status"].setdefault(novo_status, []), posicao)
+
+    # Colunas novas criadas pelo .loc não invalidam o índice
+    entrada["forma"] = (len(df), tuple(df.columns))
+    return rotulo
+
+def paginar_fila(fila, chave):
+    """Página atual da fila (o seletor só aparece quando há mais de uma página)"""
+    total_paginas = -(-len(fila) // ITENS_POR_PAGINA_FLUXO)
+    if total_paginas <= 1:
+        return fila
+
+    chave_pagina = f"pagina_fluxo_{chave}"
+    # A fila pode ter encolhido desde a última escolha
+    if st.session_state.get(chave_pagina, 1) > total_paginas:
+        st.session_state[chave_pagina] = total_paginas
+
+    pagina = st.number_input(
+        f"Página (de {total_paginas}, {len(fila)} processos)",
+        min_value=1, max_value=total_paginas, step=1, key=chave_pagina
+    )
+    inicio = (int(pagina) - 1) * ITENS_POR_PAGINA_FLUXO
+    return fila.iloc[inicio:inicio + ITENS_POR_PAGINA_FLUXO]
+
+# =====================================
+# PAINEL DE GARGALOS (TEMPO POR ETAPA)
+# =====================================
+
+def interface_gargalos_fluxo(df, fluxo):
+    """Lead time por etapa, itens parados e vazão semanal por usuário (`fluxo`: alvaras, rpv, beneficios)"""
+    st.markdown("### ⏱️ Tempo por Etapa e Gargalos")
+
+    if df is None or len(df) == 0:
+        st.info("Nenhum processo para analisar")
+        return
+
+    indicadores = indicadores_fluxo(df, fluxo)
+    lead_time = indicadores["lead_time"]
+    resumo_backlog = indicadores["resumo_backlog"]
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Em andamento", int(resumo_backlog["quantidade"].sum()) if len(resumo_backlog) else 0)
+    with col2:
+        fora_sla = int(resumo_backlog["fora_sla"].sum()) if "fora_sla" in resumo_backlog else 0
+        st.metric("Fora do prazo", fora_sla)
+    with col3:
+        if len(lead_time):
+            gargalo = lead_time["p50_dias"].idxmax()
+            st.metric("Etapa mais lenta (mediana)", str(gargalo), f"{lead_time.loc[gargalo, 'p50_dias']:.1f} dias", delta_color="off")
+        else:
+            st.metric("Etapa mais lenta (mediana)", "N/A")
+
+    st.markdown("**Tempo em cada etapa (dias, etapas concluídas)**")
+    if len(lead_time):
+        st.bar_chart(lead_time[["p50_dias", "p90_dias"]].rename(index=str))
+        st.dataframe(lead_time.round(1).rename(index=str), use_container_width=True)
+    else:
+        st.info("Ainda não há etapas concluídas com datas registradas")
+
+    st.markdown("**Itens parados por etapa**")
+    if len(resumo_backlog):
+        st.dataframe(resumo_backlog.round(1).rename(index=str), use_container_width=True)
+        with st.expander("Mais antigos"):
+            st.dataframe(indicadores["backlog"].head(ITENS_POR_PAGINA_FLUXO), use_container_width=True, hide_index=True)
+    else:
+        st.success("Nenhum item parado")
+
+    st.markdown("**Movimentações por semana e usuário**")
+    vazao = indicadores["vazao"]
+    if len(vazao):
+        por_usuario = vazao.pivot_table(
+            index="semana", columns="usuario", values="movimentacoes", aggfunc="sum", fill_value=0
+        )
+        st.bar_chart(por_usuario)
+    else:
+        st.info("Nenhuma movimentação registrada")
+
+def interface_historico_linha(filename, id_linha):
+    """Cadastro, transições e alterações de uma linha, do log de eventos (backend SQLite)"""
+    if BACKEND_ARMAZENAMENTO != "sqlite":
+        return
+
+    with st.expander("📜 Histórico"):
+        eventos = historico_transicoes(filename, id_linha)
+        if len(eventos) == 0:
+            st.info("Nenhuma movimentação registrada")
+            return
+        st.dataframe(
+            eventos[["momento", "tipo", "status_anterior", "status_novo", "usuario"]].rename(columns={
+                "momento": "Momento", "tipo": "Tipo", "status_anterior": "De",
+                "status_novo": "Para", "usuario": "Usuário",
+            }),
+            use_container_width=True, hide_index=True
+        )
+
+def interface_metricas_github(filename):
+    """Fila de envio do arquivo e chamadas à API do GitHub neste processo (latência e limite)"""
+    with st.expander("🔌 Sincronização com o GitHub"):
+        pendencias = contar_pendencias_github(filename)
+        erro = obter_erro_fila_github(filename)
+        if erro:
+            st.warning(f"⚠️ {pendencias} alteração(ões) aguardando envio. Última falha: {erro}")
+        elif pendencias:
+            st.info(f"🕓 {pendencias} alteração(ões) aguardando envio")
+        else:
+            st.success("✅ Nenhuma alteração pendente de envio")
+
+        try:
+            metricas = metricas_github()
+        except Exception as e:
+            st.info(f"Cliente do GitHub indisponível: {e}")
+            return
+
+        limite = metricas["limite"]
+        if limite["restantes"] is not None:
+            reinicio = datetime.fromtimestamp(limite["reinicio"]).strftime("%H:%M") if limite["reinicio"] else "N/A"
+            st.write(f"**Requisições restantes:** {limite['restantes']} (renova às {reinicio})")
+        if len(metricas["resumo"]):
+            st.dataframe(metricas["resumo"].round(3), use_container_width=True)
+        else:
+            st.write("Nenhuma chamada à API neste processo")
+
+def interface_tabela_em_data(filename):
+    """Estado da tabela num momento passado, reconstruído do log de eventos (backend SQLite)"""
+    if BACKEND_ARMAZENAMENTO != "sqlite":
+        return
+
+    with st.expander("🕰️ Tabela em uma data anterior"):
+        col_data, col_hora = st.columns(2)
+        with col_data:
+            data = st.date_input("Data:", key=f"data_reconstrucao_{filename}")
+        with col_hora:
+            hora = st.time_input(
+                "Hora:", value=datetime.strptime("23:59", "%H:%M").time(), key=f"hora_reconstrucao_{filename}"
+            )
+
+        if st.button("🔎 Reconstruir", key=f"reconstruir_{filename}"):
+            df = reconstruir_tabela(filename, ate_momento=datetime.combine(data, hora))
+            if df is None:
+                st.info("Nenhum registro até esse momento")
+            else:
+                st.markdown(f"**{len(df)} registros em {data.strftime('%d/%m/%Y')} {hora.strftime('%H:%M')}**")
+                st.dataframe(df, use_container_width=True, hide_index=True)
+
 # =====================================
 # FUNÇÕES DE LIMPEZA E MANUTENÇÃO
 # =====================================
@@ -551,7 +2200,7 @@ def interface_lista_alvaras(df, perfil_usuario):
     if "preview_novas_linhas" in st.session_state and len(st.session_state["preview_novas_linhas"]) > 0:
         st.warning(f"⚠️ Você tem {len(st.session_state['preview_novas_linhas'])} linha(s) não salva(s)")
         if st.button("💾 Salvar Alterações", type="primary"):
-            novo_sha = save_data_to_github_seguro(
+            novo_sha = salvar_dados_controle(
                 st.session_state.df_editado_alvaras,
                 "lista_alvaras.csv",
                 "file_sha_alvaras"
@@ -740,58 +2389,6 @@ def interface_acoes_financeiro(df_filtrado):
                         st.success("✅ Processo finalizado!")
                         st.rerun()
 
-def salvar_arquivo(arquivo, processo, tipo):
-    """Salva arquivo binário (PDF, imagem) no GitHub"""
-    try:
-        # Gerar nome único para o arquivo
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        nome_arquivo = f"anexos/{processo}_{tipo}_{timestamp}_{arquivo.name}"
-        
-        # Preparar dados para GitHub API
-        repo_owner = st.secrets["github"]["repo_owner"]
-        repo_name = st.secrets["github"]["repo_name"]
-        branch = "main"
-        
-        api_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/contents/{nome_arquivo}"
-        
-        headers = {
-            "Authorization": f'token {st.secrets["github"]["token"]}',
-            "Accept": "application/vnd.github+json"
-        }
-        
-        # Converter arquivo para base64
-        arquivo_bytes = arquivo.read()
-        content_b64 = base64.b64encode(arquivo_bytes).decode("utf-8")
-        
-        data = {
-            "message": f"Upload anexo: {nome_arquivo}",
-            "content": content_b64,
-            "branch": branch
-        }
-        
-        # Enviar para GitHub
-        response = requests.put(api_url, headers=headers, json=data)
-        
-        if response.status_code in [200, 201]:
-            # Retornar URL de download do arquivo
-            download_url = response.json()["content"]["download_url"]
-            st.success(f"✅ Arquivo {arquivo.name} salvo com sucesso!")
-            return download_url
-        else:
-            st.error(f"❌ Erro ao salvar arquivo: {response.status_code}")
-            return None
-            
-    except Exception as e:
-        st.error(f"❌ Erro ao processar arquivo: {e}")
-        return None
-
-def baixar_arquivo_github(url_arquivo, nome_display):
-    """Cria link para download de arquivo do GitHub"""
-    if url_arquivo:
-        st.markdown(f"📎 **[{nome_display}]({url_arquivo})**")
-        return True
-    return False
-
 def interface_fluxo_trabalho(df, perfil_usuario):
     """Interface do fluxo de trabalho com dashboards por perfil"""
     st.subheader("🔄 Fluxo de Trabalho - Alvarás")
@@ -1082,7 +2679,7 @@ def interface_edicao_processo(df, alvara_id, processo, status_atual, perfil_usua
                     st.session_state.df_editado_alvaras.loc[idx, "Enviado Financeiro Por"] = st.session_state.get("usuario", "Sistema")
                     
                     # Salvar no GitHub
-                    novo_sha = save_data_to_github_seguro(
+                    novo_sha = salvar_dados_controle(
                         st.session_state.df_editado_alvaras,
                         "lista_alvaras.csv",
                         st.session_state.file_sha_alvaras
@@ -1131,7 +2728,7 @@ def interface_edicao_processo(df, alvara_id, processo, status_atual, perfil_usua
             st.session_state.df_editado_alvaras.loc[idx, "Enviado Rodrigo Por"] = st.session_state.get("usuario", "Sistema")
             
             # Salvar no GitHub
-            novo_sha = save_data_to_github_seguro(
+            novo_sha = salvar_dados_controle(
                 st.session_state.df_editado_alvaras,
                 "lista_alvaras.csv",
                 st.session_state.file_sha_alvaras
@@ -1177,7 +2774,7 @@ def interface_edicao_processo(df, alvara_id, processo, status_atual, perfil_usua
                     st.session_state.df_editado_alvaras.loc[idx, "Finalizado Por"] = st.session_state.get("usuario", "Sistema")
                     
                     # Salvar no GitHub
-                    novo_sha = save_data_to_github_seguro(
+                    novo_sha = salvar_dados_controle(
                         st.session_state.df_editado_alvaras,
                         "lista_alvaras.csv",
                         st.session_state.file_sha_alvaras
@@ -1265,7 +2862,7 @@ def interface_cadastro_alvara(df, perfil_usuario):
         
         with col_salvar:
             if st.button("💾 Salvar Todas as Linhas", type="primary"):
-                novo_sha = save_data_to_github_seguro(
+                novo_sha = salvar_dados_controle(
                     st.session_state.df_editado_alvaras,
                     "lista_alvaras.csv",
                     st.session_state.file_sha_alvaras
@@ -153,8 +153,8 @@ def interface_cadastro_rpv(df, perfil_usuario):
         st.session_state.df_editado_rpv = pd.concat([st.session_state.df_editado_rpv, nova_linha_df], ignore_index=True)
         
         # Salvar no GitHub
-        from components.functions_controle import save_data_to_github_seguro
-        novo_sha = save_data_to_github_seguro(
+        from components.functions_controle import salvar_dados_controle
+        novo_sha = salvar_dados_controle(
             st.session_state.df_editado_rpv,
             "lista_rpv.csv",
             "file_sha_rpv"
@@ -182,8 +182,8 @@ def interface_cadastro_rpv(df, perfil_usuario):
             st.markdown(f"**RPV {i+1}:** {linha['Processo']} - {linha['Beneficiário']}")
         
         if st.button("💾 Salvar Todas Pendentes", type="primary"):
-            from components.functions_controle import save_data_to_github_seguro
-            novo_sha = save_data_to_github_seguro(
+            from components.functions_controle import salvar_dados_controle
+            novo_sha = salvar_dados_controle(
                 st.session_state.df_editado_rpv,
                 "lista_rpv.csv",
                 "file_sha_rpv"
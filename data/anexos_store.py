@@ -0,0 +1,94 @@
+# data/anexos_store.py
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from pathlib import Path
+
+# =====================================
+# CONFIGURAÇÃO DO ARMAZÉM DE ANEXOS
+# =====================================
+
+PASTA_ANEXOS = Path(__file__).parent / "anexos"
+
+# Leitura/gravação em blocos: memória constante qualquer que seja o tamanho do arquivo
+TAMANHO_BLOCO_BYTES = 1024 * 1024
+
+# Referência gravada nas planilhas: anexo:<sha256>/<nome original>
+PREFIXO_REFERENCIA = "anexo:"
+
+_REGEX_REFERENCIA = re.compile(rf"^{PREFIXO_REFERENCIA}([0-9a-f]{{64}})/(.+)$")
+
+# =====================================
+# REFERÊNCIAS
+# =====================================
+
+def _caminho_blob(hash_conteudo):
+    return PASTA_ANEXOS / hash_conteudo[:2] / hash_conteudo
+
+def _nome_seguro(nome):
+    """Nome para o download: barras e caracteres especiais viram '_'"""
+    return re.sub(r"[^\w.\- ]", "_", str(nome)).strip() or "arquivo"
+
+def montar_referencia(hash_conteudo, nome):
+    return f"{PREFIXO_REFERENCIA}{hash_conteudo}/{_nome_seguro(nome)}"
+
+def interpretar_referencia(referencia):
+    """(hash, nome) de uma referência de anexo, ou None se não for uma (ex.: URL antiga do GitHub)"""
+    encontrado = _REGEX_REFERENCIA.match(str(referencia).strip())
+    return (encontrado.group(1), encontrado.group(2)) if encontrado else None
+
+def tipo_mime(nome):
+    return mimetypes.guess_type(nome)[0] or "application/octet-stream"
+
+# =====================================
+# GRAVAÇÃO
+# =====================================
+
+def guardar_anexo(arquivo, nome=None):
+    """
+    Grava o arquivo (objeto com .read) pelo hash do conteúdo, em blocos.
+    Conteúdo já guardado não é gravado de novo. Retorna (referência, novo).
+    """
+    if hasattr(arquivo, "seek"):
+        arquivo.seek(0)
+
+    PASTA_ANEXOS.mkdir(parents=True, exist_ok=True)
+    hash_sha256 = hashlib.sha256()
+    descritor, arquivo_tmp = tempfile.mkstemp(dir=PASTA_ANEXOS, suffix=".tmp")
+
+    try:
+        with os.fdopen(descritor, "wb") as destino:
+            for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO_BYTES), b""):
+                hash_sha256.update(bloco)
+                destino.write(bloco)
+
+        hash_conteudo = hash_sha256.hexdigest()
+        caminho = _caminho_blob(hash_conteudo)
+        novo = not caminho.exists()
+
+        if novo:
+            caminho.parent.mkdir(exist_ok=True)
+            os.replace(arquivo_tmp, caminho)
+        else:
+            os.remove(arquivo_tmp)
+    except Exception:
+        if os.path.exists(arquivo_tmp):
+            os.remove(arquivo_tmp)
+        raise
+
+    referencia = montar_referencia(hash_conteudo, nome or getattr(arquivo, "name", "arquivo"))
+    return referencia, novo
+
+# =====================================
+# LEITURA
+# =====================================
+
+def caminho_anexo(referencia):
+    """Caminho do conteúdo no disco, ou None se a referência não existir aqui"""
+    partes = interpretar_referencia(referencia)
+    if partes is None:
+        return None
+    caminho = _caminho_blob(partes[0])
+    return caminho if caminho.exists() else None
@@ -0,0 +1,119 @@
+# data/cache_compartilhado.py
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from data.snapshot_store import calcular_hash_conteudo
+
+# =====================================
+# CONFIGURAÇÃO DO CACHE ENTRE SESSÕES
+# =====================================
+
+# Views filtradas (anos × tipo) guardadas no processo, compartilhadas por todas as sessões
+MAX_VIEWS_FILTRADAS = 64
+ORCAMENTO_VIEWS_MB = 256
+
+# HTML dos mapas já renderizados, por (mapa, filtros, versão dos dados)
+MAX_ARTEFATOS_RENDERIZADOS = 48
+ORCAMENTO_ARTEFATOS_MB = 96
+
+# =====================================
+# VERSÃO DOS DADOS
+# =====================================
+
+def obter_versao_dados(df):
+    """Identifica a versão do DataFrame combinado (hash gravado pelo snapshot)"""
+    versao = df.attrs.get("versao_dados")
+    if versao is None:
+        versao = calcular_hash_conteudo(df)
+        df.attrs["versao_dados"] = versao
+    return versao
+
+# =====================================
+# VIEWS FILTRADAS (LRU COM ORÇAMENTO DE MEMÓRIA)
+# =====================================
+
+@st.cache_resource
+def _estado_views():
+    """Estado único do processo: views em ordem de uso e bytes ocupados"""
+    return {"lock": threading.Lock(), "views": OrderedDict(), "bytes": 0}
+
+def _tamanho_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+def obter_view_compartilhada(chave, construir):
+    """
+    Retorna a view guardada para `chave` ou a constrói com `construir()`.
+    As sessões recebem uma cópia rasa: colunas novas não vazam para as outras.
+    """
+    estado = _estado_views()
+
+    with estado["lock"]:
+        if chave in estado["views"]:
+            estado["views"].move_to_end(chave)
+            return estado["views"][chave][0].copy(deep=False)
+
+    # Construção fora do lock para não travar as outras sessões
+    df = construir()
+    tamanho = _tamanho_bytes(df)
+    orcamento = ORCAMENTO_VIEWS_MB * 1024 * 1024
+
+    with estado["lock"]:
+        if chave not in estado["views"]:
+            estado["views"][chave] = (df, tamanho)
+            estado["bytes"] += tamanho
+        estado["views"].move_to_end(chave)
+
+        # Descartar as menos usadas, mantendo sempre a mais recente
+        while len(estado["views"]) > 1 and (
+            len(estado["views"]) > MAX_VIEWS_FILTRADAS or estado["bytes"] > orcamento
+        ):
+            _, (_, tamanho_antigo) = estado["views"].popitem(last=False)
+            estado["bytes"] -= tamanho_antigo
+
+        df = estado["views"][chave][0]
+
+    return df.copy(deep=False)
+
+# =====================================
+# ARTEFATOS RENDERIZADOS (HTML DOS MAPAS)
+# =====================================
+
+@st.cache_resource
+def _estado_artefatos():
+    """Textos renderizados em ordem de uso e bytes ocupados (um estado por processo)"""
+    return {"lock": threading.Lock(), "artefatos": OrderedDict(), "bytes": 0}
+
+def obter_artefato_compartilhado(chave, construir):
+    """
+    Retorna o texto (HTML/GeoJSON) guardado para `chave` ou o gera com
+    `construir()`. Se `construir()` devolver None, nada é guardado.
+    """
+    estado = _estado_artefatos()
+
+    with estado["lock"]:
+        if chave in estado["artefatos"]:
+            estado["artefatos"].move_to_end(chave)
+            return estado["artefatos"][chave][0]
+
+    # Construção fora do lock para não travar as outras sessões
+    texto = construir()
+    if texto is None:
+        return None
+    tamanho = len(texto.encode("utf-8"))
+    orcamento = ORCAMENTO_ARTEFATOS_MB * 1024 * 1024
+
+    with estado["lock"]:
+        if chave not in estado["artefatos"]:
+            estado["artefatos"][chave] = (texto, tamanho)
+            estado["bytes"] += tamanho
+        estado["artefatos"].move_to_end(chave)
+
+        while len(estado["artefatos"]) > 1 and (
+            len(estado["artefatos"]) > MAX_ARTEFATOS_RENDERIZADOS or estado["bytes"] > orcamento
+        ):
+            _, (_, tamanho_antigo) = estado["artefatos"].popitem(last=False)
+            estado["bytes"] -= tamanho_antigo
+
+        return estado["artefatos"][chave][0]
@@ -0,0 +1,108 @@
+# data/cubo_analitico.py
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data.cache_compartilhado import obter_view_compartilhada
+
+# =====================================
+# CONFIGURAÇÃO DO CUBO
+# =====================================
+
+# Grão do cubo: dia × tipo, só as dimensões que os cards temporais e os KPIs
+# fatiam. Poucos milhares de células, qualquer que seja o tamanho do histórico.
+DIMENSOES_CUBO = ['dia', 'tipoPrincipal']
+
+# =====================================
+# CONSTRUÇÃO
+# =====================================
+
+def _coluna_numerica(df, coluna):
+    if coluna not in df.columns:
+        return pd.Series(np.nan, index=df.index)
+    return pd.to_numeric(df[coluna], errors='coerce')
+
+def construir_cubo(df_analise):
+    """
+    Pré-agrega o DataFrame de análise (contagens e somas) por dia × tipo.
+    Médias saem de soma / quantidade, então continuam exatas depois de fatiar.
+    """
+    base = pd.DataFrame(index=df_analise.index)
+
+    if 'data_convertida' in df_analise.columns:
+        base['dia'] = pd.to_datetime(df_analise['data_convertida'], errors='coerce').dt.normalize()
+    else:
+        base['dia'] = pd.NaT
+
+    base['tipoPrincipal'] = df_analise['tipoPrincipal'] if 'tipoPrincipal' in df_analise.columns else None
+
+    idade_cliente = _coluna_numerica(df_analise, 'idade_cliente_anos')
+    idade_processo = _coluna_numerica(df_analise, 'idade_processo_anos')
+
+    # Medidas
+    base['processos'] = 1
+    base['soma_idade_processo'] = idade_processo.fillna(0)
+    base['qtd_idade_processo'] = idade_processo.notna().astype(int)
+    base['soma_idade_cliente'] = idade_cliente.fillna(0)
+    base['qtd_idade_cliente'] = idade_cliente.notna().astype(int)
+    if 'prospector' in df_analise.columns:
+        base['com_prospector'] = df_analise['prospector'].notna().astype(int)
+    else:
+        base['com_prospector'] = 0
+
+    cubo = base.groupby(DIMENSOES_CUBO, dropna=False, observed=True, sort=False).sum().reset_index()
+    print(f"🧊 Cubo analítico: {len(df_analise)} processos -> {len(cubo)} células")
+    return cubo
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def obter_cubo_compartilhado(versao_dados, _df_analise):
+    """Cubo construído uma vez por versão dos dados e compartilhado entre sessões"""
+    return construir_cubo(_df_analise)
+
+# =====================================
+# FATIAMENTO E CONSULTAS
+# =====================================
+
+def fatiar_cubo(cubo, anos_selecionados=None, tipo_selecionado='Todos'):
+    """Mesmo recorte de filtrar_por_periodo_e_tipo, aplicado às células do cubo"""
+    mascara = np.ones(len(cubo), dtype=bool)
+
+    if anos_selecionados is not None:
+        anos = cubo['dia'].dt.year
+        mascara &= ((anos >= anos_selecionados[0]) & (anos <= anos_selecionados[1])).to_numpy()
+
+    if tipo_selecionado != 'Todos':
+        mascara &= (cubo['tipoPrincipal'] == tipo_selecionado).to_numpy()
+
+    return cubo[mascara]
+
+def obter_fatia_compartilhada(versao_dados, df_analise, anos_selecionados, tipo_selecionado):
+    """Fatia do cubo para os filtros da sessão (guardada no cache de views)"""
+    cubo = obter_cubo_compartilhado(versao_dados, df_analise)
+    return obter_view_compartilhada(
+        (versao_dados, 'cubo', anos_selecionados, tipo_selecionado),
+        lambda: fatiar_cubo(cubo, anos_selecionados, tipo_selecionado)
+    )
+
+def calcular_kpis_cubo(cubo):
+    """Totais e médias principais a partir das células do cubo"""
+    total = int(cubo['processos'].sum())
+    qtd_idade_processo = cubo['qtd_idade_processo'].sum()
+    qtd_idade_cliente = cubo['qtd_idade_cliente'].sum()
+
+    return {
+        'total_processos': total,
+        'idade_media_processos': cubo['soma_idade_processo'].sum() / qtd_idade_processo if qtd_idade_processo > 0 else np.nan,
+        'idade_media_clientes': cubo['soma_idade_cliente'].sum() / qtd_idade_cliente if qtd_idade_cliente > 0 else np.nan,
+        'com_prospector': int(cubo['com_prospector'].sum()),
+    }
+
+def contar_processos_por_dia(df=None, cubo=None):
+    """Série dia -> nº de processos (datas inválidas descartadas), do cubo ou do DataFrame"""
+    if cubo is not None:
+        contagem = cubo.dropna(subset=['dia']).groupby('dia')['processos'].sum()
+    else:
+        coluna = 'data_convertida' if 'data_convertida' in df.columns else 'data'
+        datas = pd.to_datetime(df[coluna], errors='coerce').dropna()
+        contagem = datas.dt.normalize().value_counts()
+    return contagem.sort_index().astype(int)
@@ -4,34 +4,57 @@ import pandas as pd
 import sys
 import os
 from pathlib import Path
-from unidecode import unidecode
 
 # Adicionar path da API se necessário
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 sys.path.append(str(project_root / "api"))
 
+from utils.text_processing import normalizar_municipios, MUNICIPIOS_SERGIPE
+from data.juncao_espacial import juntar_espacialmente
+
 # Importar suas funções da API
 try:
-    from api.db_api import baixar_dados_processos, baixar_dados_clientes
+    from api.db_api import baixar_dados_paralelo, baixar_dados_processos
+    from data.sincronizacao import planejar_sincronizacao, concluir_sincronizacao
+    from data.snapshot_store import carregar_snapshot_merged, salvar_snapshot_merged
     API_DISPONIVEL = True
 except ImportError as e:
     API_DISPONIVEL = False
 
 # REMOVER @st.cache_data do nível do módulo
-def carregar_e_processar_dados():
+def carregar_e_processar_dados(forcar_completo=False):
     """Carrega dados das APIs e combina processos e clientes"""
     
     # Aplicar cache apenas quando streamlit está rodando
     @st.cache_data(ttl=3600)  # Cache por 1 hora
-    def _carregar_dados_cached():
+    def _carregar_dados_cached(forcar_completo):
         if not API_DISPONIVEL:
             return None
         
+        # Partida a frio: snapshot colunar local ainda dentro da validade
+        if not forcar_completo:
+            df_local = carregar_snapshot_merged(idade_maxima_segundos=3600)
+            if df_local is not None:
+                return df_local
+        
         try:
-            # Baixar dados
-            df_processos = baixar_dados_processos()
-            df_clientes = baixar_dados_clientes()
+            # Processos: só a janela desde a última sincronização (ou carga completa)
+            snapshot, params_processos = planejar_sincronizacao(forcar_completo)
+            
+            # Baixar processos e clientes em paralelo (mesma sessão HTTP)
+            dados, relatorio = baixar_dados_paralelo(
+                ("processos", "clientes"),
+                params={"processos": params_processos} if params_processos else None
+            )
+            download_ok = bool((relatorio.loc[relatorio['endpoint'] == 'processos', 'status'] == 200).any())
+            df_processos = concluir_sincronizacao(snapshot, dados.get("processos"), params_processos, download_ok)
+            
+            if df_processos is None:
+                # Esquema mudou: refazer carga completa
+                df_processos = concluir_sincronizacao(None, baixar_dados_processos(), None)
+            
+            df_clientes = dados.get("clientes")
             
             if df_processos is None or df_clientes is None:
                 return None
@@ -39,105 +62,48 @@ def carregar_e_processar_dados():
             # Fazer merge dos dados
             df = df_processos.merge(df_clientes, on='idCliente', how='left', suffixes=('', '_cliente'))
             
-            return df
+            # Persistir em disco (tipado) para as próximas partidas
+            return salvar_snapshot_merged(df)
             
         except Exception as e:
             st.error(f"Erro ao carregar dados: {e}")
-            return None
-    
-    return _carregar_dados_cached()
-
-def corrigir_municipios(nome):
-    """Corrige o nome dos municípios com base em regras específicas"""
-    if pd.isna(nome):
-        return ''
-    
-    nome_lower = unidecode(str(nome).lower())
+            # API fora do ar: usar o último snapshot, mesmo vencido
+            return carregar_snapshot_merged()
     
-    if 'socorro' in nome_lower or 'socoro' in nome_lower:
-        return 'NOSSA SENHORA DO SOCORRO'
-    elif 'itaporanga' in nome_lower:
-        return "ITAPORANGA D'AJUDA"
-    elif 'barra' in nome_lower and 'coqu' in nome_lower:
-        return 'BARRA DOS COQUEIROS'
-    elif 'japarat' in nome_lower:
-        return 'JAPARATUBA'
-    elif 'sao cristovao' in nome_lower or 'cristovao' in nome_lower or 'sao cris' in nome_lower:
-        return 'SAO CRISTOVAO'
-    elif 'neopolois' in nome_lower or 'neopolis' in nome_lower:
-        return 'NEOPOLIS'
-    elif 'maynard' in nome_lower:
-        return 'GENERAL MAYNARD'
-    elif 'santa rosa' in nome_lower:
-        return 'SANTA ROSA DE LIMA'
-    elif 'aracau' in nome_lower or 'aracaiu' in nome_lower:
-        return 'ARACAJU'
-    elif 'das flores' in nome_lower:
-        return 'ILHA DAS FLORES'
-    elif 'senhora apar' in nome_lower:
-        return 'NOSSA SENHORA APARECIDA'
-    elif 'aquibada' in nome_lower:
-        return 'AQUIDABA'
-    elif 'porto' in nome_lower and 'folha' in nome_lower:
-        return 'PORTO DA FOLHA'
-    elif 'propria' in nome_lower:
-        return 'PROPRIA'
-    elif 'tobias' in nome_lower:
-        return 'TOBIAS BARRETO'
-    elif 'estancia' in nome_lower:
-        return 'ESTANCIA'
-    elif 'lagarto' in nome_lower:
-        return 'LAGARTO'
-    elif 'itabaiana' in nome_lower and 'inha' not in nome_lower:
-        return 'ITABAIANA'
-    elif 'simao' in nome_lower:
-        return 'SIMAO DIAS'
-    elif 'caninde' in nome_lower:
-        return 'CANINDE DE SAO FRANCISCO'
-    
-    return nome.upper()
+    return _carregar_dados_cached(forcar_completo)
 
 def filtrar_sergipe(df):
-    """Filtra apenas registros de Sergipe com correção de nomes"""
+    """
+    Filtra apenas registros de Sergipe. O município (e o bairro, em Aracaju)
+    vem do ponto do endereço quando há coordenada precisa; a correção de
+    nomes só roda para os demais.
+    """
     if df is None or 'cidade' not in df.columns:
         return None
     
-    # Lista de cidades de Sergipe
-    cidades_sergipe = [
-        'AMPARO DE SAO FRANCISCO', 'AQUIDABA', 'ARACAJU', 'ARAUA',
-        'AREIA BRANCA', 'BARRA DOS COQUEIROS', 'BOQUIM', 'BREJO GRANDE',
-        'CAMPO DO BRITO', 'CANHOBA', 'CANINDE DE SAO FRANCISCO', 'CAPELA',
-        'CARIRA', 'CARMOPOLIS', 'CEDRO DE SAO JOAO', 'CRISTINAPOLIS', 'CUMBE',
-        'DIVINA PASTORA', 'ESTANCIA', 'FEIRA NOVA', 'FREI PAULO', 'GARARU',
-        'GENERAL MAYNARD', 'GRACHO CARDOSO', 'ILHA DAS FLORES', 'INDIAROBA',
-        'ITABAIANA', 'ITABAIANINHA', 'ITABI', "ITAPORANGA D'AJUDA", 'JAPARATUBA',
-        'JAPOATA', 'LAGARTO', 'LARANJEIRAS', 'MACAMBIRA', 'MALHADA DOS BOIS',
-        'MALHADOR', 'MARUIM', 'MOITA BONITA', 'MONTE ALEGRE DE SERGIPE',
-        'MURIBECA', 'NEOPOLIS', 'NOSSA SENHORA APARECIDA', 'NOSSA SENHORA DA GLORIA',
-        'NOSSA SENHORA DAS DORES', 'NOSSA SENHORA DE LOURDES', 'NOSSA SENHORA DO SOCORRO',
-        'PACATUBA', 'PEDRA MOLE', 'PEDRINHAS', 'PINHAO',
-        'PIRAMBU', 'POCO REDONDO', 'POCO VERDE', 'PORTO DA FOLHA',
-        'PROPRIA', 'RIACHAO DO DANTAS', 'RIACHUELO', 'RIBEIROPOLIS',
-        'ROSARIO DO CATETE', 'SALGADO', 'SANTA LUZIA DO ITANHY', 'SANTA ROSA DE LIMA',
-        'SANTANA DO SAO FRANCISCO', 'SANTO AMARO DAS BROTAS', 'SAO CRISTOVAO',
-        'SAO DOMINGOS', 'SAO FRANCISCO', 'SAO MIGUEL DO ALEIXO', 'SIMAO DIAS',
-        'SIRIRI', 'TELHA', 'TOBIAS BARRETO', 'TOMAR DO GERU', 'UMBAUBA'
-    ]
-    
-    # Normalizar e corrigir nomes
-    df_clean = df.dropna(subset=['cidade']).copy()
+    # Filtrar apenas processos ativos
+    df_clean = df[df['status'] == 'Ativo'].copy()
     df_clean['cidade_upper'] = df_clean['cidade'].str.upper().str.strip()
     
-    # Aplicar correção de nomes
-    df_clean['cidade_upper_corrigido'] = df_clean['cidade_upper'].apply(corrigir_municipios)
+    # Junção espacial: endereço -> ponto -> polígono do município / bairro mais próximo
+    espacial = juntar_espacialmente(df_clean)
+    com_ponto = espacial['municipio_espacial'] != ''
     
-    # Filtrar apenas processos ativos
-    df_clean = df_clean[df_clean['status'] == 'Ativo'].copy()
+    # Aplicar correção de nomes só a quem não tem ponto (regras rodam nos valores distintos)
+    df_clean['cidade_upper_corrigido'] = espacial['municipio_espacial']
+    df_clean.loc[~com_ponto, 'cidade_upper_corrigido'] = normalizar_municipios(
+        df_clean.loc[~com_ponto, 'cidade_upper']
+    )
     
-    # Filtrar cidades de Sergipe usando nomes corrigidos
-    df_sergipe = df_clean[df_clean['cidade_upper_corrigido'].isin(cidades_sergipe)]
+    # Filtrar cidades de Sergipe (o ponto já garante que o município é de Sergipe)
+    df_sergipe = df_clean[com_ponto | df_clean['cidade_upper_corrigido'].isin(MUNICIPIOS_SERGIPE)].copy()
     
     # Renomear para usar na função do mapa
     df_sergipe['cidade_upper'] = df_sergipe['cidade_upper_corrigido']
     
-    return df_sergipe
\ No newline at end of file
+    # Ponto e bairro do ponto (chave do índice de bairros, '' sem ponto) em colunas próprias:
+    # 'bairro' continua sendo o nome de exibição
+    colunas_espaciais = ['lat', 'lon', 'origem_coord', 'bairro_espacial']
+    df_sergipe[colunas_espaciais] = espacial.loc[df_sergipe.index, colunas_espaciais]
+    
+    return df_sergipe
@@ -0,0 +1,300 @@
+# data/geocodigo_bairros.py
+import difflib
+import json
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+from unidecode import unidecode
+
+from data.sincronizacao import PASTA_CACHE
+
+# =====================================
+# CONFIGURAÇÃO DO ÍNDICE DE BAIRROS
+# =====================================
+
+PASTA_DADOS = Path(__file__).parent
+# Semente versionada (só leitura em tempo de execução) e coordenadas novas da
+# fila, inclusive as tentativas sem resultado, no cache local
+ARQUIVO_COORDENADAS_BAIRROS = PASTA_DADOS / "coordenadas_bairros_aracaju.pkl"
+ARQUIVO_COORDENADAS_BAIRROS_CACHE = PASTA_CACHE / "coordenadas_bairros.pkl"
+ARQUIVO_GEOJSON_BAIRROS = PASTA_DADOS / "clientes_bairros_aracaju.geojson"
+
+# Similaridade mínima (0-1) para aceitar um nome aproximado
+SIMILARIDADE_MINIMA_BAIRRO = 0.85
+
+# Menor prefixo de CEP aceito no fallback (5 = setor/subsetor)
+PREFIXO_CEP_MINIMO = 5
+
+# Bairros não encontrados podem ser geocodificados em segundo plano (Nominatim)
+GEOCODIFICACAO_SEGUNDO_PLANO = True
+INTERVALO_NOMINATIM_SEGUNDOS = 1.0
+
+# Só entram na fila nomes com pelo menos este número de processos
+# (somado entre as grafias com a mesma chave): erros de digitação isolados ficam de fora
+MINIMO_PROCESSOS_FILA_BAIRRO = 3
+
+PREFIXOS_IGNORADOS = ("BAIRRO ",)
+
+# Coordenadas fora desta caixa (lat_min, lat_max, lon_min, lon_max) são descartadas:
+# o GeoJSON tem bairros que o Nominatim resolveu em outros estados/países
+LIMITES_ARACAJU = (-11.20, -10.80, -37.25, -36.95)
+
+# =====================================
+# NORMALIZAÇÃO
+# =====================================
+
+def normalizar_nome_bairro(nome):
+    """Chave de busca: maiúsculas, sem acentos/pontuação e espaços simples"""
+    if pd.isna(nome):
+        return ''
+    texto = unidecode(str(nome)).upper()
+    texto = re.sub(r"[^A-Z0-9 ]", " ", texto)
+    texto = " ".join(texto.split())
+    for prefixo in PREFIXOS_IGNORADOS:
+        if texto.startswith(prefixo):
+            texto = texto[len(prefixo):]
+    return texto
+
+def dentro_de_aracaju(lat, lon):
+    """Confere se a coordenada cai na caixa de Aracaju"""
+    lat_min, lat_max, lon_min, lon_max = LIMITES_ARACAJU
+    return lat is not None and lon is not None and lat_min <= lat <= lat_max and lon_min <= lon <= lon_max
+
+def normalizar_cep(cep):
+    """CEP só com dígitos (8 posições) ou '' se inválido"""
+    if pd.isna(cep):
+        return ''
+    digitos = re.sub(r"\D", "", str(cep).split(".")[0])
+    return digitos.zfill(8) if 5 <= len(digitos) <= 8 else ''
+
+# =====================================
+# CONSTRUÇÃO DO ÍNDICE
+# =====================================
+
+def construir_indice_bairros():
+    """
+    Monta o índice local a partir do GeoJSON de clientes e das coordenadas
+    salvas (.pkl). Retorna dict com 'nomes', 'prefixos', 'lista_nomes' e
+    'sem_coordenada' (nomes já tentados na fila sem resultado).
+    """
+    nomes = {}
+    ceps = {}
+    sem_coordenada = set()
+
+    if ARQUIVO_GEOJSON_BAIRROS.exists():
+        try:
+            with open(ARQUIVO_GEOJSON_BAIRROS, encoding="utf-8") as f:
+                geojson = json.load(f)
+            for feature in geojson.get("features", []):
+                props = feature.get("properties", {})
+                lat, lon = props.get("lat"), props.get("lon")
+                if not dentro_de_aracaju(lat, lon):
+                    continue
+                chave = normalizar_nome_bairro(props.get("bairro"))
+                if chave:
+                    nomes.setdefault(chave, (lat, lon))
+                cep = normalizar_cep(props.get("cep"))
+                if cep:
+                    ceps.setdefault(cep, (lat, lon))
+        except Exception as e:
+            print(f"⚠️ GeoJSON de bairros ilegível: {e}")
+
+    # Coordenadas geocodificadas têm prioridade sobre o GeoJSON
+    for bairro, coord in _ler_coordenadas_salvas().items():
+        chave = normalizar_nome_bairro(bairro)
+        if chave and dentro_de_aracaju(coord.get("lat"), coord.get("lon")):
+            nomes[chave] = (coord["lat"], coord["lon"])
+        elif chave:
+            sem_coordenada.add(chave)
+
+    # Centroide por prefixo de CEP (fallback quando o nome não é reconhecido)
+    acumulado = {}
+    for cep, (lat, lon) in ceps.items():
+        for tamanho in range(PREFIXO_CEP_MINIMO, 9):
+            soma = acumulado.setdefault(cep[:tamanho], [0.0, 0.0, 0])
+            soma[0] += lat
+            soma[1] += lon
+            soma[2] += 1
+    prefixos = {prefixo: (s_lat / n, s_lon / n) for prefixo, (s_lat, s_lon, n) in acumulado.items()}
+
+    print(f"📍 Índice de bairros: {len(nomes)} nomes, {len(ceps)} CEPs")
+    return {
+        "nomes": nomes, "prefixos": prefixos, "lista_nomes": list(nomes),
+        "sem_coordenada": sem_coordenada - set(nomes),
+    }
+
+def _ler_pkl(arquivo):
+    if not arquivo.exists():
+        return {}
+    try:
+        with open(arquivo, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"⚠️ Cache de coordenadas ilegível ({arquivo.name}): {e}")
+        return {}
+
+def _ler_coordenadas_salvas():
+    """Semente versionada com as coordenadas da fila por cima"""
+    return {**_ler_pkl(ARQUIVO_COORDENADAS_BAIRROS), **_ler_pkl(ARQUIVO_COORDENADAS_BAIRROS_CACHE)}
+
+def _versao_arquivos():
+    return tuple(
+        arquivo.stat().st_mtime if arquivo.exists() else None
+        for arquivo in (ARQUIVO_GEOJSON_BAIRROS, ARQUIVO_COORDENADAS_BAIRROS, ARQUIVO_COORDENADAS_BAIRROS_CACHE)
+    )
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _indice_bairros_cached(versao_arquivos):
+    return construir_indice_bairros()
+
+def obter_indice_bairros():
+    """Índice compartilhado, reconstruído quando os arquivos de origem mudam"""
+    return _indice_bairros_cached(_versao_arquivos())
+
+def versao_indice_bairros():
+    """Muda quando o GeoJSON ou as coordenadas geocodificadas são atualizados"""
+    return _versao_arquivos()
+
+# =====================================
+# CONSULTA
+# =====================================
+
+def localizar_bairro(bairro, cep=None, indice=None):
+    """
+    Resolve (lat, lon, origem) de um bairro só com dados locais:
+    nome exato -> nome aproximado -> prefixo do CEP. Retorna None se não achar.
+    """
+    indice = indice or obter_indice_bairros()
+    chave = normalizar_nome_bairro(bairro)
+
+    if chave:
+        if chave in indice["nomes"]:
+            return (*indice["nomes"][chave], "nome")
+
+        parecidos = difflib.get_close_matches(chave, indice["lista_nomes"], n=1, cutoff=SIMILARIDADE_MINIMA_BAIRRO)
+        if parecidos:
+            return (*indice["nomes"][parecidos[0]], "aproximado")
+
+    cep = normalizar_cep(cep)
+    for tamanho in range(8, PREFIXO_CEP_MINIMO - 1, -1):
+        if cep and cep[:tamanho] in indice["prefixos"]:
+            return (*indice["prefixos"][cep[:tamanho]], "cep")
+
+    return None
+
+def chave_bairro_indice(bairro, indice=None):
+    """Chave do índice para o bairro (nome exato ou aproximado), ou '' se não houver"""
+    indice = indice or obter_indice_bairros()
+    chave = normalizar_nome_bairro(bairro)
+    if not chave or chave in indice["nomes"]:
+        return chave
+    parecidos = difflib.get_close_matches(chave, indice["lista_nomes"], n=1, cutoff=SIMILARIDADE_MINIMA_BAIRRO)
+    return parecidos[0] if parecidos else ''
+
+def geocodificar_bairros_local(df_bairros, coluna_bairro='bairro', coluna_cep='cep_ref', coluna_contagem=None):
+    """
+    Adiciona lat/lon/origem_coord ao DataFrame de bairros usando só o índice local.
+    Bairros não resolvidos ficam sem coordenada; vão para a fila de segundo plano
+    os que somam MINIMO_PROCESSOS_FILA_BAIRRO processos em coluna_contagem
+    (sem ela, todos).
+    """
+    indice = obter_indice_bairros()
+    df = df_bairros.copy()
+
+    resultados = [
+        localizar_bairro(bairro, cep, indice)
+        for bairro, cep in zip(df[coluna_bairro], df[coluna_cep] if coluna_cep in df.columns else [None] * len(df))
+    ]
+    df['lat'] = [r[0] if r else None for r in resultados]
+    df['lon'] = [r[1] if r else None for r in resultados]
+    df['origem_coord'] = [r[2] if r else None for r in resultados]
+
+    # Um nome por chave válida; nomes já tentados sem resultado não voltam para a fila
+    sem_coord = df.loc[df['lat'].isna() & df[coluna_bairro].notna()]
+    chaves = sem_coord[coluna_bairro].map(normalizar_nome_bairro)
+    validos = (chaves != '') & ~chaves.isin(indice["sem_coordenada"])
+    if coluna_contagem is not None:
+        total_por_chave = sem_coord[coluna_contagem].groupby(chaves).transform('sum')
+        validos &= total_por_chave >= MINIMO_PROCESSOS_FILA_BAIRRO
+    pendentes = sem_coord.loc[validos, coluna_bairro].groupby(chaves[validos]).first().tolist()
+    if pendentes:
+        print(f"⚠️ {len(pendentes)} bairros sem coordenada local, enfileirados para atualização")
+        enfileirar_bairros_pendentes(pendentes)
+
+    return df
+
+# =====================================
+# ATUALIZAÇÃO EM SEGUNDO PLANO
+# =====================================
+
+@st.cache_resource
+def _estado_fila_bairros():
+    """Fila única do processo com os bairros aguardando geocodificação"""
+    return {"lock": threading.Lock(), "pendentes": set(), "tentados": set(), "thread": None}
+
+def enfileirar_bairros_pendentes(bairros):
+    """Enfileira bairros para geocodificação online sem bloquear a página"""
+    if not GEOCODIFICACAO_SEGUNDO_PLANO:
+        return
+
+    estado = _estado_fila_bairros()
+    with estado["lock"]:
+        novos = {b for b in bairros if normalizar_nome_bairro(b)} - estado["tentados"]
+        estado["pendentes"] |= novos
+        if not estado["pendentes"] or (estado["thread"] is not None and estado["thread"].is_alive()):
+            return
+        estado["thread"] = threading.Thread(target=_processar_fila_bairros, args=(estado,), daemon=True)
+        estado["thread"].start()
+
+def _processar_fila_bairros(estado):
+    """Geocodifica a fila no Nominatim e grava no cache .pkl, sem resultado também (o índice se recarrega sozinho)"""
+    try:
+        from geopy.geocoders import Nominatim
+    except ImportError:
+        print("⚠️ geopy não instalado, fila de bairros não será processada")
+        return
+
+    geolocator = Nominatim(user_agent="aracaju_bairros")
+
+    while True:
+        with estado["lock"]:
+            if not estado["pendentes"]:
+                return
+            bairro = estado["pendentes"].pop()
+            estado["tentados"].add(bairro)
+
+        try:
+            location = geolocator.geocode(f"{bairro}, Aracaju, Sergipe, Brasil", timeout=5)
+            if location and dentro_de_aracaju(location.latitude, location.longitude):
+                _salvar_coordenada_bairro(bairro, location.latitude, location.longitude)
+                print(f"📍 Bairro geocodificado em segundo plano: {bairro}")
+            else:
+                _salvar_coordenada_bairro(bairro, None, None)
+        except Exception as e:
+            # Erro de rede não é gravado: o bairro é tentado de novo em outro processo
+            print(f"⚠️ Falha ao geocodificar {bairro}: {e}")
+
+        time.sleep(INTERVALO_NOMINATIM_SEGUNDOS)
+
+def _salvar_coordenada_bairro(bairro, lat, lon):
+    """Grava só no cache local (lat/lon None = tentado sem resultado); a semente versionada não muda"""
+    coordenadas = _ler_pkl(ARQUIVO_COORDENADAS_BAIRROS_CACHE)
+    coordenadas[normalizar_nome_bairro(bairro)] = {
+        "lat": lat,
+        "lon": lon,
+        "data_geocod": datetime.now().isoformat(),
+    }
+    # Temporário exclusivo: processos gravando ao mesmo tempo não se atropelam
+    PASTA_CACHE.mkdir(exist_ok=True)
+    descritor, arquivo_tmp = tempfile.mkstemp(dir=PASTA_CACHE, suffix=".tmp")
+    with os.fdopen(descritor, "wb") as f:
+        pickle.dump(coordenadas, f)
+    os.replace(arquivo_tmp, ARQUIVO_COORDENADAS_BAIRROS_CACHE)
@@ -0,0 +1,202 @@
+# data/geometria_municipios.py
+import json
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+from unidecode import unidecode
+
+from data.sincronizacao import PASTA_CACHE
+
+try:
+    import geopandas as gpd
+    import shapely
+    GEOPANDAS_DISPONIVEL = True
+except ImportError:
+    GEOPANDAS_DISPONIVEL = False
+
+# =====================================
+# CONFIGURAÇÃO DA GEOMETRIA SIMPLIFICADA
+# =====================================
+
+ARQUIVO_SHAPEFILE_MUNICIPIOS = (
+    Path(__file__).parent.parent / "dados_geograficos" / "sergipe_municipios" / "SE_Municipios_2022.shp"
+)
+
+# Mudar a versão invalida os arquivos gerados com outro formato
+VERSAO_GEOMETRIA = "1"
+
+# Zooms com geometria pré-gerada (o mapa de Sergipe usa zoom fixo 8)
+ZOOMS_GEOMETRIA = (6, 8, 10, 12)
+
+# 5 casas decimais ≈ 1 m, bem abaixo de um pixel em qualquer zoom gerado
+CASAS_DECIMAIS_COORDENADAS = 5
+
+# Leaflet desenha em WGS84; o shapefile do IBGE vem em SIRGAS 2000
+CRS_MAPA = "EPSG:4326"
+
+COLUNAS_PROPRIEDADES = ['CD_MUN', 'NM_MUN']
+
+# =====================================
+# GERAÇÃO (BUILD)
+# =====================================
+
+def tolerancia_para_zoom(zoom):
+    """Meio pixel, em graus, no zoom informado: simplificação abaixo disso não aparece"""
+    return 360 / (256 * 2 ** zoom) / 2
+
+def arquivo_geometria(zoom):
+    return PASTA_CACHE / f"municipios_sergipe_z{zoom}.geojson"
+
+def normalizar_nome_municipio(nome):
+    """Chave de junção com cidade_upper (mesma regra usada antes no mapa)"""
+    return unidecode(str(nome).upper().strip()) if pd.notna(nome) else ''
+
+def _versao_origem():
+    if not ARQUIVO_SHAPEFILE_MUNICIPIOS.exists():
+        return None
+    return f"{VERSAO_GEOMETRIA}:{ARQUIVO_SHAPEFILE_MUNICIPIOS.stat().st_mtime_ns}"
+
+def _carregar_municipios_origem():
+    if ARQUIVO_SHAPEFILE_MUNICIPIOS.exists():
+        return gpd.read_file(ARQUIVO_SHAPEFILE_MUNICIPIOS)
+    from functions.geo import baixar_municipios_sergipe
+    return baixar_municipios_sergipe()
+
+def _simplificar_cobertura(geometrias, tolerancia):
+    """Simplifica mantendo as fronteiras compartilhadas (sem frestas entre vizinhos)"""
+    try:
+        return shapely.coverage_simplify(geometrias, tolerancia)
+    except Exception:
+        # GEOS < 3.12 ou cobertura inválida: simplificação polígono a polígono
+        return shapely.simplify(geometrias, tolerancia, preserve_topology=True)
+
+def _arredondar_coordenadas(coordenadas):
+    if isinstance(coordenadas[0], (int, float)):
+        return [round(c, CASAS_DECIMAIS_COORDENADAS) for c in coordenadas]
+    return [_arredondar_coordenadas(c) for c in coordenadas]
+
+def gerar_geometrias_simplificadas(gdf_municipios=None):
+    """
+    Gera um GeoJSON por zoom de ZOOMS_GEOMETRIA em data/cache: geometria em
+    WGS84, simplificada sem quebrar fronteiras, com nome_upper e o centroide
+    (da geometria completa) já calculados. Retorna True se gerou.
+    """
+    if not GEOPANDAS_DISPONIVEL:
+        print("⚠️ geopandas não instalado, geometria simplificada não será gerada")
+        return False
+
+    try:
+        gdf = gdf_municipios if gdf_municipios is not None else _carregar_municipios_origem()
+        if gdf is None:
+            return False
+
+        gdf = gdf.to_crs(CRS_MAPA) if gdf.crs is not None else gdf
+        geometrias = shapely.make_valid(gdf.geometry.values)
+        centroides = shapely.centroid(geometrias)
+
+        propriedades = [
+            {
+                **{col: row[col] for col in COLUNAS_PROPRIEDADES if col in gdf.columns},
+                'nome_upper': normalizar_nome_municipio(row['NM_MUN']),
+                'centroide_lat': round(shapely.get_y(centroide), CASAS_DECIMAIS_COORDENADAS),
+                'centroide_lon': round(shapely.get_x(centroide), CASAS_DECIMAIS_COORDENADAS),
+            }
+            for (_, row), centroide in zip(gdf.iterrows(), centroides)
+        ]
+
+        PASTA_CACHE.mkdir(exist_ok=True)
+        grade = 10 ** -CASAS_DECIMAIS_COORDENADAS
+
+        for zoom in ZOOMS_GEOMETRIA:
+            simplificadas = _simplificar_cobertura(geometrias, tolerancia_para_zoom(zoom))
+            simplificadas = shapely.set_precision(simplificadas, grade)
+
+            geojson = {
+                "type": "FeatureCollection",
+                "metadados": {"versao_origem": _versao_origem(), "zoom": zoom},
+                "features": [
+                    {
+                        "type": "Feature",
+                        "properties": props,
+                        "geometry": {
+                            "type": geom.geom_type,
+                            "coordinates": _arredondar_coordenadas(
+                                shapely.geometry.mapping(geom)["coordinates"]
+                            ),
+                        },
+                    }
+                    for props, geom in zip(propriedades, simplificadas)
+                ],
+            }
+
+            arquivo = arquivo_geometria(zoom)
+            arquivo_tmp = arquivo.with_suffix(".tmp")
+            with open(arquivo_tmp, "w", encoding="utf-8") as f:
+                json.dump(geojson, f, ensure_ascii=False, separators=(",", ":"))
+            arquivo_tmp.replace(arquivo)
+            print(f"🗺️ Geometria z{zoom}: {arquivo.stat().st_size / 1024:.0f} KB")
+
+        return True
+
+    except Exception as e:
+        print(f"❌ Erro ao gerar geometria simplificada: {e}")
+        return False
+
+# =====================================
+# LEITURA
+# =====================================
+
+def _zoom_disponivel(zoom):
+    """Menor zoom gerado que tenha pelo menos o detalhe pedido"""
+    maiores = [z for z in ZOOMS_GEOMETRIA if z >= zoom]
+    return min(maiores) if maiores else max(ZOOMS_GEOMETRIA)
+
+def _ler_geometria(zoom):
+    arquivo = arquivo_geometria(zoom)
+    if not arquivo.exists():
+        return None
+    try:
+        with open(arquivo, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Geometria simplificada ilegível: {e}")
+        return None
+
+@st.cache_resource(max_entries=len(ZOOMS_GEOMETRIA), show_spinner=False)
+def _geometria_cached(zoom, versao_origem):
+    geojson = _ler_geometria(zoom)
+    desatualizado = geojson is None or (
+        versao_origem is not None and geojson["metadados"]["versao_origem"] != versao_origem
+    )
+    if desatualizado and gerar_geometrias_simplificadas():
+        geojson = _ler_geometria(zoom)
+    return geojson
+
+def carregar_geometria_municipios(zoom=8):
+    """
+    FeatureCollection simplificada para o zoom (gerada na primeira vez).
+    O objeto é compartilhado entre sessões: não altere, use com_propriedades().
+    Retorna None se não houver geometria disponível.
+    """
+    return _geometria_cached(_zoom_disponivel(zoom), _versao_origem())
+
+def versao_geometria_municipios():
+    """Muda quando o shapefile de origem ou VERSAO_GEOMETRIA mudam"""
+    return _versao_origem()
+
+def com_propriedades(geojson, propriedades_extras):
+    """
+    Cópia rasa do GeoJSON com propriedades extras por feature
+    (lista na mesma ordem das features). As geometrias não são copiadas.
+    """
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {**feature, "properties": {**feature["properties"], **extras}}
+            for feature, extras in zip(geojson["features"], propriedades_extras)
+        ],
+    }
+
+if __name__ == "__main__":
+    gerar_geometrias_simplificadas()
@@ -0,0 +1,360 @@
+# data/juncao_espacial.py
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from unidecode import unidecode
+
+from data.sincronizacao import PASTA_CACHE
+from data.geometria_municipios import (
+    GEOPANDAS_DISPONIVEL, carregar_geometria_municipios, versao_geometria_municipios
+)
+from data.geocodigo_bairros import (
+    obter_indice_bairros, versao_indice_bairros, normalizar_cep, INTERVALO_NOMINATIM_SEGUNDOS, PASTA_DADOS
+)
+
+if GEOPANDAS_DISPONIVEL:
+    import shapely
+
+# =====================================
+# CONFIGURAÇÃO DA JUNÇÃO ESPACIAL
+# =====================================
+
+ARQUIVO_COORDENADAS_ENDERECOS = PASTA_CACHE / "coordenadas_enderecos.sqlite3"
+
+# Colunas do DataFrame combinado (o 'numero' do cliente vira 'numero_cliente' no merge)
+COLUNAS_ENDERECO = {"cep": "cep", "endereco": "endereco", "numero": "numero_cliente"}
+
+# Geometria dos municípios usada no ponto-em-polígono (meio pixel no zoom 12 ≈ 20 m)
+ZOOM_GEOMETRIA_JUNCAO = 12
+
+# Ponto mais longe que isso do bairro mais próximo fica sem bairro
+DISTANCIA_MAXIMA_BAIRRO_METROS = 2000
+METROS_POR_GRAU = 111_320
+
+# Endereços sem coordenada podem ser geocodificados em segundo plano no
+# Nominatim público. Desligado por padrão: envia rua, número e CEP dos
+# clientes a um serviço externo; só ligar com autorização. Com ele desligado
+# o cache é preenchido pela etapa offline (python -m data.juncao_espacial)
+# e, enquanto estiver vazio, a junção não roda.
+GEOCODIFICACAO_ENDERECOS_SEGUNDO_PLANO = False
+
+# Origens de coordenada precisas o bastante para definir município e bairro.
+# 'cep_geral' (CEP único da cidade, terminado em 000) costuma ser preenchido
+# com a cidade errada: nesses casos vale o nome digitado.
+ORIGENS_PRECISAS = ("endereco", "cep")
+
+# =====================================
+# CHAVE DO ENDEREÇO
+# =====================================
+
+def normalizar_logradouro(texto):
+    """Maiúsculas, sem acentos/pontuação e espaços simples"""
+    if pd.isna(texto):
+        return ''
+    return " ".join(re.sub(r"[^A-Z0-9 ]", " ", unidecode(str(texto)).upper()).split())
+
+def chave_endereco(cep, endereco, numero):
+    """CEP|LOGRADOURO|NÚMERO: mesma chave no cache e na fila de geocodificação"""
+    return f"{normalizar_cep(cep)}|{normalizar_logradouro(endereco)}|{normalizar_logradouro(numero)}"
+
+# =====================================
+# CACHE PERSISTENTE DE COORDENADAS
+# =====================================
+
+def _conectar_cache():
+    PASTA_CACHE.mkdir(exist_ok=True)
+    conn = sqlite3.connect(ARQUIVO_COORDENADAS_ENDERECOS)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS enderecos (
+            chave TEXT PRIMARY KEY, lat REAL, lon REAL, origem TEXT, atualizado_em TEXT
+        )
+    """)
+    return conn
+
+def _versao_cache_enderecos():
+    arquivo = ARQUIVO_COORDENADAS_ENDERECOS
+    return arquivo.stat().st_mtime_ns if arquivo.exists() else None
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _coordenadas_enderecos_cached(versao):
+    """Endereços já tentados: chave -> (lat, lon); sem coordenada = (None, None)"""
+    if versao is None:
+        return {}
+    with closing(_conectar_cache()) as conn:
+        return {chave: (lat, lon) for chave, lat, lon in conn.execute("SELECT chave, lat, lon FROM enderecos")}
+
+def obter_coordenadas_enderecos():
+    """Cache compartilhado, relido quando a fila grava endereços novos"""
+    return _coordenadas_enderecos_cached(_versao_cache_enderecos())
+
+def versao_juncao_espacial():
+    """
+    Muda quando o resultado da junção pode mudar para os mesmos dados:
+    cache de endereços, índice de bairros ou geometria dos municípios
+    """
+    return (_versao_cache_enderecos(), versao_indice_bairros(), versao_geometria_municipios())
+
+def _salvar_coordenada_endereco(chave, lat, lon):
+    origem = "endereco" if lat is not None else "falha"
+    with closing(_conectar_cache()) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO enderecos VALUES (?, ?, ?, ?, ?)",
+            (chave, lat, lon, origem, datetime.now().isoformat()),
+        )
+
+# =====================================
+# GEOCODIFICAÇÃO DOS ENDEREÇOS
+# =====================================
+
+def geocodificar_enderecos(enderecos):
+    """
+    Coordenadas dos endereços (DataFrame com chave, cep, endereco, numero):
+    cache de endereços -> CEP exato do índice local. Retorna lat, lon e
+    origem_coord no mesmo índice; os não resolvidos vão para a fila.
+    """
+    cache = obter_coordenadas_enderecos()
+    ceps_locais = obter_indice_bairros()["prefixos"]
+    ceps = np.array([normalizar_cep(cep) for cep in enderecos["cep"]], dtype=object)
+
+    tentado = enderecos["chave"].isin(cache.keys()).to_numpy()
+    lat, lon = _lat_lon([cache.get(chave) for chave in enderecos["chave"]])
+    origem = np.where(np.isnan(lat), None, "endereco").astype(object)
+
+    # CEP com coordenada no índice local (só o CEP completo: prefixos cruzam municípios)
+    usar_cep = np.isnan(lat) & np.array([cep in ceps_locais for cep in ceps])
+    lat_cep, lon_cep = _lat_lon([ceps_locais[cep] for cep in ceps[usar_cep]])
+    lat[usar_cep], lon[usar_cep] = lat_cep, lon_cep
+    origem[usar_cep] = np.where([cep.endswith("000") for cep in ceps[usar_cep]], "cep_geral", "cep")
+
+    # Só vai para a fila quem ainda não foi tentado e tem CEP ou logradouro
+    pendentes = enderecos[~tentado & ((ceps != "") | enderecos["endereco"].notna().to_numpy())]
+    if len(pendentes):
+        enfileirar_enderecos_pendentes(pendentes[["chave", "cep", "endereco", "numero"]].itertuples(index=False))
+
+    return pd.DataFrame({"lat": lat, "lon": lon, "origem_coord": origem}, index=enderecos.index)
+
+def _lat_lon(coordenadas):
+    """Arrays (lat, lon) de uma lista de pares; None vira NaN"""
+    pares = np.array([c if c is not None else (None, None) for c in coordenadas], dtype=float).reshape(-1, 2)
+    return pares[:, 0].copy(), pares[:, 1].copy()
+
+@st.cache_resource
+def _estado_fila_enderecos():
+    """Fila única do processo com os endereços aguardando geocodificação"""
+    return {"lock": threading.Lock(), "pendentes": {}, "tentados": set(), "thread": None}
+
+def enfileirar_enderecos_pendentes(enderecos):
+    """Enfileira (chave, cep, endereco, numero) para geocodificação online sem bloquear a página"""
+    if not GEOCODIFICACAO_ENDERECOS_SEGUNDO_PLANO:
+        return
+
+    estado = _estado_fila_enderecos()
+    with estado["lock"]:
+        for chave, cep, endereco, numero in enderecos:
+            if chave not in estado["tentados"]:
+                estado["pendentes"].setdefault(chave, (cep, endereco, numero))
+        if not estado["pendentes"] or (estado["thread"] is not None and estado["thread"].is_alive()):
+            return
+        estado["thread"] = threading.Thread(target=_processar_fila_enderecos, args=(estado,), daemon=True)
+        estado["thread"].start()
+
+def _processar_fila_enderecos(estado):
+    """Geocodifica a fila no Nominatim e grava no cache SQLite (sem coordenada também, para não repetir)"""
+    try:
+        from geopy.geocoders import Nominatim
+    except ImportError:
+        print("⚠️ geopy não instalado, fila de endereços não será processada")
+        return
+
+    geolocator = Nominatim(user_agent="aracaju_enderecos")
+
+    while True:
+        with estado["lock"]:
+            if not estado["pendentes"]:
+                return
+            chave, (cep, endereco, numero) = estado["pendentes"].popitem()
+            estado["tentados"].add(chave)
+
+        _geocodificar_endereco(geolocator, chave, cep, endereco, numero)
+        time.sleep(INTERVALO_NOMINATIM_SEGUNDOS)
+
+def _geocodificar_endereco(geolocator, chave, cep, endereco, numero):
+    """Uma consulta ao Nominatim; grava no cache SQLite (sem coordenada também, para não repetir)"""
+    consulta = {"country": "Brasil", "state": "Sergipe"}
+    logradouro = " ".join(normalizar_logradouro(v) for v in (numero, endereco) if normalizar_logradouro(v))
+    if logradouro:
+        consulta["street"] = logradouro
+    if normalizar_cep(cep):
+        consulta["postalcode"] = normalizar_cep(cep)
+
+    try:
+        location = geolocator.geocode(consulta, timeout=5)
+        _salvar_coordenada_endereco(
+            chave, *((location.latitude, location.longitude) if location else (None, None))
+        )
+    except Exception as e:
+        # Erro de rede não é gravado: o endereço é tentado de novo em outro processo
+        print(f"⚠️ Falha ao geocodificar endereço {chave}: {e}")
+
+def geocodificar_enderecos_em_lote(df):
+    """
+    Etapa offline: geocodifica no Nominatim, em sequência, os endereços
+    distintos de df ainda não tentados e grava tudo no cache SQLite.
+    """
+    try:
+        from geopy.geocoders import Nominatim
+    except ImportError:
+        print("⚠️ geopy não instalado, endereços não serão geocodificados")
+        return
+
+    _, enderecos = _enderecos_distintos(df)
+    if enderecos is None:
+        return
+
+    cache = obter_coordenadas_enderecos()
+    ceps = enderecos["cep"].map(normalizar_cep)
+    pendentes = enderecos[~enderecos["chave"].isin(cache.keys()) & ((ceps != "") | enderecos["endereco"].notna())]
+    print(f"📍 {len(pendentes)} endereços a geocodificar ({len(enderecos) - len(pendentes)} já no cache ou sem dados)")
+
+    geolocator = Nominatim(user_agent="aracaju_enderecos")
+    for i, (chave, cep, endereco, numero) in enumerate(
+        pendentes[["chave", "cep", "endereco", "numero"]].itertuples(index=False), 1
+    ):
+        _geocodificar_endereco(geolocator, chave, cep, endereco, numero)
+        if i % 100 == 0:
+            print(f"   {i}/{len(pendentes)}")
+        time.sleep(INTERVALO_NOMINATIM_SEGUNDOS)
+
+# =====================================
+# ÍNDICES ESPACIAIS (STRTREE)
+# =====================================
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _indice_municipios_cached(versao):
+    geojson = carregar_geometria_municipios(ZOOM_GEOMETRIA_JUNCAO)
+    if geojson is None:
+        return None
+    geometrias = np.array([shapely.geometry.shape(f["geometry"]) for f in geojson["features"]])
+    nomes = np.array([f["properties"]["nome_upper"] for f in geojson["features"]], dtype=object)
+    return shapely.STRtree(geometrias), nomes
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _indice_bairros_espacial_cached(versao):
+    nomes = obter_indice_bairros()["nomes"]
+    if not nomes:
+        return None
+    pontos = shapely.points([(lon, lat) for lat, lon in nomes.values()])
+    return shapely.STRtree(pontos), np.array(list(nomes), dtype=object)
+
+def _primeiro_por_ponto(pares, quantidade, nomes):
+    """Nome do primeiro resultado de cada ponto em pares (2, k) do STRtree; '' sem resultado"""
+    resultado = np.full(quantidade, '', dtype=object)
+    pontos, primeiros = np.unique(pares[0], return_index=True)
+    resultado[pontos] = nomes[pares[1][primeiros]]
+    return resultado
+
+def atribuir_municipios(lat, lon):
+    """Município (nome_upper do shapefile) que contém cada ponto, numa consulta em lote"""
+    indice = _indice_municipios_cached(versao_geometria_municipios())
+    if indice is None:
+        return np.full(len(lat), '', dtype=object)
+    arvore, nomes = indice
+    pares = arvore.query(shapely.points(np.column_stack([lon, lat])), predicate="intersects")
+    return _primeiro_por_ponto(pares, len(lat), nomes)
+
+def atribuir_bairros(lat, lon):
+    """Bairro do índice local mais próximo de cada ponto (até DISTANCIA_MAXIMA_BAIRRO_METROS)"""
+    indice = _indice_bairros_espacial_cached(versao_indice_bairros())
+    if indice is None:
+        return np.full(len(lat), '', dtype=object)
+    arvore, nomes = indice
+    pares = arvore.query_nearest(
+        shapely.points(np.column_stack([lon, lat])),
+        max_distance=DISTANCIA_MAXIMA_BAIRRO_METROS / METROS_POR_GRAU,
+    )
+    return _primeiro_por_ponto(pares, len(lat), nomes)
+
+# =====================================
+# JUNÇÃO
+# =====================================
+
+def _enderecos_distintos(df):
+    """
+    (grupos, enderecos): grupo de cada linha de df e um DataFrame com cep,
+    endereco, numero e chave por endereço distinto; (None, None) sem colunas
+    """
+    colunas = [c for c in COLUNAS_ENDERECO.values() if c in df.columns]
+    if not colunas:
+        return None, None
+
+    # Processos do mesmo cliente repetem o endereço: geocodifica cada um uma vez
+    grupos = df.groupby(colunas, dropna=False, sort=False).ngroup().to_numpy()
+    enderecos = (
+        df[colunas].iloc[np.unique(grupos, return_index=True)[1]]
+        .rename(columns={v: k for k, v in COLUNAS_ENDERECO.items()})
+        .reindex(columns=list(COLUNAS_ENDERECO))
+        .reset_index(drop=True)
+    )
+    enderecos["chave"] = [
+        chave_endereco(cep, endereco, numero)
+        for cep, endereco, numero in zip(enderecos["cep"], enderecos["endereco"], enderecos["numero"])
+    ]
+    return grupos, enderecos
+
+def juntar_espacialmente(df):
+    """
+    Geocodifica os endereços distintos de df e atribui município e bairro pelo
+    ponto. Retorna DataFrame (mesmo índice) com lat, lon, origem_coord,
+    municipio_espacial e bairro_espacial ('' sem coordenada precisa).
+    """
+    vazio = pd.DataFrame({
+        "lat": np.nan, "lon": np.nan, "origem_coord": None, "municipio_espacial": '', "bairro_espacial": ''
+    }, index=df.index)
+    if not GEOPANDAS_DISPONIVEL or len(df) == 0:
+        return vazio
+
+    # Sem fila e com o cache vazio a junção não tem pontos de endereço: espera a etapa offline
+    if not GEOCODIFICACAO_ENDERECOS_SEGUNDO_PLANO and not obter_coordenadas_enderecos():
+        return vazio
+
+    grupos, enderecos = _enderecos_distintos(df)
+    if enderecos is None:
+        return vazio
+
+    coordenadas = geocodificar_enderecos(enderecos)
+    lat, lon = coordenadas["lat"].to_numpy(), coordenadas["lon"].to_numpy()
+    precisos = coordenadas["origem_coord"].isin(ORIGENS_PRECISAS).to_numpy()
+
+    municipio = np.full(len(enderecos), '', dtype=object)
+    if precisos.any():
+        municipio[precisos] = atribuir_municipios(lat[precisos], lon[precisos])
+
+    bairro = np.full(len(enderecos), '', dtype=object)
+    em_aracaju = municipio == 'ARACAJU'
+    if em_aracaju.any():
+        bairro[em_aracaju] = atribuir_bairros(lat[em_aracaju], lon[em_aracaju])
+
+    # grupos == -1 não ocorre com dropna=False
+    return pd.DataFrame({
+        "lat": lat[grupos],
+        "lon": lon[grupos],
+        "origem_coord": coordenadas["origem_coord"].to_numpy()[grupos],
+        "municipio_espacial": municipio[grupos],
+        "bairro_espacial": bairro[grupos],
+    }, index=df.index)
+
+if __name__ == "__main__":
+    from data.snapshot_store import carregar_snapshot_merged
+
+    # Último snapshot processos + clientes; sem ele, o CSV de clientes
+    df_enderecos = carregar_snapshot_merged()
+    if df_enderecos is None:
+        df_enderecos = pd.read_csv(PASTA_DADOS / "clientes.csv").rename(columns={"numero": "numero_cliente"})
+    geocodificar_enderecos_em_lote(df_enderecos)
@@ -0,0 +1,252 @@
+# data/metricas_fluxo.py
+import hashlib
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# =====================================
+# CONFIGURAÇÃO DAS ETAPAS DOS FLUXOS
+# =====================================
+
+# Etapas em ordem: (status, coluna com a data de entrada, coluna com quem moveu)
+ETAPAS_FLUXO = {
+    "alvaras": [
+        ("Cadastrado", "Data Cadastro", "Cadastrado Por"),
+        ("Enviado para o Financeiro", "Data Envio Financeiro", "Enviado Financeiro Por"),
+        ("Financeiro - Enviado para Rodrigo", "Data Envio Rodrigo", "Enviado Rodrigo Por"),
+        ("Finalizado", "Data Finalização", "Finalizado Por"),
+    ],
+    "rpv": [
+        ("Enviado", "Data Cadastro", "Cadastrado Por"),
+        ("Certidão anexa", "Data Certidão", "Anexado Certidão Por"),
+        ("Enviado para Rodrigo", "Data Envio Rodrigo", "Enviado Rodrigo Por"),
+        ("Finalizado", "Data Finalização", "Finalizado Por"),
+    ],
+    "beneficios": [
+        ("Cadastrado", "Data Cadastro", "Cadastrado Por"),
+        ("Enviado para administrativo", "Data Envio Administrativo", "Enviado Administrativo Por"),
+        ("Implantado", "Data Implantação", "Implantado Por"),
+        ("Enviado para o financeiro", "Data Envio Financeiro", "Enviado Financeiro Por"),
+        ("Finalizado", "Data Finalização", "Finalizado Por"),
+    ],
+}
+
+# Prazo (dias) de permanência em cada etapa; etapas fora daqui não têm SLA
+SLA_ETAPAS_DIAS = {
+    "alvaras": {
+        "Cadastrado": 2,
+        "Enviado para o Financeiro": 5,
+        "Financeiro - Enviado para Rodrigo": 5,
+    },
+    "rpv": {
+        "Enviado": 5,
+        "Certidão anexa": 5,
+        "Enviado para Rodrigo": 10,
+    },
+    "beneficios": {
+        "Cadastrado": 2,
+        "Enviado para administrativo": 10,
+        "Implantado": 5,
+        "Enviado para o financeiro": 10,
+    },
+}
+
+FORMATO_DATA_FLUXO = "%d/%m/%Y %H:%M"
+
+PERCENTIS_LEAD_TIME = [0.5, 0.75, 0.9]
+
+# =====================================
+# PREPARAÇÃO (DATAS TIPADAS)
+# =====================================
+
+def _converter_datas(valores):
+    """Converte as datas do fluxo ('%d/%m/%Y %H:%M'); outros formatos só nos que falharem"""
+    datas = pd.to_datetime(valores, format=FORMATO_DATA_FLUXO, errors="coerce")
+    for formato in ("%d/%m/%Y", "ISO8601"):
+        falhas = datas.isna() & valores.notna() & (valores.astype(str).str.strip() != "")
+        if not falhas.any():
+            break
+        datas[falhas] = pd.to_datetime(valores[falhas], format=formato, errors="coerce")
+    return datas
+
+def _colunas_usadas(df, fluxo):
+    colunas = ["ID", "Status"] + [col for _, data, usuario in ETAPAS_FLUXO[fluxo] for col in (data, usuario)]
+    return [col for col in colunas if col in df.columns]
+
+def _versao_colunas(df, colunas):
+    h = hashlib.sha1("|".join(colunas).encode())
+    h.update(pd.util.hash_pandas_object(df[colunas], index=False).values.tobytes())
+    return h.hexdigest()
+
+def preparar_tempos_fluxo(df, fluxo):
+    """
+    Converte uma vez as colunas de data/usuário das etapas em tabelas tipadas:
+    'entradas' (datetime por etapa), 'usuarios', 'ids', 'status' e 'etapas'.
+    Linhas e colunas ficam na ordem de ETAPAS_FLUXO[fluxo].
+    """
+    etapas = [status for status, _, _ in ETAPAS_FLUXO[fluxo]]
+    vazio = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+
+    entradas = pd.DataFrame({
+        status: _converter_datas(df[data].astype(object).where(df[data].notna())) if data in df.columns else vazio
+        for status, data, _ in ETAPAS_FLUXO[fluxo]
+    }, index=df.index).astype("datetime64[ns]")
+
+    usuarios = pd.DataFrame({
+        status: df[usuario].replace("", np.nan) if usuario in df.columns else np.nan
+        for status, _, usuario in ETAPAS_FLUXO[fluxo]
+    }, index=df.index)
+
+    return {
+        "etapas": etapas,
+        "entradas": entradas,
+        "usuarios": usuarios,
+        "ids": df["ID"].astype(str) if "ID" in df.columns else pd.Series(df.index.astype(str), index=df.index),
+        "status": df["Status"] if "Status" in df.columns else pd.Series(np.nan, index=df.index),
+    }
+
+@st.cache_resource(max_entries=6, show_spinner=False)
+def _tempos_fluxo_cached(fluxo, versao, _df):
+    return preparar_tempos_fluxo(_df, fluxo)
+
+def obter_tempos_fluxo(df, fluxo):
+    """Tempos preparados, reaproveitados enquanto as colunas de status/datas não mudarem"""
+    colunas = _colunas_usadas(df, fluxo)
+    return _tempos_fluxo_cached(fluxo, _versao_colunas(df, colunas), df[colunas])
+
+# =====================================
+# DURAÇÃO DAS ETAPAS
+# =====================================
+
+def duracao_etapas(tempos, agora=None):
+    """
+    Uma linha por (item, etapa) em que o item entrou: entrada, saída (entrada na
+    próxima etapa registrada), quem o moveu para fora e a duração em dias.
+    Etapas ainda abertas têm saída vazia e duração medida até `agora`.
+    """
+    agora = pd.Timestamp.now() if agora is None else pd.Timestamp(agora)
+    etapas = tempos["etapas"]
+    entradas = tempos["entradas"].to_numpy()
+
+    # Próxima entrada registrada depois de cada etapa (etapas puladas não interrompem a contagem)
+    proximas = tempos["entradas"].bfill(axis=1).shift(-1, axis=1).to_numpy()
+    usuarios_proximos = tempos["usuarios"].where(tempos["entradas"].notna()).bfill(axis=1).shift(-1, axis=1).to_numpy()
+
+    # A última etapa (Finalizado) não tem saída
+    com_entrada = ~pd.isna(entradas)
+    com_entrada[:, -1] = False
+    linhas, colunas = np.nonzero(com_entrada)
+
+    saida = proximas[linhas, colunas]
+    concluida = ~pd.isna(saida)
+    fim = np.where(concluida, saida, np.datetime64(agora, "ns"))
+
+    return pd.DataFrame({
+        "ID": tempos["ids"].to_numpy()[linhas],
+        "etapa": pd.Categorical.from_codes(colunas, categories=etapas, ordered=True),
+        "entrada": entradas[linhas, colunas],
+        "saida": saida.astype("datetime64[ns]"),
+        "movido_por": usuarios_proximos[linhas, colunas],
+        "concluida": concluida,
+        "duracao_dias": (fim - entradas[linhas, colunas]) / np.timedelta64(1, "D"),
+    })
+
+def distribuicao_lead_time(duracoes, fluxo=None):
+    """Quantidade, média, percentis e máximo (dias) das etapas já concluídas, por etapa"""
+    concluidas = duracoes[duracoes["concluida"] & (duracoes["duracao_dias"] >= 0)]
+    agrupado = concluidas.groupby("etapa", observed=False)["duracao_dias"]
+
+    resumo = agrupado.agg(["count", "mean", "max"]).rename(
+        columns={"count": "quantidade", "mean": "media_dias", "max": "max_dias"}
+    )
+    percentis = agrupado.quantile(PERCENTIS_LEAD_TIME).unstack()
+    percentis.columns = [f"p{int(p * 100)}_dias" for p in percentis.columns]
+    resumo = resumo.join(percentis)
+
+    if fluxo is not None:
+        sla = pd.Series(SLA_ETAPAS_DIAS.get(fluxo, {}), dtype=float)
+        resumo["sla_dias"] = resumo.index.astype(object).map(sla)
+        fora_do_prazo = concluidas["duracao_dias"] > concluidas["etapa"].astype(object).map(sla)
+        resumo["fora_sla"] = fora_do_prazo.groupby(concluidas["etapa"], observed=False).sum()
+
+    return resumo[resumo["quantidade"] > 0]
+
+# =====================================
+# BACKLOG E VAZÃO
+# =====================================
+
+def idade_backlog(tempos, fluxo=None, agora=None):
+    """
+    Itens ainda não finalizados com a etapa atual (Status), a entrada nela
+    (ou a última data registrada) e a idade em dias; 'fora_sla' se passou do prazo.
+    """
+    agora = pd.Timestamp.now() if agora is None else pd.Timestamp(agora)
+    etapas = tempos["etapas"]
+    status = tempos["status"]
+    abertos = status.isin(etapas[:-1]).to_numpy()
+
+    posicao = pd.Categorical(status, categories=etapas).codes
+    entradas = tempos["entradas"].to_numpy()
+    entrada_status = entradas[np.arange(len(entradas)), np.clip(posicao, 0, None)]
+    ultima_entrada = tempos["entradas"].max(axis=1).to_numpy()
+    entrada = np.where(pd.isna(entrada_status), ultima_entrada, entrada_status)
+
+    backlog = pd.DataFrame({
+        "ID": tempos["ids"].to_numpy(),
+        "etapa": pd.Categorical(status, categories=etapas, ordered=True),
+        "entrada": entrada.astype("datetime64[ns]"),
+    })[abertos]
+    backlog["idade_dias"] = (np.datetime64(agora, "ns") - backlog["entrada"]) / np.timedelta64(1, "D")
+
+    if fluxo is not None:
+        sla = backlog["etapa"].astype(object).map(pd.Series(SLA_ETAPAS_DIAS.get(fluxo, {}), dtype=float))
+        backlog["fora_sla"] = backlog["idade_dias"] > sla
+
+    return backlog.sort_values("idade_dias", ascending=False, na_position="last")
+
+def resumo_backlog(backlog):
+    """Por etapa: itens parados, idade média/máxima e quantos estão fora do SLA"""
+    agrupado = backlog.groupby("etapa", observed=True)
+    resumo = agrupado["idade_dias"].agg(["count", "mean", "max"]).rename(
+        columns={"count": "quantidade", "mean": "idade_media_dias", "max": "idade_max_dias"}
+    )
+    resumo["quantidade"] = agrupado.size()
+    if "fora_sla" in backlog.columns:
+        resumo["fora_sla"] = agrupado["fora_sla"].sum()
+    return resumo
+
+def vazao_semanal(tempos):
+    """
+    Movimentações por semana, usuário e etapa de destino (quem registrou a
+    entrada na etapa). Semanas começam na segunda-feira.
+    """
+    entradas = tempos["entradas"].to_numpy()
+    linhas, colunas = np.nonzero(~pd.isna(entradas))
+
+    eventos = pd.DataFrame({
+        "semana": pd.to_datetime(entradas[linhas, colunas]).to_period("W-SUN").start_time,
+        "usuario": tempos["usuarios"].to_numpy()[linhas, colunas],
+        "etapa": pd.Categorical.from_codes(colunas, categories=tempos["etapas"], ordered=True),
+    })
+    eventos["usuario"] = eventos["usuario"].fillna("Não informado")
+
+    return (
+        eventos.groupby(["semana", "usuario", "etapa"], observed=True)
+        .size()
+        .rename("movimentacoes")
+        .reset_index()
+    )
+
+def indicadores_fluxo(df, fluxo, agora=None):
+    """Duração por etapa, lead time, backlog e vazão do DataFrame de controle do fluxo"""
+    tempos = obter_tempos_fluxo(df, fluxo)
+    duracoes = duracao_etapas(tempos, agora)
+    backlog = idade_backlog(tempos, fluxo, agora)
+    return {
+        "duracoes": duracoes,
+        "lead_time": distribuicao_lead_time(duracoes, fluxo),
+        "backlog": backlog,
+        "resumo_backlog": resumo_backlog(backlog),
+        "vazao": vazao_semanal(tempos),
+    }
@@ -0,0 +1,133 @@
+# data/sincronizacao.py
+import pandas as pd
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# =====================================
+# CONFIGURAÇÃO DA SINCRONIZAÇÃO INCREMENTAL
+# =====================================
+
+PASTA_CACHE = Path(__file__).parent / "cache"
+ARQUIVO_SNAPSHOT_PROCESSOS = PASTA_CACHE / "processos_snapshot.pkl"
+
+# Dias re-baixados antes da última data conhecida (pega registros lançados com atraso)
+SYNC_SOBREPOSICAO_DIAS = 7
+
+# Carga completa periódica: processos antigos que mudam de status só são
+# capturados pela API numa janela que inclua a data original do processo.
+# Use None para desativar.
+SYNC_CARGA_COMPLETA_HORAS = 24
+
+COLUNA_ID = "idProcesso"
+COLUNA_DATA = "data"
+DATA_FIM_PADRAO = "2030-12-31"
+
+# =====================================
+# SNAPSHOT LOCAL
+# =====================================
+
+def carregar_snapshot_processos():
+    """Lê o snapshot local de processos (ou None se não existir)"""
+    if not ARQUIVO_SNAPSHOT_PROCESSOS.exists():
+        return None
+
+    try:
+        snapshot = pd.read_pickle(ARQUIVO_SNAPSHOT_PROCESSOS)
+        if not isinstance(snapshot, dict) or "df" not in snapshot:
+            return None
+        return snapshot
+    except Exception as e:
+        print(f"⚠️ Snapshot de processos ilegível, será refeito: {e}")
+        return None
+
+def salvar_snapshot_processos(df, carga_completa_em):
+    """Grava o snapshot local com a marca d'água (maior data conhecida)"""
+    PASTA_CACHE.mkdir(exist_ok=True)
+
+    snapshot = {
+        "df": df,
+        "colunas": sorted(df.columns),
+        "marca_dagua": calcular_marca_dagua(df),
+        "carga_completa_em": carga_completa_em,
+        "atualizado_em": datetime.now(),
+    }
+
+    # Escrita atômica para não deixar snapshot corrompido
+    arquivo_tmp = ARQUIVO_SNAPSHOT_PROCESSOS.with_suffix(".tmp")
+    pd.to_pickle(snapshot, arquivo_tmp)
+    arquivo_tmp.replace(ARQUIVO_SNAPSHOT_PROCESSOS)
+    return snapshot
+
+def calcular_marca_dagua(df):
+    """Maior data de processo presente no DataFrame"""
+    if df is None or COLUNA_DATA not in df.columns or len(df) == 0:
+        return None
+
+    datas = pd.to_datetime(df[COLUNA_DATA], errors="coerce", utc=True)
+    maior = datas.max()
+    return None if pd.isna(maior) else maior.tz_localize(None)
+
+# =====================================
+# PLANEJAMENTO E APLICAÇÃO DO DELTA
+# =====================================
+
+def planejar_sincronizacao(forcar_completo=False):
+    """
+    Decide entre carga completa e incremental.
+    Retorna (snapshot, params) — params None significa carga completa.
+    """
+    snapshot = None if forcar_completo else carregar_snapshot_processos()
+
+    if snapshot is None or snapshot.get("marca_dagua") is None:
+        return snapshot, None
+
+    if SYNC_CARGA_COMPLETA_HORAS is not None:
+        ultima_completa = snapshot.get("carga_completa_em")
+        if ultima_completa is None or datetime.now() - ultima_completa > timedelta(hours=SYNC_CARGA_COMPLETA_HORAS):
+            return snapshot, None
+
+    inicio = snapshot["marca_dagua"] - timedelta(days=SYNC_SOBREPOSICAO_DIAS)
+    params = {"dataInicio": inicio.strftime("%Y-%m-%d"), "dataFim": DATA_FIM_PADRAO}
+    return snapshot, params
+
+def concluir_sincronizacao(snapshot, df_baixado, params, download_ok=True):
+    """
+    Aplica o resultado do download ao snapshot (upsert por idProcesso).
+    Retorna o DataFrame completo, ou None quando é preciso refazer a carga
+    completa (mudança de esquema).
+    """
+    carga_completa = params is None
+
+    # Falha de rede: servir o último snapshot em vez de derrubar a página
+    if not download_ok:
+        if snapshot is not None:
+            print("⚠️ API indisponível, usando snapshot local de processos")
+            return snapshot["df"]
+        return df_baixado
+
+    if carga_completa:
+        if df_baixado is not None and len(df_baixado) > 0 and COLUNA_ID in df_baixado.columns:
+            salvar_snapshot_processos(df_baixado, datetime.now())
+            print(f"💾 Carga completa de processos: {len(df_baixado)} registros")
+        return df_baixado
+
+    df_snapshot = snapshot["df"]
+
+    if df_baixado is None or len(df_baixado) == 0:
+        print("✅ Nenhum processo novo desde a última sincronização")
+        return df_snapshot
+
+    # Esquema mudou: delta não é confiável, refazer carga completa
+    if sorted(df_baixado.columns) != snapshot["colunas"] or COLUNA_ID not in df_baixado.columns:
+        print("⚠️ Esquema dos processos mudou, refazendo carga completa")
+        return None
+
+    df = pd.concat([df_snapshot, df_baixado], ignore_index=True)
+    df = df.drop_duplicates(subset=COLUNA_ID, keep="last").reset_index(drop=True)
+
+    salvar_snapshot_processos(df, snapshot.get("carga_completa_em"))
+    print(
+        f"🔄 Sincronização incremental desde {params['dataInicio']}: "
+        f"{len(df_baixado)} recebidos, {len(df) - len(df_snapshot)} novos"
+    )
+    return df
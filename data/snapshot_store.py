@@ -0,0 +1,144 @@
+# data/snapshot_store.py
+import hashlib
+import os
+import pandas as pd
+from datetime import datetime
+
+from data.sincronizacao import PASTA_CACHE
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    PYARROW_DISPONIVEL = True
+except ImportError:
+    PYARROW_DISPONIVEL = False
+
+# =====================================
+# CONFIGURAÇÃO DO SNAPSHOT COLUNAR
+# =====================================
+
+ARQUIVO_SNAPSHOT_MERGED = PASTA_CACHE / "processos_clientes.feather"
+
+# Mudar a versão invalida snapshots gravados com outra tipagem
+VERSAO_SNAPSHOT = "1"
+
+# Colunas de baixa cardinalidade gravadas como categorias (dicionário no Arrow).
+# Colunas usadas em rankings (value_counts/groupby) ficam como texto para não
+# aparecerem categorias com contagem zero depois dos filtros.
+COLUNAS_CATEGORICAS = [
+    "classificacao", "inssDigital", "escritorioParceiro", "status", "procedente",
+    "tipoProcesso", "condicao", "origem", "falecido", "nacionalidade",
+    "situacao", "estado"
+]
+
+# =====================================
+# TIPAGEM E HASH
+# =====================================
+
+def tipar_colunas(df):
+    """Converte colunas de baixa cardinalidade para category"""
+    df = df.copy()
+    for col in COLUNAS_CATEGORICAS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+def calcular_hash_conteudo(df):
+    """Hash estável do conteúdo (valores + colunas) do DataFrame"""
+    h = hashlib.sha1(VERSAO_SNAPSHOT.encode())
+    h.update("|".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+# =====================================
+# LEITURA E GRAVAÇÃO
+# =====================================
+
+def ler_metadados_snapshot():
+    """Lê apenas os metadados do snapshot (sem carregar as colunas)"""
+    if not PYARROW_DISPONIVEL or not ARQUIVO_SNAPSHOT_MERGED.exists():
+        return None
+
+    try:
+        with pa.memory_map(str(ARQUIVO_SNAPSHOT_MERGED), "r") as origem:
+            metadados = pa.ipc.open_file(origem).schema.metadata or {}
+        return {chave.decode(): valor.decode() for chave, valor in metadados.items()}
+    except Exception as e:
+        print(f"⚠️ Snapshot colunar ilegível: {e}")
+        return None
+
+def carregar_snapshot_merged(idade_maxima_segundos=None):
+    """
+    Carrega o snapshot colunar via memory-map.
+    Retorna None se não existir, for de outra versão ou estiver mais velho que o limite.
+    """
+    metadados = ler_metadados_snapshot()
+    if metadados is None or metadados.get("versao") != VERSAO_SNAPSHOT:
+        return None
+
+    if idade_maxima_segundos is not None:
+        # mtime marca a última verificação contra a API (ver salvar_snapshot_merged)
+        verificado_em = datetime.fromtimestamp(ARQUIVO_SNAPSHOT_MERGED.stat().st_mtime)
+        if (datetime.now() - verificado_em).total_seconds() > idade_maxima_segundos:
+            return None
+
+    try:
+        tabela = feather.read_table(str(ARQUIVO_SNAPSHOT_MERGED), memory_map=True)
+        df = tabela.to_pandas()
+        df.attrs["versao_dados"] = metadados["hash_conteudo"]
+        print(f"⚡ Snapshot local carregado: {len(df)} registros ({metadados['gerado_em']})")
+        return df
+    except Exception as e:
+        print(f"⚠️ Erro ao ler snapshot colunar: {e}")
+        return None
+
+def salvar_snapshot_merged(df):
+    """
+    Tipa e grava o DataFrame combinado em Feather (sem compressão, para
+    permitir memory-map). Só reescreve o arquivo se o hash do conteúdo mudou.
+    Retorna o DataFrame tipado (com o hash em df.attrs["versao_dados"]).
+    Se a tipagem ou o hash falharem, devolve os dados recebidos sem gravar.
+    """
+    try:
+        df_tipado = tipar_colunas(df)
+        hash_conteudo = calcular_hash_conteudo(df_tipado)
+    except Exception as e:
+        print(f"⚠️ Não foi possível tipar/calcular o hash do snapshot: {e}")
+        # Versão única desta carga: os caches compartilhados não reaproveitam views antigas
+        df.attrs["versao_dados"] = f"sem-hash-{datetime.now().isoformat()}"
+        return df
+
+    df = df_tipado
+    # Versão dos dados usada pelos caches compartilhados entre sessões
+    df.attrs["versao_dados"] = hash_conteudo
+
+    if not PYARROW_DISPONIVEL:
+        return df
+
+    try:
+        metadados = ler_metadados_snapshot()
+
+        if metadados and metadados.get("hash_conteudo") == hash_conteudo:
+            # Conteúdo igual: só marca o arquivo como verificado agora
+            os.utime(ARQUIVO_SNAPSHOT_MERGED)
+            print("✅ Snapshot local já está atualizado (mesmo hash)")
+            return df
+
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        tabela = tabela.replace_schema_metadata({
+            **(tabela.schema.metadata or {}),
+            b"versao": VERSAO_SNAPSHOT.encode(),
+            b"hash_conteudo": hash_conteudo.encode(),
+            b"gerado_em": datetime.now().isoformat().encode(),
+        })
+
+        PASTA_CACHE.mkdir(exist_ok=True)
+        arquivo_tmp = ARQUIVO_SNAPSHOT_MERGED.with_suffix(".tmp")
+        feather.write_feather(tabela, str(arquivo_tmp), compression="uncompressed")
+        arquivo_tmp.replace(ARQUIVO_SNAPSHOT_MERGED)
+        print(f"💾 Snapshot local gravado: {len(df)} registros")
+
+    except Exception as e:
+        print(f"⚠️ Não foi possível gravar o snapshot colunar: {e}")
+
+    return df
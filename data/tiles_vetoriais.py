@@ -0,0 +1,396 @@
+# data/tiles_vetoriais.py
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import streamlit as st
+
+from data.sincronizacao import PASTA_CACHE
+from data.geometria_municipios import (
+    GEOPANDAS_DISPONIVEL, carregar_geometria_municipios, versao_geometria_municipios
+)
+from data.geocodigo_bairros import obter_indice_bairros, versao_indice_bairros
+
+try:
+    import mapbox_vector_tile
+    from mapbox_vector_tile.Mapbox import vector_tile_pb2
+    MVT_DISPONIVEL = GEOPANDAS_DISPONIVEL
+except ImportError:
+    MVT_DISPONIVEL = False
+
+if MVT_DISPONIVEL:
+    import shapely
+
+# =====================================
+# CONFIGURAÇÃO DOS TILES VETORIAIS
+# =====================================
+
+# Mudar a versão invalida os MBTiles gerados com outro formato
+VERSAO_TILES = "1"
+
+# Camada -> zooms pré-gerados (acima do último o Leaflet amplia o tile do último zoom)
+ZOOMS_TILES = {
+    "municipios": range(6, 13),
+    "bairros": range(10, 15),
+}
+
+# Propriedade de cada camada usada para anexar as contagens no servidor
+PROPRIEDADE_ID = {
+    "municipios": "nome_upper",
+    "bairros": "chave",
+}
+
+EXTENSAO_TILE = 4096
+
+# Margem (fração do tile) mantida no recorte para o traçado não cortar na borda
+MARGEM_TILE = 64 / 4096
+
+# Servidor local: o navegador busca só os tiles visíveis
+HOST_SERVIDOR_TILES = "127.0.0.1"
+PORTA_SERVIDOR_TILES = 8765
+# Endereço do servidor visto pelo navegador (ex.: https://mapas.exemplo/tiles atrás
+# de um proxy para 127.0.0.1:<porta>). Sem ele o modo vetorial fica desligado:
+# localhost só funciona no próprio servidor e é bloqueado em páginas https.
+URL_PUBLICA_TILES = None
+
+# Conjuntos de contagens registrados (um por filtro/versão dos dados)
+MAX_CONJUNTOS_CONTAGENS = 64
+
+RAIO_TERRA_METROS = 6378137.0
+_LIMITE_MERCATOR = math.pi * RAIO_TERRA_METROS
+
+_REGEX_CAMINHO_TILE = re.compile(r"^/(\w+)/(\d+)/(\d+)/(\d+)\.pbf$")
+
+# =====================================
+# GEOMETRIA DOS TILES (WEB MERCATOR)
+# =====================================
+
+def arquivo_mbtiles(camada):
+    return PASTA_CACHE / f"tiles_{camada}.mbtiles"
+
+def _para_mercator(coordenadas):
+    lon = np.radians(coordenadas[:, 0])
+    lat = np.radians(np.clip(coordenadas[:, 1], -85.0511, 85.0511))
+    return np.column_stack([lon, np.log(np.tan(np.pi / 4 + lat / 2))]) * RAIO_TERRA_METROS
+
+def _limites_tile(z, x, y):
+    """(minx, miny, maxx, maxy) do tile XYZ em metros Web Mercator"""
+    tamanho = 2 * _LIMITE_MERCATOR / 2 ** z
+    minx = -_LIMITE_MERCATOR + x * tamanho
+    maxy = _LIMITE_MERCATOR - y * tamanho
+    return minx, maxy - tamanho, minx + tamanho, maxy
+
+def _tiles_cobrindo(limites, z):
+    """Intervalos de x e y (XYZ) dos tiles que cobrem os limites em metros"""
+    minx, miny, maxx, maxy = limites
+    tamanho = 2 * _LIMITE_MERCATOR / 2 ** z
+    ultimo = 2 ** z - 1
+    x0, x1 = (int(np.clip((v + _LIMITE_MERCATOR) // tamanho, 0, ultimo)) for v in (minx, maxx))
+    y0, y1 = (int(np.clip((_LIMITE_MERCATOR - v) // tamanho, 0, ultimo)) for v in (maxy, miny))
+    return range(x0, x1 + 1), range(y0, y1 + 1)
+
+def _codificar_tile(camada, geometrias, propriedades, limites):
+    margem = (limites[2] - limites[0]) * MARGEM_TILE
+    area = shapely.box(limites[0] - margem, limites[1] - margem, limites[2] + margem, limites[3] + margem)
+
+    features = []
+    for geometria, props in zip(geometrias, propriedades):
+        recortada = geometria if geometria.geom_type == "Point" else shapely.intersection(geometria, area)
+        if not recortada.is_empty:
+            features.append({"geometry": recortada, "properties": props})
+
+    if not features:
+        return None
+    return mapbox_vector_tile.encode(
+        [{"name": camada, "features": features}],
+        default_options={"quantize_bounds": limites, "extents": EXTENSAO_TILE},
+    )
+
+# =====================================
+# GERAÇÃO DO MBTILES
+# =====================================
+
+def _feicoes_municipios(zoom):
+    """Geometrias (Web Mercator) e propriedades dos municípios para o zoom"""
+    geojson = carregar_geometria_municipios(zoom)
+    if geojson is None:
+        return None, None
+    geometrias = np.array([shapely.geometry.shape(f["geometry"]) for f in geojson["features"]])
+    propriedades = [
+        {col: f["properties"][col] for col in ("CD_MUN", "NM_MUN", "nome_upper") if col in f["properties"]}
+        for f in geojson["features"]
+    ]
+    return shapely.transform(geometrias, _para_mercator), propriedades
+
+def _feicoes_bairros(zoom):
+    """Um ponto por bairro do índice local (Web Mercator)"""
+    nomes = obter_indice_bairros()["nomes"]
+    if not nomes:
+        return None, None
+    coordenadas = np.array([(lon, lat) for lat, lon in nomes.values()], dtype=float)
+    geometrias = shapely.points(_para_mercator(coordenadas))
+    return geometrias, [{"chave": chave} for chave in nomes]
+
+_FEICOES_CAMADA = {
+    "municipios": _feicoes_municipios,
+    "bairros": _feicoes_bairros,
+}
+
+def _versao_camada(camada):
+    origem = versao_geometria_municipios() if camada == "municipios" else versao_indice_bairros()
+    return f"{VERSAO_TILES}:{origem}"
+
+def _criar_mbtiles(conn, camada, zooms):
+    conn.executescript("""
+        CREATE TABLE metadata (name TEXT, value TEXT);
+        CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+        CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row);
+    """)
+    conn.executemany("INSERT INTO metadata (name, value) VALUES (?, ?)", [
+        ("name", camada),
+        ("format", "pbf"),
+        ("minzoom", str(min(zooms))),
+        ("maxzoom", str(max(zooms))),
+        ("versao_origem", _versao_camada(camada)),
+    ])
+
+def gerar_tiles(camada):
+    """
+    Gera data/cache/tiles_<camada>.mbtiles com os tiles de ZOOMS_TILES[camada]
+    (só os que têm alguma feição). Retorna True se gerou.
+    """
+    if not MVT_DISPONIVEL:
+        print("⚠️ mapbox-vector-tile não instalado, tiles vetoriais não serão gerados")
+        return False
+
+    zooms = ZOOMS_TILES[camada]
+    arquivo = arquivo_mbtiles(camada)
+    arquivo_tmp = arquivo.with_suffix(".tmp")
+
+    try:
+        PASTA_CACHE.mkdir(exist_ok=True)
+        arquivo_tmp.unlink(missing_ok=True)
+        total = 0
+
+        with closing(sqlite3.connect(arquivo_tmp)) as conn, conn:
+            _criar_mbtiles(conn, camada, zooms)
+
+            for zoom in zooms:
+                geometrias, propriedades = _FEICOES_CAMADA[camada](zoom)
+                if geometrias is None:
+                    raise ValueError("sem feições de origem")
+
+                arvore = shapely.STRtree(geometrias)
+                colunas, linhas = _tiles_cobrindo(shapely.total_bounds(geometrias), zoom)
+
+                for x in colunas:
+                    for y in linhas:
+                        limites = _limites_tile(zoom, x, y)
+                        indices = arvore.query(shapely.box(*limites))
+                        if len(indices) == 0:
+                            continue
+                        dados = _codificar_tile(
+                            camada, geometrias[indices], [propriedades[i] for i in indices], limites
+                        )
+                        if dados is None:
+                            continue
+                        # MBTiles numera as linhas de baixo para cima (TMS)
+                        conn.execute(
+                            "INSERT INTO tiles VALUES (?, ?, ?, ?)",
+                            (zoom, x, 2 ** zoom - 1 - y, sqlite3.Binary(dados)),
+                        )
+                        total += 1
+
+        arquivo_tmp.replace(arquivo)
+        print(f"🧩 Tiles '{camada}': {total} tiles, {arquivo.stat().st_size / 1024:.0f} KB")
+        return True
+
+    except Exception as e:
+        print(f"❌ Erro ao gerar tiles '{camada}': {e}")
+        arquivo_tmp.unlink(missing_ok=True)
+        return False
+
+def _versao_gravada(camada):
+    arquivo = arquivo_mbtiles(camada)
+    if not arquivo.exists():
+        return None
+    try:
+        with closing(sqlite3.connect(arquivo)) as conn:
+            linha = conn.execute("SELECT value FROM metadata WHERE name = 'versao_origem'").fetchone()
+        return linha[0] if linha else None
+    except sqlite3.Error:
+        return None
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _tiles_cached(camada, versao):
+    return _versao_gravada(camada) == versao or gerar_tiles(camada)
+
+def garantir_tiles(camada):
+    """MBTiles da camada em dia com a origem (gerado na primeira vez). Retorna True se pronto."""
+    return MVT_DISPONIVEL and _tiles_cached(camada, _versao_camada(camada))
+
+def ler_tile(camada, z, x, y):
+    """Bytes do tile XYZ no MBTiles da camada, ou None se vazio"""
+    arquivo = arquivo_mbtiles(camada)
+    if camada not in ZOOMS_TILES or not arquivo.exists():
+        return None
+    with closing(sqlite3.connect(f"file:{arquivo}?mode=ro", uri=True)) as conn:
+        linha = conn.execute(
+            "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+            (z, x, 2 ** z - 1 - y),
+        ).fetchone()
+    return bytes(linha[0]) if linha else None
+
+# =====================================
+# CONTAGENS COMO PROPRIEDADES
+# =====================================
+
+def _valor_mvt(valor):
+    mensagem = vector_tile_pb2.tile.value()
+    if isinstance(valor, bool):
+        mensagem.bool_value = valor
+    elif isinstance(valor, (int, np.integer)):
+        mensagem.sint_value = int(valor)
+    elif isinstance(valor, (float, np.floating)):
+        mensagem.double_value = float(valor)
+    else:
+        mensagem.string_value = str(valor)
+    return mensagem
+
+def anexar_propriedades(dados, camada, propriedades_por_id, padrao=None):
+    """
+    Acrescenta às feições do tile as propriedades de propriedades_por_id
+    (pelo id da camada) sem decodificar as geometrias. Feições sem entrada
+    recebem `padrao`.
+    """
+    tile = vector_tile_pb2.tile()
+    tile.ParseFromString(dados)
+    nome_id = PROPRIEDADE_ID[camada]
+
+    for layer in tile.layers:
+        if layer.name != camada or nome_id not in layer.keys:
+            continue
+        posicao_id = list(layer.keys).index(nome_id)
+        chaves = {chave: i for i, chave in enumerate(layer.keys)}
+        valores = {}
+
+        for feature in layer.features:
+            tags = list(feature.tags)
+            id_feature = next(
+                (layer.values[v].string_value for k, v in zip(tags[::2], tags[1::2]) if k == posicao_id), None
+            )
+            extras = propriedades_por_id.get(id_feature, padrao) or {}
+
+            for nome, valor in extras.items():
+                if nome not in chaves:
+                    chaves[nome] = len(layer.keys)
+                    layer.keys.append(nome)
+                if (nome, valor) not in valores:
+                    valores[(nome, valor)] = len(layer.values)
+                    layer.values.add().CopyFrom(_valor_mvt(valor))
+                feature.tags.extend([chaves[nome], valores[(nome, valor)]])
+
+    return tile.SerializeToString()
+
+# =====================================
+# SERVIDOR LOCAL DE TILES
+# =====================================
+
+class _ManipuladorTiles(BaseHTTPRequestHandler):
+    """GET /<camada>/<z>/<x>/<y>.pbf?contagens=<chave>"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        encontrado = _REGEX_CAMINHO_TILE.match(url.path)
+        if not encontrado or encontrado.group(1) not in ZOOMS_TILES:
+            self.send_error(404)
+            return
+
+        camada = encontrado.group(1)
+        z, x, y = (int(v) for v in encontrado.groups()[1:])
+
+        try:
+            dados = ler_tile(camada, z, x, y) or b""
+            chave = parse_qs(url.query).get("contagens", [None])[0]
+            with self.server.lock:
+                conjunto = self.server.contagens.get((camada, chave))
+            if dados and conjunto is not None:
+                dados = anexar_propriedades(dados, camada, *conjunto)
+        except Exception as e:
+            print(f"⚠️ Erro ao servir tile {self.path}: {e}")
+            self.send_error(500)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-protobuf")
+        self.send_header("Content-Length", str(len(dados)))
+        # O iframe do mapa não tem a mesma origem do servidor de tiles
+        self.send_header("Access-Control-Allow-Origin", "*")
+        # A chave de contagens muda quando o conteúdo muda; sem contagens, não guardar
+        self.send_header("Cache-Control", "public, max-age=86400" if conjunto is not None else "no-store")
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, formato, *args):
+        pass
+
+@st.cache_resource
+def _estado_servidor_tiles():
+    """Servidor único do processo e os conjuntos de contagens registrados"""
+    estado = {"lock": threading.Lock(), "servidor": None, "thread": None}
+    try:
+        servidor = ThreadingHTTPServer((HOST_SERVIDOR_TILES, PORTA_SERVIDOR_TILES), _ManipuladorTiles)
+    except OSError as e:
+        print(f"⚠️ Servidor de tiles não iniciado na porta {PORTA_SERVIDOR_TILES}: {e}")
+        return estado
+
+    servidor.daemon_threads = True
+    servidor.contagens = OrderedDict()
+    servidor.lock = estado["lock"]
+    estado["servidor"] = servidor
+    estado["thread"] = threading.Thread(target=servidor.serve_forever, daemon=True)
+    estado["thread"].start()
+    print(f"🧩 Servidor de tiles em http://{HOST_SERVIDOR_TILES}:{PORTA_SERVIDOR_TILES}")
+    return estado
+
+def registrar_contagens(camada, propriedades_por_id, padrao=None):
+    """
+    Registra as propriedades (ex.: num_processos e cor) anexadas aos tiles
+    da camada. Retorna a chave a usar na URL, ou None sem servidor.
+    """
+    estado = _estado_servidor_tiles()
+    if estado["servidor"] is None:
+        return None
+
+    conteudo = repr((camada, sorted(propriedades_por_id.items()), padrao))
+    chave = hashlib.sha1(conteudo.encode()).hexdigest()[:16]
+
+    with estado["lock"]:
+        contagens = estado["servidor"].contagens
+        contagens[(camada, chave)] = (propriedades_por_id, padrao)
+        contagens.move_to_end((camada, chave))
+        while len(contagens) > MAX_CONJUNTOS_CONTAGENS:
+            contagens.popitem(last=False)
+
+    return chave
+
+def url_tiles(camada, chave_contagens):
+    """Modelo {z}/{x}/{y} da camada para o Leaflet, com as contagens registradas"""
+    return f"{URL_PUBLICA_TILES.rstrip('/')}/{camada}/{{z}}/{{x}}/{{y}}.pbf?contagens={chave_contagens}"
+
+def tiles_vetoriais_disponiveis(camada):
+    """Endereço público configurado, dependência instalada, MBTiles pronto e servidor no ar"""
+    if not URL_PUBLICA_TILES:
+        return False
+    return garantir_tiles(camada) and _estado_servidor_tiles()["servidor"] is not None
+
+if __name__ == "__main__":
+    for nome_camada in ZOOMS_TILES:
+        gerar_tiles(nome_camada)
@@ -11,10 +11,13 @@ from pathlib import Path
 import numpy as np
 import sys
 
-# Adicionar path para importar a função geo
-project_root = Path(__file__).parent
+# Adicionar raiz do projeto ao path (para rodar como script)
+project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
+from utils.text_processing import normalizar_municipios, MUNICIPIOS_SERGIPE
+from utils.cores_mapa import classificar_cores_faixas, FAIXAS_PROCESSOS
+
 def baixar_municipios_sergipe():
     """
     Baixa shapefile dos municípios de Sergipe do IBGE
@@ -114,54 +117,6 @@ def baixar_dados_api():
         print(f"❌ Erro ao baixar dados: {e}")
         return None, None
 
-def corrigir_municipios(nome):
-    """Corrige o nome dos municípios com base em regras específicas"""
-    if pd.isna(nome):
-        return ''
-    
-    nome_lower = unidecode(str(nome).lower())
-    
-    if 'socorro' in nome_lower or 'socoro' in nome_lower:
-        return 'NOSSA SENHORA DO SOCORRO'
-    elif 'itaporanga' in nome_lower:
-        return "ITAPORANGA D'AJUDA"
-    elif 'barra' in nome_lower and 'coqu' in nome_lower:
-        return 'BARRA DOS COQUEIROS'
-    elif 'japarat' in nome_lower:
-        return 'JAPARATUBA'
-    elif 'sao cristovao' in nome_lower or 'cristovao' in nome_lower or 'sao cris' in nome_lower:
-        return 'SAO CRISTOVAO'
-    elif 'neopolois' in nome_lower or 'neopolis' in nome_lower:
-        return 'NEOPOLIS'
-    elif 'maynard' in nome_lower:
-        return 'GENERAL MAYNARD'
-    elif 'santa rosa' in nome_lower:
-        return 'SANTA ROSA DE LIMA'
-    elif 'aracau' in nome_lower or 'aracaiu' in nome_lower:
-        return 'ARACAJU'
-    elif 'das flores' in nome_lower:
-        return 'ILHA DAS FLORES'
-    elif 'senhora apar' in nome_lower:
-        return 'NOSSA SENHORA APARECIDA'
-    elif 'aquibada' in nome_lower:
-        return 'AQUIDABA'
-    elif 'porto' in nome_lower and 'folha' in nome_lower:
-        return 'PORTO DA FOLHA'
-    elif 'propria' in nome_lower:
-        return 'PROPRIA'
-    elif 'tobias' in nome_lower:
-        return 'TOBIAS BARRETO'
-    elif 'estancia' in nome_lower:
-        return 'ESTANCIA'
-    elif 'lagarto' in nome_lower:
-        return 'LAGARTO'
-    elif 'itabaiana' in nome_lower and 'inha' not in nome_lower:
-        return 'ITABAIANA'
-    elif 'simao' in nome_lower:
-        return 'SIMAO DIAS'
-    
-    return nome.upper()
-
 def filtrar_sergipe(df_processos, df_clientes, apenas_ativos=True):
     """Filtra dados de Sergipe"""
     print(f"🔍 Filtrando dados de Sergipe (apenas_ativos={apenas_ativos})...")
@@ -170,34 +125,12 @@ def filtrar_sergipe(df_processos, df_clientes, apenas_ativos=True):
     df = df_processos.merge(df_clientes, on='idCliente', how='left', suffixes=('', '_cliente'))
     print(f"📊 Total após merge: {len(df)} registros")
     
-    # Lista de cidades de Sergipe
-    cidades_sergipe = [
-        'AMPARO DE SAO FRANCISCO', 'AQUIDABA', 'ARACAJU', 'ARAUA',
-        'AREIA BRANCA', 'BARRA DOS COQUEIROS', 'BOQUIM', 'BREJO GRANDE',
-        'CAMPO DO BRITO', 'CANHOBA', 'CANINDE DE SAO FRANCISCO', 'CAPELA',
-        'CARIRA', 'CARMOPOLIS', 'CEDRO DE SAO JOAO', 'CRISTINAPOLIS', 'CUMBE',
-        'DIVINA PASTORA', 'ESTANCIA', 'FEIRA NOVA', 'FREI PAULO', 'GARARU',
-        'GENERAL MAYNARD', 'GRACHO CARDOSO', 'ILHA DAS FLORES', 'INDIAROBA',
-        'ITABAIANA', 'ITABAIANINHA', 'ITABI', "ITAPORANGA D'AJUDA", 'JAPARATUBA',
-        'JAPOATA', 'LAGARTO', 'LARANJEIRAS', 'MACAMBIRA', 'MALHADA DOS BOIS',
-        'MALHADOR', 'MARUIM', 'MOITA BONITA', 'MONTE ALEGRE DE SERGIPE',
-        'MURIBECA', 'NEOPOLIS', 'NOSSA SENHORA APARECIDA', 'NOSSA SENHORA DA GLORIA',
-        'NOSSA SENHORA DAS DORES', 'NOSSA SENHORA DE LOURDES', 'NOSSA SENHORA DO SOCORRO',
-        'PACATUBA', 'PEDRA MOLE', 'PEDRINHAS', 'PINHAO',
-        'PIRAMBU', 'POCO REDONDO', 'POCO VERDE', 'PORTO DA FOLHA',
-        'PROPRIA', 'RIACHAO DO DANTAS', 'RIACHUELO', 'RIBEIROPOLIS',
-        'ROSARIO DO CATETE', 'SALGADO', 'SANTA LUZIA DO ITANHY', 'SANTA ROSA DE LIMA',
-        'SANTANA DO SAO FRANCISCO', 'SANTO AMARO DAS BROTAS', 'SAO CRISTOVAO',
-        'SAO DOMINGOS', 'SAO FRANCISCO', 'SAO MIGUEL DO ALEIXO', 'SIMAO DIAS',
-        'SIRIRI', 'TELHA', 'TOBIAS BARRETO', 'TOMAR DO GERU', 'UMBAUBA'
-    ]
-    
     # Filtrar dados válidos
     df_clean = df.dropna(subset=['cidade']).copy()
     df_clean['cidade_upper'] = df_clean['cidade'].str.upper().str.strip()
     
-    # Aplicar correção de nomes
-    df_clean['cidade_upper_corrigido'] = df_clean['cidade_upper'].apply(corrigir_municipios)
+    # Aplicar correção de nomes (regras rodam só nos valores distintos)
+    df_clean['cidade_upper_corrigido'] = normalizar_municipios(df_clean['cidade_upper'])
     
     # Filtrar apenas processos ativos se solicitado
     if apenas_ativos:
@@ -205,7 +138,7 @@ def filtrar_sergipe(df_processos, df_clientes, apenas_ativos=True):
         print(f"📊 Após filtrar ativos: {len(df_clean)} registros")
     
     # Filtrar cidades de Sergipe
-    df_sergipe = df_clean[df_clean['cidade_upper_corrigido'].isin(cidades_sergipe)]
+    df_sergipe = df_clean[df_clean['cidade_upper_corrigido'].isin(MUNICIPIOS_SERGIPE)]
     df_sergipe['cidade_upper'] = df_sergipe['cidade_upper_corrigido']
     
     print(f"✅ Sergipe filtrado: {len(df_sergipe)} registros")
@@ -278,24 +211,8 @@ def gerar_mapa_municipios(df_sergipe, gdf_municipios, titulo, nome_arquivo):
     # Definir cores
     max_processos = gdf_com_processos['num_processos'].max()
     
-    # Cores para diferentes faixas
-    cores = []
-    for _, row in gdf_com_processos.iterrows():
-        num_proc = row['num_processos']
-        if num_proc == 0:
-            cores.append('#E8E8E8')  # Cinza claro para zero
-        elif num_proc <= 10:
-            cores.append('#FFF7BC')  # Amarelo claro
-        elif num_proc <= 50:
-            cores.append('#FEC44F')  # Amarelo
-        elif num_proc <= 100:
-            cores.append('#FE9929')  # Laranja
-        elif num_proc <= 500:
-            cores.append('#EC7014')  # Laranja escuro
-        elif num_proc <= 1000:
-            cores.append('#CC4C02')  # Vermelho escuro
-        else:
-            cores.append('#8C2D04')  # Marrom escuro
+    # Cores por faixa de processos
+    cores = classificar_cores_faixas(gdf_com_processos['num_processos']).tolist()
     
     # Plotar mapa
     gdf_com_processos.plot(
@@ -360,15 +277,7 @@ def gerar_mapa_municipios(df_sergipe, gdf_municipios, titulo, nome_arquivo):
     plt.figtext(0.5, 0.89, top_5_texto, ha='center', fontsize=12)
     
     # Legenda
-    legend_elements = [
-        mpatches.Patch(color='#E8E8E8', label='0 processos'),
-        mpatches.Patch(color='#FFF7BC', label='1-10 processos'),
-        mpatches.Patch(color='#FEC44F', label='11-50 processos'),
-        mpatches.Patch(color='#FE9929', label='51-100 processos'),
-        mpatches.Patch(color='#EC7014', label='101-500 processos'),
-        mpatches.Patch(color='#CC4C02', label='501-1000 processos'),
-        mpatches.Patch(color='#8C2D04', label='>1000 processos')
-    ]
+    legend_elements = [mpatches.Patch(color=cor, label=legenda) for _, cor, legenda in FAIXAS_PROCESSOS]
     
     ax.legend(handles=legend_elements, loc='lower left', bbox_to_anchor=(0, 0), fontsize=10)
     
@@ -14,9 +14,15 @@ project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 from data.data_loader import carregar_e_processar_dados, filtrar_sergipe
-from utils.text_processing import padronizar_reu, padronizar_competencia, categorizar_tipo_processo, normalizar_profissao
+from utils.text_processing import (
+    padronizar_reu, padronizar_competencia, categorizar_tipo_processo, normalizar_profissao,
+    limpar_texto_profissao, normalizar_por_valores_unicos
+)
 from utils.calculations import calcular_idade_processos, calcular_idade_clientes
-from components.filters import aplicar_filtros_temporais
+from components.filters import selecionar_filtros_temporais, obter_view_filtrada
+from data.cache_compartilhado import obter_versao_dados
+from data.juncao_espacial import versao_juncao_espacial
+from data.cubo_analitico import obter_fatia_compartilhada
 
 #Importar popover_visao_geral
 from pages_2.analises_2.popover_visao_geral.A_visao_geral import visao_geral_6
@@ -99,19 +105,22 @@ def preparar_dados_analise(df_sergipe):
         print(f"Erro ao calcular idade dos clientes: {e}")
         df_analise['idade_cliente_anos'] = None
 
+    # 2-5. Normalizações de texto: cada função roda uma vez por valor distinto
+    # (com cache entre reruns) e o resultado fica como coluna categórica
+
     # 2. Normalizar réus
     if 'reu' in df_analise.columns:
         try:
-            df_analise['reu_ajustado'] = df_analise['reu'].apply(
-                padronizar_reu)
+            df_analise['reu_ajustado'] = normalizar_por_valores_unicos(
+                df_analise['reu'], padronizar_reu)
         except:
             df_analise['reu_ajustado'] = df_analise['reu']
 
     # 3. Normalizar competência
     if 'competencia' in df_analise.columns:
         try:
-            df_analise['competencia_ajustada'] = df_analise['competencia'].apply(
-                padronizar_competencia)
+            df_analise['competencia_ajustada'] = normalizar_por_valores_unicos(
+                df_analise['competencia'], padronizar_competencia)
         except:
             df_analise['competencia_ajustada'] = df_analise['competencia']
 
@@ -119,14 +128,12 @@ def preparar_dados_analise(df_sergipe):
     if 'profissaoTexto' in df_analise.columns:
         try:
             # Primeiro aplicar normalização básica
-            df_analise['profissao_basica'] = df_analise['profissaoTexto'].apply(
-                lambda x: unidecode(str(x).upper().strip()) if pd.notna(
-                    x) and str(x).strip() != '' else 'NÃO INFORMADO'
-            )
+            df_analise['profissao_basica'] = normalizar_por_valores_unicos(
+                df_analise['profissaoTexto'], limpar_texto_profissao)
 
             # Depois aplicar normalização avançada
-            df_analise['profissao_normalizada'] = df_analise['profissao_basica'].apply(
-                normalizar_profissao)
+            df_analise['profissao_normalizada'] = normalizar_por_valores_unicos(
+                df_analise['profissao_basica'], normalizar_profissao)
 
         except Exception as e:
             print(f"Erro ao normalizar profissões: {e}")
@@ -135,14 +142,33 @@ def preparar_dados_analise(df_sergipe):
     # 5. Categorizar tipos
     if 'tipoProcesso' in df_analise.columns:
         try:
-            df_analise['tipoPrincipal'] = df_analise['tipoProcesso'].apply(
-                categorizar_tipo_processo)
+            df_analise['tipoPrincipal'] = normalizar_por_valores_unicos(
+                df_analise['tipoProcesso'], categorizar_tipo_processo)
         except:
             df_analise['tipoPrincipal'] = 'OUTROS'
 
     return df_analise
 
 
+@st.cache_resource(max_entries=2, show_spinner=False)
+def obter_dados_analise_compartilhados(versao_dados, filtro_ano_ativo, ano_filtro, _df):
+    """
+    Executa filtrar_sergipe, o filtro configurado e preparar_dados_analise uma
+    única vez por versão dos dados. O resultado é o mesmo objeto para todas as
+    sessões e deve ser tratado como somente leitura.
+    Retorna (total de processos em Sergipe, df_analise) — df_analise None se não sobrar nada.
+    """
+    df_sergipe = filtrar_sergipe(_df)
+    if df_sergipe is None or len(df_sergipe) == 0:
+        return 0, None
+
+    total_sergipe = len(df_sergipe)
+    df_sergipe = aplicar_filtro_configurado(df_sergipe)
+    if len(df_sergipe) == 0:
+        return total_sergipe, None
+
+    return total_sergipe, preparar_dados_analise(df_sergipe)
+
 
 def main():
     """Função principal"""
@@ -167,22 +193,24 @@ def main():
         st.error("Erro ao carregar dados das APIs")
         st.stop()
     
-    df_sergipe = filtrar_sergipe(df)
-    if df_sergipe is None or len(df_sergipe) == 0:
+    # Preparação feita uma vez por versão dos dados e compartilhada entre sessões
+    # (município/bairro vêm também do cache de endereços da junção espacial)
+    versao_dados = (obter_versao_dados(df), versao_juncao_espacial())
+    total_sergipe, df_analise = obter_dados_analise_compartilhados(
+        versao_dados, FILTRO_ANO_ATIVO, ANO_FILTRO, df)
+    
+    if total_sergipe == 0:
         st.warning("Nenhum processo encontrado em Sergipe")
         st.stop()
     
-    # APLICAR FILTRO CONFIGURADO
-    df_sergipe = aplicar_filtro_configurado(df_sergipe)
-    
-    if len(df_sergipe) == 0:
+    if df_analise is None:
         st.warning(f"Nenhum processo encontrado em Sergipe para {ANO_FILTRO}")
         st.stop()
-    
-    # Preparar dados para análise
-    df_analise = preparar_dados_analise(df_sergipe)
 
-    df_analise = aplicar_filtros_temporais(df_analise)
+    anos_selecionados, tipo_selecionado = selecionar_filtros_temporais(df_analise)
+    # Cubo pré-agregado (uma vez por versão) para os KPIs e a visão temporal
+    cubo = obter_fatia_compartilhada(versao_dados, df_analise, anos_selecionados, tipo_selecionado)
+    df_analise = obter_view_filtrada(df_analise, anos_selecionados, tipo_selecionado, versao_dados)
     
 
 
@@ -211,7 +239,7 @@ def main():
 
             st.markdown("<br>", unsafe_allow_html=True)
 
-            mostrar_kpis_principais(df_analise)
+            mostrar_kpis_principais(df_analise, cubo)
             
                 
     with co2:
@@ -228,7 +256,7 @@ def main():
             "></div>
             """, unsafe_allow_html=True)
               
-            render_graficos_temporal(df_analise)
+            render_graficos_temporal(df_analise, cubo)
 
     with co3:
         with st.popover("Visão clientes", use_container_width=True):
@@ -1,5 +1,7 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import geopandas as gpd
@@ -19,7 +21,16 @@ project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 from data.data_loader import carregar_e_processar_dados, filtrar_sergipe
-from utils.text_processing import categorizar_tipo_processo
+from utils.text_processing import categorizar_tipo_processo, normalizar_por_valores_unicos
+from data.geocodigo_bairros import (
+    geocodificar_bairros_local, versao_indice_bairros, obter_indice_bairros, chave_bairro_indice
+)
+from data.cache_compartilhado import obter_versao_dados, obter_artefato_compartilhado, obter_view_compartilhada
+from data.geometria_municipios import carregar_geometria_municipios, com_propriedades
+from data.tiles_vetoriais import tiles_vetoriais_disponiveis, registrar_contagens, url_tiles, ZOOMS_TILES
+from data.juncao_espacial import ORIGENS_PRECISAS, versao_juncao_espacial
+from utils.cores_mapa import classificar_cores_top, classificar_cores_faixas, COR_SEM_PROCESSOS, FAIXAS_PROCESSOS
+from utils.pontos_mapa import dispersar_pontos, adicionar_camada_densidade
 
 # =====================================
 # CONFIGURAÇÃO DE FILTRO DE ANO
@@ -34,6 +45,15 @@ ANO_FILTRO = None
 # FILTRO_ANO_ATIVO = True
 # ANO_FILTRO = 2025
 
+# =====================================
+# MODO DOS MAPAS
+# =====================================
+# True: municípios e bairros vêm como tiles vetoriais (MBTiles + servidor local)
+# e o navegador busca só os tiles visíveis. Exige URL_PUBLICA_TILES em
+# data/tiles_vetoriais.py; sem ela, sem mapbox-vector-tile ou sem o servidor,
+# os mapas voltam ao GeoJSON embutido.
+MODO_MAPA_VETORIAL = False
+
 # =====================================
 
 def aplicar_filtro_configurado(df):
@@ -52,6 +72,36 @@ def aplicar_filtro_configurado(df):
     
     return df
 
+def preparar_sergipe(df):
+    """filtrar_sergipe + filtro configurado + colunas de ano e tipo principal"""
+    df_sergipe = filtrar_sergipe(df)
+    if df_sergipe is None or len(df_sergipe) == 0:
+        return pd.DataFrame()
+    
+    df_sergipe = aplicar_filtro_configurado(df_sergipe)
+    if len(df_sergipe) == 0:
+        return df_sergipe
+    
+    if not (FILTRO_ANO_ATIVO and ANO_FILTRO) and 'data' in df_sergipe.columns:
+        try:
+            df_sergipe['data_convertida'] = pd.to_datetime(df_sergipe['data'], errors='coerce')
+            df_sergipe['ano'] = df_sergipe['data_convertida'].dt.year
+        except:
+            df_sergipe = df_sergipe.drop(columns=['data_convertida', 'ano'], errors='ignore')
+    
+    if 'tipoProcesso' in df_sergipe.columns:
+        df_sergipe['tipoPrincipal'] = normalizar_por_valores_unicos(df_sergipe['tipoProcesso'], categorizar_tipo_processo)
+    
+    return df_sergipe
+
+def obter_sergipe_preparado(versao_dados, df):
+    """
+    Executa preparar_sergipe uma única vez por versão dos dados (e configuração
+    de filtro); as sessões recebem uma cópia rasa da view compartilhada.
+    """
+    chave = ("visao_geografica", versao_dados, FILTRO_ANO_ATIVO, ANO_FILTRO)
+    return obter_view_compartilhada(chave, lambda: preparar_sergipe(df))
+
 def pagina_visao_geografica():
     """Página original com mapas geográficos"""
     
@@ -70,50 +120,32 @@ def pagina_visao_geografica():
         st.error("❌ Erro ao carregar dados das APIs")
         st.stop()
     
-    # Filtrar Sergipe
-    df_sergipe = filtrar_sergipe(df)
-    
-    if df_sergipe is None or len(df_sergipe) == 0:
-        st.warning("⚠️ Nenhum processo encontrado em Sergipe")
-        st.stop()
+    # Município/bairro vêm também do cache de endereços: a versão inclui a da junção espacial
+    versao_dados = (obter_versao_dados(df), versao_juncao_espacial())
     
-    # APLICAR FILTRO CONFIGURADO
-    df_sergipe = aplicar_filtro_configurado(df_sergipe)
+    # Sergipe já filtrado e preparado, compartilhado entre as sessões
+    df_sergipe = obter_sergipe_preparado(versao_dados, df)
     
     if len(df_sergipe) == 0:
-        st.warning(f"⚠️ Nenhum processo encontrado em Sergipe para {ANO_FILTRO}")
+        if FILTRO_ANO_ATIVO and ANO_FILTRO:
+            st.warning(f"⚠️ Nenhum processo encontrado em Sergipe para {ANO_FILTRO}")
+        else:
+            st.warning("⚠️ Nenhum processo encontrado em Sergipe")
         st.stop()
     
     # PREPARAR DADOS PARA FILTROS
-    # 1. Preparar coluna de ano (apenas se filtro não ativo)
-    if not (FILTRO_ANO_ATIVO and ANO_FILTRO):
-        if 'data' in df_sergipe.columns:
-            try:
-                df_sergipe['data_convertida'] = pd.to_datetime(df_sergipe['data'], errors='coerce')
-                df_sergipe['ano'] = df_sergipe['data_convertida'].dt.year
-                anos_validos = df_sergipe['ano'].dropna().astype(int)
-                
-                if len(anos_validos) > 0:
-                    min_ano = int(anos_validos.min())
-                    max_ano = int(anos_validos.max())
-                    tem_filtro_ano = True
-                else:
-                    tem_filtro_ano = False
-            except:
-                tem_filtro_ano = False
-        else:
-            tem_filtro_ano = False
-    else:
-        # Se filtro ativo, não preparar controles de ano
-        tem_filtro_ano = False
-    
-    # 2. Preparar coluna de tipo principal
-    if 'tipoProcesso' in df_sergipe.columns:
-        df_sergipe['tipoPrincipal'] = df_sergipe['tipoProcesso'].apply(categorizar_tipo_processo)
-        tipos_unicos = ['ACAO CIVEL', 'ACAO PREVIDENCIARIA', 'ACAO TRABALHISTA', 'OUTROS']
-        tem_filtro_tipo = True
-    else:
-        tem_filtro_tipo = False
+    # 1. Faixa de anos (apenas se filtro não ativo)
+    tem_filtro_ano = False
+    if not (FILTRO_ANO_ATIVO and ANO_FILTRO) and 'ano' in df_sergipe.columns:
+        anos_validos = df_sergipe['ano'].dropna().astype(int)
+        if len(anos_validos) > 0:
+            min_ano = int(anos_validos.min())
+            max_ano = int(anos_validos.max())
+            tem_filtro_ano = True
+    
+    # 2. Tipo principal
+    tem_filtro_tipo = 'tipoPrincipal' in df_sergipe.columns
+    tipos_unicos = ['ACAO CIVEL', 'ACAO PREVIDENCIARIA', 'ACAO TRABALHISTA', 'OUTROS']
     
     # CRIAR FILTROS - OCULTAR SE FILTRO DE ANO ATIVO
     if FILTRO_ANO_ATIVO and ANO_FILTRO:
@@ -241,6 +273,9 @@ def pagina_visao_geografica():
     
     filtros_str = " | ".join(filtros_texto) if filtros_texto else "Todos os dados"
     
+    # Mapas já renderizados para estes filtros e esta versão dos dados vêm do cache
+    chave_filtros = (versao_dados, FILTRO_ANO_ATIVO, ANO_FILTRO, tuple(anos_selecionados), tipo_selecionado)
+    
     # Layout com 3 colunas: Mapa Sergipe | Mapa Aracaju | KPIs
     col_sergipe, col_aracaju, col_kpis = st.columns([2, 2, 1])
     
@@ -249,15 +284,21 @@ def pagina_visao_geografica():
         st.caption(f"Filtros: {filtros_str}")
         
         with st.spinner("Gerando mapa de Sergipe..."):
-            mapa_sergipe = criar_mapa_folium_sergipe(df_sergipe_filtrado)
+            if MODO_MAPA_VETORIAL and tiles_vetoriais_disponiveis('municipios'):
+                # Contagens registradas a cada execução: o servidor pode ter descartado o conjunto
+                chave_tiles = registrar_contagens_sergipe(df_sergipe_filtrado)
+                html_sergipe = obter_html_mapa(
+                    ('sergipe_vetorial', chave_tiles),
+                    lambda: criar_mapa_vetorial_sergipe(chave_tiles)
+                )
+            else:
+                html_sergipe = obter_html_mapa(
+                    ('sergipe', chave_filtros, ZOOM_MAPA_SERGIPE),
+                    lambda: criar_mapa_folium_sergipe(df_sergipe_filtrado)
+                )
             
-            if mapa_sergipe is not None:
-                from streamlit_folium import st_folium
-                try:
-                    st_folium(mapa_sergipe, width=500, height=450)
-                except ImportError:
-                    from streamlit_folium import folium_static
-                    folium_static(mapa_sergipe, width=500, height=450)
+            if html_sergipe is not None:
+                components.html(html_sergipe, width=500, height=450)
             else:
                 st.error("❌ Erro no mapa de Sergipe")
     
@@ -266,13 +307,20 @@ def pagina_visao_geografica():
         st.caption(f"Filtros: {filtros_str}")
         
         with st.spinner("Gerando mapa de Aracaju..."):
-            mapa_aracaju = criar_mapa_aracaju_bairros(df_sergipe_filtrado)
+            if MODO_MAPA_VETORIAL and tiles_vetoriais_disponiveis('bairros'):
+                chave_tiles = registrar_contagens_aracaju(df_sergipe_filtrado)
+                html_aracaju = obter_html_mapa(
+                    ('aracaju_vetorial', chave_tiles),
+                    lambda: criar_mapa_vetorial_aracaju(chave_tiles)
+                ) if chave_tiles is not None else None
+            else:
+                html_aracaju = obter_html_mapa(
+                    ('aracaju', chave_filtros, versao_indice_bairros()),
+                    lambda: criar_mapa_aracaju_bairros(df_sergipe_filtrado)
+                )
             
-            if mapa_aracaju is not None:
-                try:
-                    st_folium(mapa_aracaju, width=500, height=450)
-                except ImportError:
-                    folium_static(mapa_aracaju, width=500, height=450)
+            if html_aracaju is not None:
+                components.html(html_aracaju, width=500, height=450)
             else:
                 st.error("❌ Erro no mapa de Aracaju")
     
@@ -365,16 +413,19 @@ def pagina_visao_geografica():
 # As funções de criação de mapas precisam ser implementadas
 # Você pode mover elas do seu dash.py original ou implementar aqui
 
-@st.cache_data(ttl=3600)
-def carregar_shapefile_sergipe():
-    """Carrega o shapefile de Sergipe"""
-    try:
-        from functions.geo import baixar_municipios_sergipe
-        gdf_municipios = baixar_municipios_sergipe()
-        return gdf_municipios
-    except Exception as e:
-        st.error(f"Erro ao carregar shapefile: {e}")
-        return None
+# Zoom fixo do mapa de Sergipe (define a geometria pré-simplificada usada)
+ZOOM_MAPA_SERGIPE = 8
+
+def obter_html_mapa(chave, criar_mapa):
+    """
+    HTML do mapa renderizado, guardado entre sessões por `chave` (filtros e
+    versão dos dados). Em cache, nem o merge nem o Folium são refeitos.
+    """
+    def renderizar():
+        mapa = criar_mapa()
+        return mapa.get_root().render() if mapa is not None else None
+    
+    return obter_artefato_compartilhado(chave, renderizar)
 
 def criar_mapa_folium_sergipe(df_sergipe):
     """
@@ -385,19 +436,17 @@ def criar_mapa_folium_sergipe(df_sergipe):
     contagem_cidades = df_sergipe['cidade_upper'].value_counts().reset_index()
     contagem_cidades.columns = ['cidade', 'num_processos']
     
-    # Carregar shapefile
-    gdf_municipios = carregar_shapefile_sergipe()
+    # Geometria simplificada (nome_upper e centroide já vêm calculados)
+    geojson_municipios = carregar_geometria_municipios(ZOOM_MAPA_SERGIPE)
     
-    if gdf_municipios is None:
+    if geojson_municipios is None:
         st.error("❌ Não foi possível carregar o shapefile de Sergipe")
         return None
     
-    # CORRIGIR: Preparar dados para merge aplicando unidecode
-    gdf_municipios['nome_upper'] = gdf_municipios['NM_MUN'].apply(
-        lambda x: unidecode(str(x).upper().strip()) if pd.notna(x) else ''
-    )    
+    municipios = pd.DataFrame([f['properties'] for f in geojson_municipios['features']])
+    
     # Merge
-    gdf_com_processos = gdf_municipios.merge(
+    gdf_com_processos = municipios.merge(
         contagem_cidades,
         left_on='nome_upper',
         right_on='cidade',
@@ -406,65 +455,14 @@ def criar_mapa_folium_sergipe(df_sergipe):
         
     gdf_com_processos['num_processos'] = gdf_com_processos['num_processos'].fillna(0)
     
-    def obter_cor_municipio(row):
-        num_proc = row['num_processos']
-        nome = row['nome_upper']
-        
-        # Identificar top 5 municípios
-        top_5_nomes = gdf_com_processos.nlargest(5, 'num_processos')['nome_upper'].tolist()
-        
-        if nome in top_5_nomes:
-            # Top 5 com tons de azul escuro
-            if nome == 'ARACAJU':
-                return '#000080'  # Navy (azul muito escuro)
-            elif nome == 'NOSSA SENHORA DO SOCORRO':
-                return '#191970'  # MidnightBlue (azul escuro)
-            elif nome == 'SAO CRISTOVAO':
-                return '#483D8B'  # DarkSlateBlue (azul escuro mais claro)
-            else:
-                # Para o 4º e 5º colocados
-                posicao = top_5_nomes.index(nome)
-                if posicao == 3:
-                    return '#4169E1'  # RoyalBlue
-                else:  # posicao == 4
-                    return '#6495ED'  # CornflowerBlue
-        elif num_proc == 0:
-            return '#D3D3D3'  # Cinza claro para zero
-        else:
-            # Degradê verde para outros municípios (fora do top 5)
-            outros_municipios = gdf_com_processos[
-                (~gdf_com_processos['nome_upper'].isin(top_5_nomes)) &
-                (gdf_com_processos['num_processos'] > 0)
-            ]
-            
-            if len(outros_municipios) > 0:
-                max_outros = outros_municipios['num_processos'].max()
-                if max_outros > 0:
-                    intensidade = num_proc / max_outros
-                    if intensidade <= 0.2:
-                        return '#E6FFE6'  # Verde muito claro
-                    elif intensidade <= 0.4:
-                        return '#B3FFB3'  # Verde claro
-                    elif intensidade <= 0.6:
-                        return '#80FF80'  # Verde médio claro
-                    elif intensidade <= 0.8:
-                        return '#4DFF4D'  # Verde médio
-                    else:
-                        return '#00CC00'  # Verde escuro
-                else:
-                    return '#E6FFE6'
-            else:
-                return '#E6FFE6'
-    
-    # Aplicar as cores
-    gdf_com_processos['color'] = gdf_com_processos.apply(obter_cor_municipio, axis=1)
+    # Cores (top 5 em azul, degradê verde nos demais) e posição no top, numa só passada
+    classificacao = classificar_cores_top(gdf_com_processos['num_processos'], gdf_com_processos['nome_upper'])
+    gdf_com_processos['color'] = classificacao['color']
+    gdf_com_processos['posicao_top'] = classificacao['posicao_top']
     
     # Modificar para pegar TODOS os municípios com processos > 0
     municipios_com_processos = gdf_com_processos[gdf_com_processos['num_processos'] > 0]
     
-    # Calcular bounds de Sergipe para limitar o mapa
-    bounds = gdf_com_processos.total_bounds  # [minx, miny, maxx, maxy]
-    
     # Criar o mapa base com configurações restritivas
     m = folium.Map(
         location=[-10.5, -37.4], 
@@ -490,9 +488,11 @@ def criar_mapa_folium_sergipe(df_sergipe):
     # Aplicar os bounds ao mapa
     m.fit_bounds(sergipe_bounds)
     
-    # Converter para GeoJSON
-    geojson_str = gdf_com_processos.to_json()
-    geojson_data = json.loads(geojson_str)
+    # GeoJSON compartilhado + cor e contagem desta renderização
+    geojson_data = com_propriedades(
+        geojson_municipios,
+        gdf_com_processos[['num_processos', 'color']].to_dict('records')
+    )
     
     # Função de estilo CORRIGIDA
     def style_function(feature):
@@ -526,13 +526,9 @@ def criar_mapa_folium_sergipe(df_sergipe):
     
     # Adicionar números para TODOS os municípios com processos > 0
     for _, row in municipios_com_processos.iterrows():
-        if row['geometry'] is not None:
-            centroid = row['geometry'].centroid
-            
-            # Identificar top 5 para cor do texto
-            top_5_nomes = gdf_com_processos.nlargest(5, 'num_processos')['nome_upper'].tolist()
-            
-            if row['nome_upper'] in top_5_nomes:
+        if pd.notna(row['centroide_lat']):
+            # Top 5 com texto branco
+            if row['posicao_top'] >= 0:
                 cor_texto = 'white'  # Texto branco para top 5
                 if row['nome_upper'] == 'ARACAJU':
                     tamanho_fonte = 16
@@ -549,7 +545,7 @@ def criar_mapa_folium_sergipe(df_sergipe):
                 peso_fonte = 'bold'
             
             folium.Marker(
-                [centroid.y, centroid.x],
+                [row['centroide_lat'], row['centroide_lon']],
                 icon=folium.DivIcon(
                     html=f"""
                     <div style="
@@ -633,10 +629,32 @@ def criar_mapa_folium_sergipe(df_sergipe):
     
     return m
 
-@st.cache_data(persist=True, ttl=86400)  # Cache por 24 horas
+def coordenadas_processos_aracaju(df_aracaju):
+    """
+    Um ponto por processo: o do endereço quando é preciso, senão o do bairro
+    espalhado num disco em volta dele. Retorna arrays (lat, lon) só dos resolvidos.
+    """
+    ids = df_aracaju['idProcesso'] if 'idProcesso' in df_aracaju.columns else df_aracaju.index.to_series()
+    
+    # Coordenada do bairro, resolvida uma vez por bairro distinto
+    bairros = df_aracaju.groupby('bairro').agg(cep_ref=('cep', 'first'), num_processos=('bairro', 'size')).reset_index()
+    bairros = geocodificar_bairros_local(bairros, coluna_contagem='num_processos').set_index('bairro')
+    lat_bairro = df_aracaju['bairro'].map(bairros['lat']).to_numpy(dtype=float)
+    lon_bairro = df_aracaju['bairro'].map(bairros['lon']).to_numpy(dtype=float)
+    lat, lon = dispersar_pontos(lat_bairro, lon_bairro, ids.to_numpy())
+    
+    if 'origem_coord' in df_aracaju.columns:
+        precisos = df_aracaju['origem_coord'].isin(ORIGENS_PRECISAS).to_numpy()
+        lat[precisos] = df_aracaju['lat'].to_numpy(dtype=float)[precisos]
+        lon[precisos] = df_aracaju['lon'].to_numpy(dtype=float)[precisos]
+    
+    resolvidos = ~np.isnan(lat)
+    return lat[resolvidos], lon[resolvidos]
+
 def criar_mapa_aracaju_bairros(df_sergipe):
     """
-    Versão original que funcionava: top 20 com bolhas, demais com losangos pequenos
+    Top 50 bairros: os 10 maiores com bolhas, os demais com losangos pequenos,
+    sobre a camada de densidade com um ponto por processo
     """
     
     # Filtrar apenas processos de Aracaju
@@ -658,59 +676,20 @@ def criar_mapa_aracaju_bairros(df_sergipe):
     contagem_bairros.columns = ['bairro', 'num_processos', 'cep_ref']
     contagem_bairros = contagem_bairros[contagem_bairros['cep_ref'].notna()]
     
-    # Pegar apenas os top 20 bairros para otimizar
-    contagem_bairros = contagem_bairros.nlargest(50, 'num_processos')  # Top 50 total
+    # Marcadores só para os 50 maiores bairros: o restante aparece na camada de densidade
+    contagem_bairros = contagem_bairros.nlargest(50, 'num_processos')
+    
+    # Coordenadas do índice local (sem chamadas de rede durante o render);
+    # bairros frequentes não resolvidos vão para a fila de atualização em segundo plano
+    contagem_bairros = geocodificar_bairros_local(contagem_bairros, coluna_contagem='num_processos')
     
     # Separar top 10 e demais
     top_10 = contagem_bairros.nlargest(10, 'num_processos')
     demais_bairros = contagem_bairros[~contagem_bairros['bairro'].isin(top_10['bairro'])]
     
-    
-    # Geocodificar bairros (versão original)
-    from geopy.geocoders import Nominatim
-    import time
-    
-    geolocator = Nominatim(user_agent="aracaju_bairros")
-    coordenadas_top10 = []
-    coordenadas_demais = []
-    
-    # Processar top 10
-    with st.spinner(f"Geocodificando top 10 bairros..."):
-        for _, row in top_10.iterrows():
-            try:
-                endereco = f"{row['bairro']}, Aracaju, Sergipe, Brasil"
-                location = geolocator.geocode(endereco, timeout=5)
-                
-                if location:
-                    coordenadas_top10.append({
-                        'bairro': row['bairro'],
-                        'num_processos': row['num_processos'],
-                        'lat': location.latitude,
-                        'lon': location.longitude
-                    })
-                time.sleep(0.5)
-                
-            except Exception as e:
-                continue
-    
-    # Processar demais bairros
-    with st.spinner(f"Geocodificando demais bairros..."):
-        for _, row in demais_bairros.iterrows():
-            try:
-                endereco = f"{row['bairro']}, Aracaju, Sergipe, Brasil"
-                location = geolocator.geocode(endereco, timeout=5)
-                
-                if location:
-                    coordenadas_demais.append({
-                        'bairro': row['bairro'],
-                        'num_processos': row['num_processos'],
-                        'lat': location.latitude,
-                        'lon': location.longitude
-                    })
-                time.sleep(0.5)
-                
-            except Exception as e:
-                continue
+    colunas_coord = ['bairro', 'num_processos', 'lat', 'lon']
+    coordenadas_top10 = top_10.dropna(subset=['lat'])[colunas_coord].to_dict('records')
+    coordenadas_demais = demais_bairros.dropna(subset=['lat'])[colunas_coord].to_dict('records')
     
     # Combinar todas as coordenadas
     todas_coordenadas = coordenadas_top10 + coordenadas_demais
@@ -831,7 +810,7 @@ def criar_mapa_aracaju_bairros(df_sergipe):
     
     legenda_html = f'''
     <div style="position: fixed; 
-                top: 10px; left: 10px; width: 180px; height: 140px; 
+                top: 10px; left: 10px; width: 180px; height: 152px; 
                 background-color: rgba(255, 255, 255, 0.9); border:2px solid grey; z-index:9999; 
                 font-size:10px; padding: 6px; border-radius: 5px;">
     <h6 style="margin-top:0;">Aracaju por Bairro</h6>
@@ -841,8 +820,161 @@ def criar_mapa_aracaju_bairros(df_sergipe):
     <p style="margin: 1px 0;">🗺️ {len(coordenadas_top10)} bolhas + {len(coordenadas_demais)} losangos</p>
     <p style="margin: 1px 0; font-size: 8px;">🔵 Top 10: bolhas + números</p>
     <p style="margin: 1px 0; font-size: 8px;">🔺 Demais: losangos pequenos</p>
+    <p style="margin: 1px 0; font-size: 8px;">🔥 Camadas: um ponto por processo</p>
     </div>
     '''
     m.get_root().html.add_child(folium.Element(legenda_html))
     
-    return m
\ No newline at end of file
+    # Densidade: um ponto por processo ativo, desenhado no navegador
+    lat_processos, lon_processos = coordenadas_processos_aracaju(df_aracaju)
+    adicionar_camada_densidade(m, lat_processos, lon_processos)
+    
+    return m
+
+# =====================================
+# MAPAS EM TILES VETORIAIS
+# =====================================
+
+def registrar_contagens_sergipe(df_sergipe):
+    """Contagem e cor por município anexadas aos tiles; retorna a chave do conjunto"""
+    geojson_municipios = carregar_geometria_municipios(ZOOM_MAPA_SERGIPE)
+    nomes = [f['properties']['nome_upper'] for f in geojson_municipios['features']]
+    
+    num_processos = df_sergipe['cidade_upper'].value_counts().reindex(nomes).fillna(0)
+    cores = classificar_cores_top(num_processos, nomes)['color']
+    
+    return registrar_contagens(
+        'municipios',
+        {nome: {'num_processos': int(n), 'color': cor} for nome, n, cor in zip(nomes, num_processos, cores)},
+        padrao={'num_processos': 0, 'color': COR_SEM_PROCESSOS}
+    )
+
+def registrar_contagens_aracaju(df_sergipe):
+    """Contagem e cor por bairro (chave do índice local) anexadas aos tiles"""
+    df_aracaju = df_sergipe[df_sergipe['cidade_upper'] == 'ARACAJU']
+    if len(df_aracaju) == 0 or 'bairro' not in df_aracaju.columns:
+        return None
+    
+    indice = obter_indice_bairros()
+    contagem = df_aracaju['bairro'].value_counts()
+    chave_por_nome = {bairro: chave_bairro_indice(bairro, indice) for bairro in contagem.index}
+    
+    # Bairro do ponto (junção espacial) quando houver, senão o do nome digitado;
+    # grafias diferentes do mesmo bairro somam no mesmo ponto
+    chaves = df_aracaju['bairro'].map(chave_por_nome).fillna('')
+    if 'bairro_espacial' in df_aracaju.columns:
+        chaves = df_aracaju['bairro_espacial'].where(df_aracaju['bairro_espacial'] != '', chaves)
+    por_chave = chaves[chaves != ''].value_counts()
+    cores = classificar_cores_faixas(por_chave)
+    
+    return registrar_contagens(
+        'bairros',
+        {chave: {'num_processos': int(n), 'color': cor} for chave, n, cor in zip(por_chave.index, por_chave, cores)},
+        padrao={'num_processos': 0}
+    )
+
+def adicionar_camada_vetorial(m, camada, chave_tiles, estilo_js, campo_nome):
+    """Camada VectorGrid com os tiles da camada e popup com nome e processos"""
+    opcoes = f"""{{
+        "maxNativeZoom": {max(ZOOMS_TILES[camada])},
+        "interactive": true,
+        "vectorTileLayerStyles": {{ "{camada}": {estilo_js} }}
+    }}"""
+    camada_vetorial = plugins.VectorGridProtobuf(url_tiles(camada, chave_tiles), camada, opcoes)
+    camada_vetorial.add_to(m)
+    
+    # Roda depois dos scripts do Folium (a camada já existe)
+    popup_js = f"""
+    <script>
+    document.addEventListener('DOMContentLoaded', function() {{
+        var camada = window['{camada_vetorial.get_name()}'];
+        var map = window['{m.get_name()}'];
+        camada.on('click', function(e) {{
+            var p = e.layer.properties;
+            L.popup()
+                .setLatLng(e.latlng)
+                .setContent('<b>' + p['{campo_nome}'] + '</b><br>Processos: ' + (p.num_processos || 0))
+                .openOn(map);
+        }});
+    }});
+    </script>
+    """
+    m.get_root().html.add_child(folium.Element(popup_js))
+    return camada_vetorial
+
+def criar_mapa_vetorial_sergipe(chave_tiles):
+    """
+    Mapa de Sergipe com os municípios em tiles vetoriais: a contagem e a cor
+    chegam como propriedades das feições, anexadas pelo servidor de tiles
+    """
+    m = folium.Map(
+        location=[-10.5, -37.4],
+        tiles='CartoDB positron',
+        zoom_start=ZOOM_MAPA_SERGIPE,
+        min_zoom=7,
+        max_zoom=12,
+        max_bounds=True,
+        zoom_control=True,
+        scrollWheelZoom=False
+    )
+    m.fit_bounds([[-11.6, -38.3], [-9.4, -36.8]])
+    
+    estilo_js = """function(p) {
+        return {fill: true, fillColor: p.color || '#CCCCCC', fillOpacity: 0.8, color: 'gray', weight: 0.5};
+    }"""
+    adicionar_camada_vetorial(m, 'municipios', chave_tiles, estilo_js, 'NM_MUN')
+    
+    legenda_html = '''
+    <div style="position: fixed; 
+                top: 10px; left: 10px; width: 160px; 
+                background-color: rgba(255, 255, 255, 0.6); border:2px solid grey; z-index:9999; 
+                font-size:11px; padding: 8px; border-radius: 5px;">
+    <h6 style="margin-top:0;">Sergipe por Município</h6>
+    <p style="margin: 1px 0; font-size: 9px;">🔵 Top 5: azul</p>
+    <p style="margin: 1px 0; font-size: 9px;">🟢 Demais: verde</p>
+    <p style="margin: 1px 0; font-size: 9px;">Clique no município para ver os processos</p>
+    </div>
+    '''
+    m.get_root().html.add_child(folium.Element(legenda_html))
+    
+    return m
+
+def criar_mapa_vetorial_aracaju(chave_tiles):
+    """Mapa de Aracaju com um ponto por bairro em tiles vetoriais (raio e cor pela contagem)"""
+    m = folium.Map(
+        location=[-10.93, -37.07],
+        tiles='CartoDB positron',
+        zoom_start=12,
+        min_zoom=11,
+        max_zoom=16,
+        zoom_control=True,
+        scrollWheelZoom=False
+    )
+    
+    # Bairros sem processos nestes filtros ficam invisíveis
+    estilo_js = """function(p) {
+        var n = p.num_processos || 0;
+        if (n === 0) { return {radius: 0, opacity: 0, fillOpacity: 0}; }
+        return {
+            radius: Math.max(4, Math.min(20, 3 + Math.sqrt(n) * 2)),
+            fill: true, fillColor: p.color, fillOpacity: 0.8, color: '#8B0000', weight: 1
+        };
+    }"""
+    adicionar_camada_vetorial(m, 'bairros', chave_tiles, estilo_js, 'chave')
+    
+    faixas_html = "".join(
+        f"<p style='margin: 1px 0; font-size: 9px;'><span style='color: {cor};'>●</span> {legenda}</p>"
+        for _, cor, legenda in FAIXAS_PROCESSOS[1:]
+    )
+    legenda_html = f'''
+    <div style="position: fixed; 
+                top: 10px; left: 10px; width: 150px; 
+                background-color: rgba(255, 255, 255, 0.9); border:2px solid grey; z-index:9999; 
+                font-size:10px; padding: 6px; border-radius: 5px;">
+    <h6 style="margin-top:0;">Aracaju por Bairro</h6>
+    {faixas_html}
+    </div>
+    '''
+    m.get_root().html.add_child(folium.Element(legenda_html))
+    
+    return m
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils.text_processing import padronizar_reu, padronizar_competencia
+from utils.text_processing import padronizar_reu, padronizar_competencia, normalizar_por_valores_unicos
 
 
 def analise_reus_procedencia(df_analise):
@@ -18,10 +18,12 @@ def analise_reus_procedencia(df_analise):
     top_reus_full = pd.Series(dtype=int)
 
     if 'reu' in df_analise.columns:
-        try:
-            df_analise['reu_ajustado'] = df_analise['reu'].apply(padronizar_reu)
-        except Exception:
-            df_analise['reu_ajustado'] = df_analise['reu']
+        # preparar_dados_analise já entrega a coluna normalizada
+        if 'reu_ajustado' not in df_analise.columns:
+            try:
+                df_analise['reu_ajustado'] = normalizar_por_valores_unicos(df_analise['reu'], padronizar_reu)
+            except Exception:
+                df_analise['reu_ajustado'] = df_analise['reu']
 
         if 'reu_ajustado' in df_analise.columns and len(df_analise) > 0:
             total_reus_unicos = int(df_analise['reu_ajustado'].nunique())
@@ -102,7 +104,8 @@ def analise_reus_procedencia(df_analise):
         if 'tipoPrincipal' in df_analise.columns and 'reu_ajustado' in df_analise.columns:
             df_civel = df_analise[df_analise['tipoPrincipal'] == 'ACAO CIVEL']
             if len(df_civel) > 0:
-                top_reus_civel = df_civel['reu_ajustado'].value_counts().head(5)
+                # coluna categórica: descartar réus sem processos cíveis
+                top_reus_civel = df_civel['reu_ajustado'].value_counts().loc[lambda c: c > 0].head(5)
 
                 # parâmetros para escala
                 valor_max_civel = int(top_reus_civel.iloc[0]) if len(top_reus_civel) > 0 else 0
@@ -149,11 +152,12 @@ def competencia(df_analise):
         st.warning("Coluna 'competencia' não encontrada")
         return
 
-    # padronizar se possível
-    try:
-        df_analise['competencia_ajustada'] = df_analise['competencia'].apply(padronizar_competencia)
-    except Exception:
-        df_analise['competencia_ajustada'] = df_analise['competencia']
+    # padronizar se possível (preparar_dados_analise já entrega a coluna normalizada)
+    if 'competencia_ajustada' not in df_analise.columns:
+        try:
+            df_analise['competencia_ajustada'] = normalizar_por_valores_unicos(df_analise['competencia'], padronizar_competencia)
+        except Exception:
+            df_analise['competencia_ajustada'] = df_analise['competencia']
 
     top_comp = df_analise['competencia_ajustada'].value_counts().head(10)
     if top_comp.empty:
@@ -83,7 +83,8 @@ def analise_profissoes(df_analise):
                             </div>
                         """, unsafe_allow_html=True)
 
-                        top_masc = masculino['profissao_normalizada'].value_counts().head(5)
+                        # coluna categórica: descartar profissões sem ocorrência no grupo
+                        top_masc = masculino['profissao_normalizada'].value_counts().loc[lambda c: c > 0].head(5)
                         
                         # Criar DataFrame para tabela
                         tabela_masc = []
@@ -139,7 +140,8 @@ def analise_profissoes(df_analise):
                             </div>
                         """, unsafe_allow_html=True)
 
-                        top_fem = feminino['profissao_normalizada'].value_counts().head(5)
+                        # coluna categórica: descartar profissões sem ocorrência no grupo
+                        top_fem = feminino['profissao_normalizada'].value_counts().loc[lambda c: c > 0].head(5)
                         
                         # Criar DataFrame para tabela
                         tabela_fem = []
@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
 
-def mostrar_kpis_principais(df_analise):
-    """Mostra KPIs principais com cards customizados"""
+from data.cubo_analitico import calcular_kpis_cubo
+
+def mostrar_kpis_principais(df_analise, cubo=None):
+    """Mostra KPIs principais com cards customizados (do cubo analítico, se fornecido)"""
     # APLICAR FILTRO AQUI TAMBÉM
 
     # CSS para os cards (fonte reduzida)
@@ -42,9 +44,21 @@ def mostrar_kpis_principais(df_analise):
     # st.markdown("---")
 
     # Calcular valores dos KPIs
+    if cubo is not None:
+        # Pré-agregado: somas/contagens da fatia do cubo
+        kpis = calcular_kpis_cubo(cubo)
+        idade_media_processos = kpis['idade_media_processos']
+        idade_media_clientes = kpis['idade_media_clientes']
+        total_processos_periodo = kpis['total_processos']
+        com_prospector = kpis['com_prospector']
+    else:
+        idade_media_processos = df_analise['idade_processo_anos'].mean() if 'idade_processo_anos' in df_analise.columns else None
+        idade_media_clientes = df_analise['idade_cliente_anos'].mean() if 'idade_cliente_anos' in df_analise.columns else None
+        total_processos_periodo = len(df_analise)
+        com_prospector = df_analise['prospector'].notna().sum() if 'prospector' in df_analise.columns else None
+
     # KPI 1: Idade Média Processos
     if 'idade_processo_anos' in df_analise.columns:
-        idade_media_processos = df_analise['idade_processo_anos'].mean()
         kpi1_value = f"{idade_media_processos:.1f} anos" if pd.notna(
             idade_media_processos) else "N/A"
     else:
@@ -52,21 +66,18 @@ def mostrar_kpis_principais(df_analise):
 
     # KPI 2: Idade Média Clientes
     if 'idade_cliente_anos' in df_analise.columns:
-        idade_media_clientes = df_analise['idade_cliente_anos'].mean()
         kpi2_value = f"{idade_media_clientes:.1f} anos" if pd.notna(
             idade_media_clientes) else "N/A"
     else:
         kpi2_value = "N/A"
 
     # KPI 3: Processos no Período
-    total_processos_periodo = len(df_analise)
     kpi3_value = f"{total_processos_periodo:,}"
 
     # KPI 4: % com Prospector
     if 'prospector' in df_analise.columns:
-        com_prospector = df_analise['prospector'].notna().sum()
         percentual_prospector = (
-            com_prospector / len(df_analise) * 100) if len(df_analise) > 0 else 0
+            com_prospector / total_processos_periodo * 100) if total_processos_periodo > 0 else 0
         kpi4_value = f"{percentual_prospector:.1f}%"
     else:
         kpi4_value = "N/A"
@@ -2,40 +2,33 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
-def render_4_cards_temporal(df_analise):
+from data.cubo_analitico import contar_processos_por_dia
+
+def render_4_cards_temporal(df_analise, cubo=None):
     """
-    Renderiza 4 KPIs horizontais (azul-escuro) calculando tudo internamente a partir de df_analise.
+    Renderiza 4 KPIs horizontais (azul-escuro) a partir das contagens por dia
+    (do cubo analítico, se fornecido, ou de df_analise).
     """
-    if df_analise is None:
+    if df_analise is None and cubo is None:
         st.warning("Dados não disponíveis para os KPIs temporais")
         return
 
-    df = df_analise.copy()
-
-    # garantir coluna de data
-    if 'data_convertida' not in df.columns and 'data' in df.columns:
-        df['data_convertida'] = pd.to_datetime(df['data'], errors='coerce')
-    else:
-        df['data_convertida'] = pd.to_datetime(df.get('data_convertida'), errors='coerce')
-
-    df = df.dropna(subset=['data_convertida'])
-    if df.empty:
+    por_dia = contar_processos_por_dia(df_analise, cubo)
+    if por_dia.empty:
         st.warning("Sem datas válidas para calcular KPIs temporais")
         return
 
     hoje = pd.Timestamp.now()
     doze_meses_atras = hoje - pd.DateOffset(months=12)
-    df_12_meses = df[df['data_convertida'] >= doze_meses_atras].copy()
+    por_dia_12_meses = por_dia[por_dia.index >= doze_meses_atras]
 
-    if df_12_meses.empty:
+    if por_dia_12_meses.empty:
         st.warning("Nenhum processo nos últimos 12 meses")
         return
 
     # métricas principais
-    total_12_meses = len(df_12_meses)
-    df_12_meses['mes_ano'] = df_12_meses['data_convertida'].dt.to_period('M')
-    processos_por_mes = df_12_meses.groupby('mes_ano').size().reset_index(name='quantidade')
-    processos_por_mes['mes_ano_str'] = processos_por_mes['mes_ano'].astype(str)
+    total_12_meses = int(por_dia_12_meses.sum())
+    processos_por_mes = _processos_por_mes(por_dia_12_meses)
     media_mensal_12m = processos_por_mes['quantidade'].mean() if len(processos_por_mes) > 0 else 0
 
     if len(processos_por_mes) > 0:
@@ -46,11 +39,10 @@ def render_4_cards_temporal(df_analise):
         mes_max = None
 
     # dias úteis nos últimos 12 meses -> média por dia útil
-    df_12_meses['dia_semana'] = df_12_meses['data_convertida'].dt.dayofweek
-    df_dias_uteis = df_12_meses[df_12_meses['dia_semana'].between(0, 4)]
-    if len(df_dias_uteis) > 0:
-        weeks_count = df_dias_uteis['data_convertida'].dt.to_period('W').nunique()
-        media_dia_util = len(df_dias_uteis) / max(weeks_count * 5, 1)
+    dias_uteis = por_dia_12_meses[por_dia_12_meses.index.dayofweek < 5]
+    if dias_uteis.sum() > 0:
+        weeks_count = dias_uteis.index.to_period('W').nunique()
+        media_dia_util = dias_uteis.sum() / max(weeks_count * 5, 1)
     else:
         media_dia_util = None
 
@@ -117,22 +109,47 @@ def render_4_cards_temporal(df_analise):
                 """, unsafe_allow_html=True)
 
 
-def render_graficos_temporal(df):
+def _processos_por_mes(por_dia):
+    """Agrupa a série dia -> contagem por mês (colunas mes_ano, quantidade, mes_ano_str)"""
+    processos_por_mes = por_dia.groupby(por_dia.index.to_period('M')).sum().rename_axis('mes_ano').reset_index(name='quantidade')
+    processos_por_mes['mes_ano_str'] = processos_por_mes['mes_ano'].astype(str)
+    return processos_por_mes
+
+def _dias_uteis_mes_corrente(por_dia, hoje):
+    """Contagens por dia útil do mês corrente (colunas data_only, processos)"""
+    indice = por_dia.index
+    mascara = (indice.month == hoje.month) & (indice.year == hoje.year) & (indice.dayofweek < 5)
+    return _tabela_por_dia(por_dia[mascara])
+
+def _tabela_por_dia(por_dia):
+    tabela = por_dia.rename_axis('data_only').reset_index(name='processos')
+    tabela['data_only'] = tabela['data_only'].dt.date
+    return tabela
+
+def _medias_por_dia_semana(processos_por_dia):
+    """Média de processos por dia útil da semana (Seg..Sex)"""
+    processos_por_dia = processos_por_dia.copy()
+    processos_por_dia['dia_semana'] = pd.to_datetime(processos_por_dia['data_only']).dt.dayofweek
+    medias = processos_por_dia.groupby('dia_semana')['processos'].mean().reindex([0,1,2,3,4], fill_value=0)
+    return [medias.get(i, 0) for i in range(5)]
+
+
+def render_graficos_temporal(df, cubo=None):
     """
-    Renderiza os dois gráficos (um abaixo do outro) usando df com 'data_convertida' datetime.
-    Recebe df já validado/normalizado.
+    Renderiza os dois gráficos (um abaixo do outro) a partir das contagens por dia
+    (do cubo analítico, se fornecido, ou de df com 'data_convertida' datetime).
     """
-    if df is None:
+    if df is None and cubo is None:
         st.warning("Dados não fornecidos para os gráficos temporais.")
         return
 
+    por_dia = contar_processos_por_dia(df, cubo)
+
     hoje = pd.Timestamp.now()
     # preparar métricas de 12 meses necessárias para o gráfico mensal
     doze_meses_atras = hoje - pd.DateOffset(months=12)
-    df_12_meses = df[df['data_convertida'] >= doze_meses_atras].copy()
-    df_12_meses['mes_ano'] = df_12_meses['data_convertida'].dt.to_period('M')
-    processos_por_mes = df_12_meses.groupby('mes_ano').size().reset_index(name='quantidade')
-    processos_por_mes['mes_ano_str'] = processos_por_mes['mes_ano'].astype(str)
+    por_dia_12_meses = por_dia[por_dia.index >= doze_meses_atras]
+    processos_por_mes = _processos_por_mes(por_dia_12_meses)
     media_mensal_12m = processos_por_mes['quantidade'].mean() if len(processos_por_mes) > 0 else 0
     max_mes = int(processos_por_mes['quantidade'].max()) if len(processos_por_mes) > 0 else None
 
@@ -142,28 +159,17 @@ def render_graficos_temporal(df):
     if tipo_analise == 'Nº de processos':
             # um abaixo do outro (sem duplicações)
             # --- Nº de processos por dia no mês corrente (somente dias úteis) ---
-            mes_atual = hoje.month
-            ano_atual = hoje.year
-            df_mes_corrente = df[
-                (df['data_convertida'].dt.month == mes_atual) &
-                (df['data_convertida'].dt.year == ano_atual)
-            ].copy()
-
-            df_mes_corrente['dia_semana'] = df_mes_corrente['data_convertida'].dt.dayofweek
-            df_mes_corrente_uteis = df_mes_corrente[df_mes_corrente['dia_semana'].between(0, 4)]
+            processos_por_dia_mes = _dias_uteis_mes_corrente(por_dia, hoje)
 
-            render_4_cards_temporal(df)
+            render_4_cards_temporal(df, cubo)
             tab1, tab2 = st.tabs(['último mes', 'últimos 12 meses'])
 
 
             with tab1:
                     st.markdown("**Nº de processos por dia no mês corrente (somente dias úteis)**")
-                    if df_mes_corrente_uteis.empty:
+                    if processos_por_dia_mes.empty:
                         st.info("Nenhum processo no mês corrente (dias úteis).")
                     else:
-                        df_mes_corrente_uteis['data_only'] = df_mes_corrente_uteis['data_convertida'].dt.date
-                        processos_por_dia_mes = df_mes_corrente_uteis.groupby('data_only').size().reset_index(name='processos')
-                        processos_por_dia_mes = processos_por_dia_mes.sort_values('data_only')
                         processos_por_dia_mes['dia_label'] = processos_por_dia_mes['data_only'].apply(lambda d: pd.Timestamp(d).strftime('%d/%m'))
                         media_mes_corrente = processos_por_dia_mes['processos'].mean() if len(processos_por_dia_mes) > 0 else 0
 
@@ -211,32 +217,20 @@ def render_graficos_temporal(df):
 
     if tipo_analise == 'Nº médio de processos':
          # Média por dia da semana - Mês corrente (somente dias úteis)
-         render_4_cards_temporal(df)
+         render_4_cards_temporal(df, cubo)
 
          tab1, tab2 = st.tabs(['último mes', 'últimos 12 meses'])
 
          with tab1:
              st.markdown("**Número médio de processos por dia da semana — mês corrente (somente dias úteis)**")
-             mes_atual = hoje.month
-             ano_atual = hoje.year
-             df_mes_corrente = df[
-                 (df['data_convertida'].dt.month == mes_atual) &
-                 (df['data_convertida'].dt.year == ano_atual)
-             ].copy()
-
-             df_mes_corrente['dia_semana'] = df_mes_corrente['data_convertida'].dt.dayofweek
-             df_mes_corrente_uteis = df_mes_corrente[df_mes_corrente['dia_semana'].between(0, 4)]
+             processos_por_dia = _dias_uteis_mes_corrente(por_dia, hoje)
 
-             if df_mes_corrente_uteis.empty:
+             if processos_por_dia.empty:
                  st.info("Nenhum processo no mês corrente (dias úteis).")
              else:
                  # contar por data, depois agregar por dia da semana e tirar média
-                 df_mes_corrente_uteis['data_only'] = df_mes_corrente_uteis['data_convertida'].dt.date
-                 processos_por_dia = df_mes_corrente_uteis.groupby('data_only').size().reset_index(name='processos')
-                 processos_por_dia['dia_semana'] = pd.to_datetime(processos_por_dia['data_only']).dt.dayofweek
-                 weekday_means = processos_por_dia.groupby('dia_semana')['processos'].mean().reindex([0,1,2,3,4], fill_value=0)
                  labels = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex']
-                 values = [weekday_means.get(i, 0) for i in range(5)]
+                 values = _medias_por_dia_semana(processos_por_dia)
                  overall_mean = sum(values) / len([v for v in values if v is not None]) if len(values) > 0 else 0
 
                  st.markdown(f"""
@@ -257,20 +251,14 @@ def render_graficos_temporal(df):
 
          with tab2:
              st.markdown("**Média por Dia da Semana (Últimos 12 meses)**")
-             # usar df_12_meses já preparado mais acima
-             df_12_uteis = df_12_meses.copy()
-             df_12_uteis['dia_semana'] = df_12_uteis['data_convertida'].dt.dayofweek
-             df_12_uteis = df_12_uteis[df_12_uteis['dia_semana'].between(0,4)]
+             # usar por_dia_12_meses já preparado mais acima
+             processos_por_dia_12m = _tabela_por_dia(por_dia_12_meses[por_dia_12_meses.index.dayofweek < 5])
 
-             if df_12_uteis.empty:
+             if processos_por_dia_12m.empty:
                  st.info("Nenhum processo nos últimos 12 meses (dias úteis).")
              else:
-                 df_12_uteis['data_only'] = df_12_uteis['data_convertida'].dt.date
-                 processos_por_dia_12m = df_12_uteis.groupby('data_only').size().reset_index(name='processos')
-                 processos_por_dia_12m['dia_semana'] = pd.to_datetime(processos_por_dia_12m['data_only']).dt.dayofweek
-                 weekday_means_12m = processos_por_dia_12m.groupby('dia_semana')['processos'].mean().reindex([0,1,2,3,4], fill_value=0)
                  labels = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex']
-                 values_12m = [weekday_means_12m.get(i, 0) for i in range(5)]
+                 values_12m = _medias_por_dia_semana(processos_por_dia_12m)
                  overall_mean_12m = sum(values_12m) / len([v for v in values_12m if v is not None]) if len(values_12m) > 0 else 0
 
                  st.markdown(f"""
@@ -0,0 +1,92 @@
+# teste_normalizar_profissao.py
+"""
+Teste de saída de referência (golden) de normalizar_profissao sobre as
+profissões de data/clientes.csv.
+
+    python teste_normalizar_profissao.py          # compara com a referência
+    python teste_normalizar_profissao.py --gerar  # regrava a referência
+
+A referência é gerada com a função original (commit COMMIT_REFERENCIA, antes
+da tabela de regras compilada), lida do histórico do git.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Adicionar path do projeto
+project_root = Path(__file__).parent
+sys.path.append(str(project_root))
+
+from utils.text_processing import normalizar_profissao, limpar_texto_profissao
+
+# =====================================
+# CONFIGURAÇÃO
+# =====================================
+
+ARQUIVO_CLIENTES = project_root / "data" / "clientes.csv"
+ARQUIVO_REFERENCIA = project_root / "data" / "referencia_normalizar_profissao.csv"
+COMMIT_REFERENCIA = "57b9ac7"
+
+# =====================================
+# ENTRADAS E REFERÊNCIA
+# =====================================
+
+def entradas_teste():
+    """Textos distintos de profissaoTexto, crus e depois da limpeza básica (como nas páginas)"""
+    profissoes = pd.read_csv(ARQUIVO_CLIENTES)["profissaoTexto"].dropna().astype(str)
+    entradas = list(dict.fromkeys(list(profissoes) + [limpar_texto_profissao(p) for p in profissoes]))
+    return entradas + ["", "   "]
+
+def funcao_original():
+    """normalizar_profissao do commit de referência, carregada do git"""
+    codigo = subprocess.run(
+        ["git", "show", f"{COMMIT_REFERENCIA}:utils/text_processing.py"],
+        cwd=project_root, capture_output=True, text=True, check=True
+    ).stdout
+    modulo = {}
+    exec(compile(codigo, f"{COMMIT_REFERENCIA}:utils/text_processing.py", "exec"), modulo)
+    return modulo["normalizar_profissao"]
+
+def gerar_referencia():
+    original = funcao_original()
+    entradas = entradas_teste()
+    referencia = pd.DataFrame({"entrada": entradas, "esperado": [original(e) for e in entradas]})
+    referencia.to_csv(ARQUIVO_REFERENCIA, sep=";", index=False)
+    print(f"💾 Referência gravada: {len(referencia)} entradas em {ARQUIVO_REFERENCIA.name}")
+
+def ler_referencia():
+    return pd.read_csv(ARQUIVO_REFERENCIA, sep=";", dtype=str, keep_default_na=False)
+
+# =====================================
+# TESTES
+# =====================================
+
+def teste_referencia_normalizar_profissao():
+    """Cada entrada da referência dá exatamente o mesmo resultado da função original"""
+    referencia = ler_referencia()
+    obtido = [normalizar_profissao(e) for e in referencia["entrada"]]
+    diferentes = referencia[referencia["esperado"] != pd.Series(obtido, index=referencia.index)]
+
+    for _, linha in diferentes.head(20).iterrows():
+        print(f"❌ {linha['entrada']!r}: esperado {linha['esperado']!r}, obtido {normalizar_profissao(linha['entrada'])!r}")
+    assert diferentes.empty, f"{len(diferentes)} de {len(referencia)} profissões diferentes da referência"
+    print(f"✅ normalizar_profissao igual à referência em {len(referencia)} entradas")
+
+def teste_nulo():
+    assert normalizar_profissao(None) == "NÃO INFORMADO"
+    assert normalizar_profissao(float("nan")) == "NÃO INFORMADO"
+
+def teste_entradas_cobertas():
+    """A referência cobre todas as profissões atuais de clientes.csv"""
+    faltando = set(entradas_teste()) - set(ler_referencia()["entrada"])
+    assert not faltando, f"{len(faltando)} profissões sem referência (rode com --gerar): {sorted(faltando)[:10]}"
+
+
+if __name__ == "__main__":
+    if "--gerar" in sys.argv:
+        gerar_referencia()
+    teste_referencia_normalizar_profissao()
+    teste_nulo()
+    teste_entradas_cobertas()
@@ -0,0 +1,95 @@
+# utils/cores_mapa.py
+import numpy as np
+import pandas as pd
+
+# =====================================
+# ESQUEMA DO MAPA INTERATIVO (TOP N + DEGRADÊ)
+# =====================================
+
+QUANTIDADE_TOP_MUNICIPIOS = 5
+
+# Municípios do top com cor própria (tons de azul escuro)
+CORES_MUNICIPIOS_DESTAQUE = {
+    'ARACAJU': '#000080',                   # Navy (azul muito escuro)
+    'NOSSA SENHORA DO SOCORRO': '#191970',  # MidnightBlue (azul escuro)
+    'SAO CRISTOVAO': '#483D8B',             # DarkSlateBlue (azul escuro mais claro)
+}
+COR_TOP_QUARTO = '#4169E1'   # RoyalBlue
+COR_TOP_DEMAIS = '#6495ED'   # CornflowerBlue
+
+COR_SEM_PROCESSOS = '#D3D3D3'
+
+# Degradê verde dos demais, pela intensidade relativa ao maior fora do top
+LIMITES_INTENSIDADE = [0.2, 0.4, 0.6, 0.8]
+CORES_INTENSIDADE = ['#E6FFE6', '#B3FFB3', '#80FF80', '#4DFF4D', '#00CC00']
+
+# =====================================
+# ESQUEMA DO MAPA ESTÁTICO (FAIXAS ABSOLUTAS)
+# =====================================
+
+# (limite superior da faixa, cor, legenda)
+FAIXAS_PROCESSOS = [
+    (0, '#E8E8E8', '0 processos'),
+    (10, '#FFF7BC', '1-10 processos'),
+    (50, '#FEC44F', '11-50 processos'),
+    (100, '#FE9929', '51-100 processos'),
+    (500, '#EC7014', '101-500 processos'),
+    (1000, '#CC4C02', '501-1000 processos'),
+    (np.inf, '#8C2D04', '>1000 processos'),
+]
+
+# =====================================
+# CLASSIFICAÇÃO
+# =====================================
+
+def posicoes_top(valores, n=QUANTIDADE_TOP_MUNICIPIOS):
+    """
+    Posição (0 = maior) de cada item entre os n maiores, -1 fora do top.
+    Empates ficam com quem aparece primeiro, como em nlargest.
+    """
+    valores = np.asarray(valores, dtype=float)
+    ordem = np.argsort(-valores, kind='stable')[:n]
+    posicoes = np.full(len(valores), -1)
+    posicoes[ordem] = np.arange(len(ordem))
+    return posicoes
+
+def classificar_cores_top(num_processos, nomes, n=QUANTIDADE_TOP_MUNICIPIOS):
+    """
+    Cores do mapa interativo numa só passada: top n em azul (destaques por
+    nome), sem processos em cinza e os demais no degradê verde.
+    Retorna DataFrame (mesmo índice) com 'posicao_top', 'intensidade' e 'color'.
+    """
+    num_processos = pd.Series(num_processos).fillna(0)
+    valores = num_processos.to_numpy(dtype=float)
+    nomes = np.asarray(nomes, dtype=object)
+
+    posicao = posicoes_top(valores, n)
+    no_top = posicao >= 0
+    outros = ~no_top & (valores > 0)
+
+    max_outros = valores[outros].max() if outros.any() else 0
+    intensidade = np.full(len(valores), np.nan)
+    if max_outros > 0:
+        intensidade[outros] = valores[outros] / max_outros
+
+    # Faixa de intensidade: <=0.2, <=0.4, ... (sem intensidade conta como a mais clara)
+    faixa = np.searchsorted(LIMITES_INTENSIDADE, np.nan_to_num(intensidade), side='left')
+    cores = np.asarray(CORES_INTENSIDADE, dtype=object)[faixa]
+    cores[valores == 0] = COR_SEM_PROCESSOS
+
+    cores_top = np.where(posicao == 3, COR_TOP_QUARTO, COR_TOP_DEMAIS).astype(object)
+    destaque = pd.Series(nomes).map(CORES_MUNICIPIOS_DESTAQUE).to_numpy()
+    cores_top = np.where(pd.notna(destaque), destaque, cores_top)
+    cores[no_top] = cores_top[no_top]
+
+    return pd.DataFrame(
+        {'posicao_top': posicao, 'intensidade': intensidade, 'color': cores},
+        index=num_processos.index
+    )
+
+def classificar_cores_faixas(num_processos):
+    """Cor da faixa absoluta (FAIXAS_PROCESSOS) de cada contagem"""
+    num_processos = pd.Series(num_processos).fillna(0)
+    limites = [-np.inf] + [limite for limite, _, _ in FAIXAS_PROCESSOS]
+    cores = [cor for _, cor, _ in FAIXAS_PROCESSOS]
+    return pd.cut(num_processos, bins=limites, labels=cores, ordered=False).astype(object)
@@ -0,0 +1,126 @@
+# utils/pontos_mapa.py
+import json
+
+import numpy as np
+import pandas as pd
+from branca.element import MacroElement
+from folium import plugins
+from folium.elements import JSCSSMixin
+from jinja2 import Template
+
+# =====================================
+# CONFIGURAÇÃO DA CAMADA DE PONTOS
+# =====================================
+
+# Processos sem endereço preciso caem num disco deste raio em volta do bairro
+RAIO_DISPERSAO_BAIRRO_METROS = 250
+METROS_POR_GRAU = 111_320
+
+# Coordenadas enviadas ao navegador como inteiros em passos de 1e-4° (≈ 11 m)
+PASSO_QUANTIZACAO_GRAUS = 1e-4
+
+OPCOES_MAPA_CALOR = {"radius": 14, "blur": 18, "minOpacity": 0.3, "maxZoom": 15}
+
+# =====================================
+# DISPERSÃO E CODIFICAÇÃO
+# =====================================
+
+def dispersar_pontos(lat, lon, ids, raio_metros=RAIO_DISPERSAO_BAIRRO_METROS):
+    """
+    Espalha cada ponto num disco de `raio_metros` em volta da coordenada.
+    O deslocamento vem do hash do id: o mesmo processo cai sempre no mesmo lugar.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    hashes = pd.util.hash_array(np.asarray(ids, dtype=object).astype(str).astype(object))
+
+    u_raio = (hashes & np.uint64(0xFFFFFFFF)).astype(float) / 2 ** 32
+    u_angulo = (hashes >> np.uint64(32)).astype(float) / 2 ** 32
+    raio = raio_metros * np.sqrt(u_raio)
+    angulo = 2 * np.pi * u_angulo
+
+    return (
+        lat + raio * np.cos(angulo) / METROS_POR_GRAU,
+        lon + raio * np.sin(angulo) / (METROS_POR_GRAU * np.cos(np.radians(lat))),
+    )
+
+def codificar_pontos(lat, lon, passo=PASSO_QUANTIZACAO_GRAUS):
+    """
+    Quantiza os pontos em passos inteiros a partir da origem, ordena e grava
+    as diferenças sucessivas: [dlat0, dlon0, dlat1, dlon1, ...].
+    Retorna (origem [lat, lon], lista de inteiros).
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    if len(lat) == 0:
+        return [0.0, 0.0], []
+
+    origem = [float(lat.min()), float(lon.min())]
+    q_lat = np.rint((lat - origem[0]) / passo).astype(np.int64)
+    q_lon = np.rint((lon - origem[1]) / passo).astype(np.int64)
+
+    ordem = np.lexsort((q_lon, q_lat))
+    pares = np.column_stack([q_lat[ordem], q_lon[ordem]])
+    deltas = np.diff(pares, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    return origem, deltas.ravel().tolist()
+
+# =====================================
+# CAMADA NO NAVEGADOR (CALOR + AGRUPAMENTO)
+# =====================================
+
+class CamadaDensidade(JSCSSMixin, MacroElement):
+    """
+    Pontos quantizados (origem + diferenças inteiras) decodificados no
+    navegador em mapa de calor e agrupamento de marcadores. As bibliotecas
+    entram pelo JSCSSMixin, depois do Leaflet.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var origem = {{ this.origem|tojson }}, passo = {{ this.passo }};
+            var d = {{ this.deltas_js }};
+            var pontos = new Array(d.length / 2), lat = 0, lon = 0;
+            for (var i = 0; i < d.length; i += 2) {
+                lat += d[i];
+                lon += d[i + 1];
+                pontos[i / 2] = [origem[0] + lat * passo, origem[1] + lon * passo];
+            }
+
+            var calor = L.heatLayer(pontos, {{ this.opcoes_calor|tojson }});
+            var grupos = L.markerClusterGroup({chunkedLoading: true, showCoverageOnHover: false});
+            grupos.addLayers(pontos.map(function(p) {
+                return L.circleMarker(p, {radius: 3, weight: 0, fillColor: '#CD5C5C', fillOpacity: 0.8});
+            }));
+
+            {{ 'calor' if this.mostrar_calor else 'grupos' }}.addTo(map);
+            L.control.layers(null, {'Mapa de calor': calor, 'Agrupamento': grupos}, {collapsed: true}).addTo(map);
+        })();
+        {% endmacro %}
+    """)
+
+    # Bibliotecas dos plugins do Folium (leaflet-heat e markercluster)
+    default_js = plugins.HeatMap.default_js + plugins.MarkerCluster.default_js
+    default_css = plugins.MarkerCluster.default_css
+
+    def __init__(self, origem, deltas, mostrar_calor=True):
+        super().__init__()
+        self._name = "CamadaDensidade"
+        self.origem = origem
+        # Só inteiros: JSON sem espaços
+        self.deltas_js = json.dumps(deltas, separators=(',', ':'))
+        self.passo = PASSO_QUANTIZACAO_GRAUS
+        self.opcoes_calor = OPCOES_MAPA_CALOR
+        self.mostrar_calor = mostrar_calor
+
+def adicionar_camada_densidade(m, lat, lon, mostrar_calor=True):
+    """
+    Adiciona ao mapa um ponto por processo, decodificado e desenhado no
+    navegador como mapa de calor e como agrupamento de marcadores
+    (um controle alterna entre os dois). Nenhum objeto Folium por ponto.
+    """
+    origem, deltas = codificar_pontos(lat, lon)
+    if deltas:
+        CamadaDensidade(origem, deltas, mostrar_calor).add_to(m)
+    return m
@@ -1,5 +1,8 @@
-from unidecode import unidecode
+import re
+from functools import lru_cache
+import numpy as np
 import pandas as pd
+from unidecode import unidecode
 
 def padronizar_reu(reu_text):
     """
@@ -179,6 +182,68 @@ def padronizar_competencia(competencia_text):
     # Se não encontrou padrão específico, retorna o texto limpo
     return texto
 
+# =====================================
+# MUNICÍPIOS
+# =====================================
+
+MUNICIPIOS_SERGIPE = [
+    'AMPARO DE SAO FRANCISCO', 'AQUIDABA', 'ARACAJU', 'ARAUA',
+    'AREIA BRANCA', 'BARRA DOS COQUEIROS', 'BOQUIM', 'BREJO GRANDE',
+    'CAMPO DO BRITO', 'CANHOBA', 'CANINDE DE SAO FRANCISCO', 'CAPELA',
+    'CARIRA', 'CARMOPOLIS', 'CEDRO DE SAO JOAO', 'CRISTINAPOLIS', 'CUMBE',
+    'DIVINA PASTORA', 'ESTANCIA', 'FEIRA NOVA', 'FREI PAULO', 'GARARU',
+    'GENERAL MAYNARD', 'GRACHO CARDOSO', 'ILHA DAS FLORES', 'INDIAROBA',
+    'ITABAIANA', 'ITABAIANINHA', 'ITABI', "ITAPORANGA D'AJUDA", 'JAPARATUBA',
+    'JAPOATA', 'LAGARTO', 'LARANJEIRAS', 'MACAMBIRA', 'MALHADA DOS BOIS',
+    'MALHADOR', 'MARUIM', 'MOITA BONITA', 'MONTE ALEGRE DE SERGIPE',
+    'MURIBECA', 'NEOPOLIS', 'NOSSA SENHORA APARECIDA', 'NOSSA SENHORA DA GLORIA',
+    'NOSSA SENHORA DAS DORES', 'NOSSA SENHORA DE LOURDES', 'NOSSA SENHORA DO SOCORRO',
+    'PACATUBA', 'PEDRA MOLE', 'PEDRINHAS', 'PINHAO',
+    'PIRAMBU', 'POCO REDONDO', 'POCO VERDE', 'PORTO DA FOLHA',
+    'PROPRIA', 'RIACHAO DO DANTAS', 'RIACHUELO', 'RIBEIROPOLIS',
+    'ROSARIO DO CATETE', 'SALGADO', 'SANTA LUZIA DO ITANHY', 'SANTA ROSA DE LIMA',
+    'SANTANA DO SAO FRANCISCO', 'SANTO AMARO DAS BROTAS', 'SAO CRISTOVAO',
+    'SAO DOMINGOS', 'SAO FRANCISCO', 'SAO MIGUEL DO ALEIXO', 'SIMAO DIAS',
+    'SIRIRI', 'TELHA', 'TOBIAS BARRETO', 'TOMAR DO GERU', 'UMBAUBA'
+]
+
+# Regras aplicadas em ordem sobre o nome minúsculo e sem acentos:
+# (algum destes termos, todos estes termos, nenhum destes termos) -> município
+REGRAS_MUNICIPIOS = [
+    (('socorro', 'socoro'), (), (), 'NOSSA SENHORA DO SOCORRO'),
+    (('itaporanga',), (), (), "ITAPORANGA D'AJUDA"),
+    ((), ('barra', 'coqu'), (), 'BARRA DOS COQUEIROS'),
+    (('japarat',), (), (), 'JAPARATUBA'),
+    (('sao cristovao', 'cristovao', 'sao cris'), (), (), 'SAO CRISTOVAO'),
+    (('neopolois', 'neopolis'), (), (), 'NEOPOLIS'),
+    (('maynard',), (), (), 'GENERAL MAYNARD'),
+    (('santa rosa',), (), (), 'SANTA ROSA DE LIMA'),
+    (('aracau', 'aracaiu'), (), (), 'ARACAJU'),
+    (('das flores',), (), (), 'ILHA DAS FLORES'),
+    (('senhora apar',), (), (), 'NOSSA SENHORA APARECIDA'),
+    (('aquibada',), (), (), 'AQUIDABA'),
+    ((), ('porto', 'folha'), (), 'PORTO DA FOLHA'),
+    (('propria',), (), (), 'PROPRIA'),
+    (('tobias',), (), (), 'TOBIAS BARRETO'),
+    (('estancia',), (), (), 'ESTANCIA'),
+    (('lagarto',), (), (), 'LAGARTO'),
+    (('itabaiana',), (), ('inha',), 'ITABAIANA'),
+    (('simao',), (), (), 'SIMAO DIAS'),
+    (('caninde',), (), (), 'CANINDE DE SAO FRANCISCO'),
+]
+
+def _compilar_regra(algum, todos, nenhum):
+    """Compila uma regra (algum/todos/nenhum) em uma única regex com lookaheads"""
+    partes = [f"(?=.*(?:{'|'.join(map(re.escape, algum))}))"] if algum else []
+    partes += [f"(?=.*{re.escape(termo)})" for termo in todos]
+    partes += [f"(?!.*{re.escape(termo)})" for termo in nenhum]
+    return re.compile("^" + "".join(partes), re.DOTALL)
+
+_REGRAS_MUNICIPIOS_COMPILADAS = [
+    (_compilar_regra(algum, todos, nenhum), resultado)
+    for algum, todos, nenhum, resultado in REGRAS_MUNICIPIOS
+]
+
 def corrigir_municipios(nome):
     """
     Corrige o nome dos municípios com base em regras específicas.
@@ -188,46 +253,23 @@ def corrigir_municipios(nome):
     
     nome_lower = unidecode(str(nome).lower())
     
-    if 'socorro' in nome_lower or 'socoro' in nome_lower:
-        return 'NOSSA SENHORA DO SOCORRO'
-    elif 'itaporanga' in nome_lower:
-        return "ITAPORANGA D'AJUDA"
-    elif 'barra' in nome_lower and 'coqu' in nome_lower:
-        return 'BARRA DOS COQUEIROS'
-    elif 'japarat' in nome_lower:
-        return 'JAPARATUBA'
-    elif 'sao cristovao' in nome_lower or 'cristovao' in nome_lower or 'sao cris' in nome_lower:
-        return 'SAO CRISTOVAO'
-    elif 'neopolois' in nome_lower or 'neopolis' in nome_lower:
-        return 'NEOPOLIS'
-    elif 'maynard' in nome_lower:
-        return 'GENERAL MAYNARD'
-    elif 'santa rosa' in nome_lower:
-        return 'SANTA ROSA DE LIMA'
-    elif 'aracau' in nome_lower or 'aracaiu' in nome_lower:
-        return 'ARACAJU'
-    elif 'das flores' in nome_lower:
-        return 'ILHA DAS FLORES'
-    elif 'senhora apar' in nome_lower:
-        return 'NOSSA SENHORA APARECIDA'
-    elif 'aquibada' in nome_lower:
-        return 'AQUIDABA'
-    elif 'porto' in nome_lower and 'folha' in nome_lower:
-        return 'PORTO DA FOLHA'
-    elif 'propria' in nome_lower:
-        return 'PROPRIA'
-    elif 'tobias' in nome_lower:
-        return 'TOBIAS BARRETO'
-    elif 'estancia' in nome_lower:
-        return 'ESTANCIA'
-    elif 'lagarto' in nome_lower:
-        return 'LAGARTO'
-    elif 'itabaiana' in nome_lower and 'inha' not in nome_lower:
-        return 'ITABAIANA'
-    elif 'simao' in nome_lower:
-        return 'SIMAO DIAS'
+    for regra, resultado in _REGRAS_MUNICIPIOS_COMPILADAS:
+        if regra.match(nome_lower):
+            return resultado
+    
+    return str(nome).upper()  # Retorna o nome original em maiúsculo se nenhuma regra for aplicada
+
+def normalizar_municipios(serie):
+    """
+    Versão vetorizada de corrigir_municipios: aplica as regras apenas aos
+    valores distintos e devolve o resultado pelos códigos da fatoração.
+    """
+    codigos, unicos = pd.factorize(serie)
+    
+    # NaN vira código -1, que indexa o '' acrescentado no final
+    corrigidos = np.array([corrigir_municipios(nome) for nome in unicos] + [''], dtype=object)
     
-    return nome.upper()  # Retorna o nome original em maiúsculo se nenhuma regra for aplicada
+    return pd.Series(corrigidos[codigos], index=serie.index, name=serie.name)
 
 
 def categorizar_tipo_processo(x):
@@ -248,6 +290,117 @@ def categorizar_tipo_processo(x):
     else:
         return 'OUTROS'
 
+# =====================================
+# PROFISSÕES
+# =====================================
+
+# Erros de digitação corrigidos antes das regras (uma única passada de regex)
+CORRECOES_PROFISSAO = {
+    'SEERVCOS': 'SERVICOS',
+    'VENDENDOR': 'VENDEDOR',
+    'ACOGUEIRO': 'ACOUGUEIRO',
+    'LVRADOR': 'LAVRADOR',
+    'AJUNTE': 'AJUDANTE',
+    'AJUNDANTE': 'AJUDANTE',
+    'ATENTENDE': 'ATENDENTE',
+    'MOROTISTA': 'MOTORISTA',
+    'MECANCIO': 'MECANICO',
+    'RECPECIONISTA': 'RECEPCIONISTA',
+    'CABELEREIRA': 'CABELEIREIRA',
+    'DESEMPREGAD ': 'DESEMPREGADO',
+    'MONTAGEL': 'MONTAGEM',
+    'SERVICO GERAIS': 'SERVICOS GERAIS',
+}
+
+# Textos que só são agrupados quando iguais (não por conter o termo)
+PROFISSOES_EXATAS = {
+    'AJUDANTE': 'AJUDANTE',
+    'AJUDANTE GERAL': 'AJUDANTE',
+}
+
+# Regras aplicadas em ordem, a primeira que casar define a profissão:
+# (algum destes termos, todos estes termos) -> profissão
+REGRAS_PROFISSAO = [
+    (('APOSENTADO', 'APOSENTADA', 'APOSNETADA', 'APOSNETADO',
+      'APOSNTADA', 'APOSSENTADA', 'APOSTADO', 'APPOSENTADA'), (), 'APOSENTADO'),
+    (('ADMINISTRADOR', 'ADMINISTRADORA'), ('EMPRESA',), 'ADMINISTRADOR DE EMPRESAS'),
+    (('ADMINISTRADOR', 'ADMINISTRADORA'), (), 'ADMINISTRADOR'),
+    (('AGENTE DE LIMPEZA',), (), 'AGENTE DE LIMPEZA'),
+    (('AGRICULTOR', 'AGRICULTORA', 'AGRICULTURA', 'AGRICUTORA',
+      'LAVRADOR', 'TRABALHADOR RURAL', 'TRABALHADORA AUTONOMA',
+      'TRABALHADORA RURAL', 'TRABALHORA RURAL'), (), 'TRABALHADOR RURAL'),
+    (('AJUDANTE DE PEDREIRO',), (), 'AJUDANTE DE PEDREIRO'),
+    (('ARMADOR',), (), 'ARMADOR'),
+    (('ATENDENTE',), ('TELEMARKETING',), 'ATENDENTE DE TELEMARKETING'),
+    (('SERVICOS GERAIS', 'SERVICO GERAIS'), ('AUXILIAR',), 'AUXILIAR DE SERVICOS GERAIS'),
+    (('TECNICO DE MONTAGEM', 'TECNICO DE MONTAGEL'), ('AUXILIAR',), 'AUXILIAR TECNICO DE MONTAGEM'),
+    (('BENEFICIARIA DO LOAS', 'BENEFICIARIO', 'BENEFICIARIO DO AMPARO SOCIAL',
+      'BENEFICIARIO DO LOAS'), (), 'BENEFICIARIO'),
+    (('CUIDADORA', 'CUIDADOR'), (), 'CUIDADOR'),
+    (('DESEMPREGAD',), (), 'DESEMPREGADO'),
+    (('MECANICO',), (), 'MECANICO'),
+    (('MENOR DE IDADE', 'MENOR PUBERE', 'MENOR'), (), 'MENOR'),
+    (('CAMINHAO', 'BETONEIRA', 'CARRETEIRO'), ('MOTORISTA',), 'MOTORISTA DE CAMINHAO'),
+    (('MOTORISTA',), (), 'MOTORISTA'),
+    (('SERVENTE',), (), 'SERVENTE DE PEDREIRO'),
+    (('SERVICOS GERAIS', 'SERVICO GERAIS'), (), 'SERVICOS GERAIS'),
+]
+
+# Avaliadas depois da expansão de TEC (técnicos ficam com o texto padronizado)
+REGRAS_PROFISSAO_FINAIS = [
+    (('VENDEDOR',), (), 'VENDEDOR'),
+]
+
+def _regex_trie(termos):
+    """Monta uma alternância fatorada por prefixos (o maior termo casa primeiro)"""
+    trie = {}
+    for termo in termos:
+        no = trie
+        for letra in termo:
+            no = no.setdefault(letra, {})
+        no[''] = {}
+
+    def montar(no):
+        ramos = [re.escape(letra) + montar(filho) for letra, filho in sorted(no.items()) if letra]
+        if not ramos:
+            return ''
+        corpo = ramos[0] if len(ramos) == 1 else '(?:' + '|'.join(ramos) + ')'
+        return '(?:' + corpo + ')?' if '' in no else corpo
+
+    return montar(trie)
+
+def _compilar_regras_profissao():
+    """Compila as tabelas de profissão em uma única regex de termos e regras por conjunto"""
+    termos = {termo for regras in (REGRAS_PROFISSAO, REGRAS_PROFISSAO_FINAIS)
+              for algum, todos, _ in regras for termo in algum + todos}
+    # Em cada posição a regex pega o maior termo; os termos que são prefixo
+    # dele ficam implícitos
+    regex_termos = re.compile("(?=(" + _regex_trie(termos) + "))")
+    prefixos = {termo: frozenset(t for t in termos if termo.startswith(t)) for termo in termos}
+
+    def compilar(regras):
+        return [(frozenset(algum), frozenset(todos), resultado) for algum, todos, resultado in regras]
+
+    regex_correcoes = re.compile(_regex_trie(CORRECOES_PROFISSAO))
+    return regex_correcoes, regex_termos, prefixos, compilar(REGRAS_PROFISSAO), compilar(REGRAS_PROFISSAO_FINAIS)
+
+(_REGEX_CORRECOES_PROFISSAO, _REGEX_TERMOS_PROFISSAO, _PREFIXOS_TERMOS_PROFISSAO,
+ _REGRAS_PROFISSAO_COMPILADAS, _REGRAS_PROFISSAO_FINAIS_COMPILADAS) = _compilar_regras_profissao()
+
+def _termos_profissao(texto):
+    """Conjunto de termos das regras presentes no texto (uma varredura)"""
+    presentes = set()
+    for encontrado in _REGEX_TERMOS_PROFISSAO.finditer(texto):
+        presentes |= _PREFIXOS_TERMOS_PROFISSAO[encontrado.group(1)]
+    return presentes
+
+def _aplicar_regras_profissao(regras, presentes):
+    """Primeira regra satisfeita pelos termos presentes (ou None)"""
+    for algum, todos, resultado in regras:
+        if (not algum or not algum.isdisjoint(presentes)) and todos <= presentes:
+            return resultado
+    return None
+
 def normalizar_profissao(profissao_text):
     """
     Normaliza profissões de acordo com as regras específicas
@@ -259,140 +412,87 @@ def normalizar_profissao(profissao_text):
     texto = unidecode(str(profissao_text).upper().strip())
     
     # Correções de erros óbvios
-    texto = texto.replace('SEERVCOS', 'SERVICOS')
-    texto = texto.replace('VENDENDOR', 'VENDEDOR')
-    texto = texto.replace('ACOUGUEIRO', 'ACOUGUEIRO')
-    texto = texto.replace('ACOGUEIRO', 'ACOUGUEIRO')
-    texto = texto.replace('LVRADOR', 'LAVRADOR')
-    texto = texto.replace('AJUNTE', 'AJUDANTE')
-    texto = texto.replace('AJUNDANTE', 'AJUDANTE')
-    texto = texto.replace('ATENTENDE', 'ATENDENTE')
-    texto = texto.replace('MOROTISTA', 'MOTORISTA')
-    texto = texto.replace('MECANCIO', 'MECANICO')
-    texto = texto.replace('RECPECIONISTA', 'RECEPCIONISTA')
-    texto = texto.replace('CABELEREIRA', 'CABELEIREIRA')
-    texto = texto.replace('DESEMPREGAD ', 'DESEMPREGADO')
-    texto = texto.replace('MONTAGEL', 'MONTAGEM')
-    texto = texto.replace('SERVICO GERAIS', 'SERVICOS GERAIS')
-    
-    # 1. APOSENTADOS - qualquer variação vira APOSENTADO
-    aposentado_variacoes = [
-        'APOSENTADO', 'APOSENTADA', 'APOSNETADA', 'APOSNETADO', 
-        'APOSNTADA', 'APOSSENTADA', 'APOSTADO', 'APPOSENTADA'
-    ]
-    for variacao in aposentado_variacoes:
-        if variacao in texto:
-            return 'APOSENTADO'
-    
-    # 2. ADMINISTRADOR
-    if any(termo in texto for termo in ['ADMINISTRADOR', 'ADMINISTRADORA']):
-        if 'EMPRESA' in texto:
-            return 'ADMINISTRADOR DE EMPRESAS'
-        else:
-            return 'ADMINISTRADOR'
-    
-    # 3. AGENTE DE LIMPEZA
-    if 'AGENTE DE LIMPEZA' in texto:
-        return 'AGENTE DE LIMPEZA'
-    
-    # 4. TRABALHADOR RURAL (grupo grande)
-    rural_termos = [
-        'AGRICULTOR', 'AGRICULTORA', 'AGRICULTURA', 'AGRICUTORA',
-        'LAVRADOR', 'TRABALHADOR RURAL', 'TRABALHADORA AUTONOMA',
-        'TRABALHADORA RURAL', 'TRABALHORA RURAL'
-    ]
-    if any(termo in texto for termo in rural_termos):
-        return 'TRABALHADOR RURAL'
-    
-    # 5. AJUDANTE
-    if texto in ['AJUDANTE', 'AJUDANTE GERAL'] or texto == 'AJUDANTE':
-        return 'AJUDANTE'
-    elif 'AJUDANTE DE PEDREIRO' in texto:
-        return 'AJUDANTE DE PEDREIRO'
-    
-    # 6. ARMADOR
-    if 'ARMADOR' in texto:
-        return 'ARMADOR'
-    
-    # 7. ATENDENTE DE TELEMARKETING
-    if 'ATENDENTE' in texto and 'TELEMARKETING' in texto:
-        return 'ATENDENTE DE TELEMARKETING'
-    
-    # 8. AUXILIAR - expandir AUX
+    texto = _REGEX_CORRECOES_PROFISSAO.sub(lambda m: CORRECOES_PROFISSAO[m.group(0)], texto)
+    
+    if texto in PROFISSOES_EXATAS:
+        return PROFISSOES_EXATAS[texto]
+    
+    # AUXILIAR - expandir AUX antes de procurar os termos
     if texto.startswith('AUX ') or ' AUX ' in texto:
-        # Substituir AUX por AUXILIAR
         texto = texto.replace('AUX ', 'AUXILIAR ')
         texto = texto.replace(' AUX ', ' AUXILIAR ')
         
         # Corrigir gênero para masculino (padrão)
-        if 'ADMINISTRATIVA' in texto:
-            texto = texto.replace('ADMINISTRATIVA', 'ADMINISTRATIVO')
+        texto = texto.replace('ADMINISTRATIVA', 'ADMINISTRATIVO')
         if 'AUXILIAR DE SERVICO GERAIS' in texto:
             texto = 'AUXILIAR DE SERVICOS GERAIS'
     
-    # AUXILIAR - correções específicas
-    if 'AUXILIAR' in texto:
-        if 'SERVICOS GERAIS' in texto or 'SERVICO GERAIS' in texto:
-            return 'AUXILIAR DE SERVICOS GERAIS'
-        elif 'TECNICO DE MONTAGEM' in texto or 'TECNICO DE MONTAGEL' in texto:
-            return 'AUXILIAR TECNICO DE MONTAGEM'
-    
-    # 9. BENEFICIARIO
-    beneficiario_termos = [
-        'BENEFICIARIA DO LOAS', 'BENEFICIARIO', 'BENEFICIARIO DO AMPARO SOCIAL',
-        'BENEFICIARIO DO LOAS'
-    ]
-    if any(termo in texto for termo in beneficiario_termos):
-        return 'BENEFICIARIO'
-    
-    # 10. CUIDADOR
-    if any(termo in texto for termo in ['CUIDADORA', 'CUIDADOR']):
-        return 'CUIDADOR'
-    
-    # 11. DESEMPREGADO
-    if 'DESEMPREGAD' in texto:
-        return 'DESEMPREGADO'
-    
-    # 12. MECANICO
-    if 'MECANICO' in texto:
-        if 'AUTOS' in texto or 'LINHA PESADA' in texto:
-            return 'MECANICO'
-        else:
-            return 'MECANICO'
-    
-    # 13. MENOR
-    if any(termo in texto for termo in ['MENOR DE IDADE', 'MENOR PUBERE', 'MENOR']):
-        return 'MENOR'
-    
-    # 14. MOTORISTA
-    if 'MOTORISTA' in texto:
-        if 'CAMINHAO' in texto or 'BETONEIRA' in texto or 'CARRETEIRO' in texto:
-            return 'MOTORISTA DE CAMINHAO'
-        elif 'APLICATIVO' in texto:
-            return 'MOTORISTA'
-        else:
-            return 'MOTORISTA'
-    
-    # 15. SERVENTE
-    if 'SERVENTE' in texto:
-        return 'SERVENTE DE PEDREIRO'
-    
-    # 16. SERVICOS GERAIS
-    if 'SERVICOS GERAIS' in texto or 'SERVICO GERAIS' in texto:
-        return 'SERVICOS GERAIS'
-    
-    # 17. TECNICO - expandir TEC
+    presentes = _termos_profissao(texto)
+    resultado = _aplicar_regras_profissao(_REGRAS_PROFISSAO_COMPILADAS, presentes)
+    if resultado is not None:
+        return resultado
+    
+    # TECNICO - expandir TEC e manter o texto padronizado
     if texto.startswith('TEC ') or ' TEC ' in texto or texto.startswith('TECNICO'):
         texto = texto.replace('TEC ', 'TECNICO ')
         texto = texto.replace(' TEC ', ' TECNICO ')
-        
-        # Manter como está, mas padronizado
         if 'TECNICO' in texto:
             return texto
     
-    # 18. VENDEDOR
-    if 'VENDEDOR' in texto:
-        return 'VENDEDOR'
+    resultado = _aplicar_regras_profissao(_REGRAS_PROFISSAO_FINAIS_COMPILADAS, presentes)
+    if resultado is not None:
+        return resultado
     
     # Se não encontrou padrão específico, retorna o texto limpo
-    return texto
\ No newline at end of file
+    return texto
+
+def limpar_texto_profissao(profissao_text):
+    """Limpeza básica da profissão (maiúsculas, sem acentos) antes da normalização"""
+    if pd.isna(profissao_text) or str(profissao_text).strip() == '':
+        return 'NÃO INFORMADO'
+    return unidecode(str(profissao_text).upper().strip())
+
+# =====================================
+# NORMALIZAÇÃO POR VALORES DISTINTOS
+# =====================================
+
+# Máximo de textos distintos memorizados por função (o cache vive no módulo,
+# então sobrevive aos reruns do Streamlit)
+TAMANHO_CACHE_NORMALIZACAO = 8192
+
+_FUNCOES_MEMORIZADAS = {}
+
+def _memorizada(funcao):
+    """Retorna a versão com cache LRU limitado da função de normalização"""
+    if funcao not in _FUNCOES_MEMORIZADAS:
+        _FUNCOES_MEMORIZADAS[funcao] = lru_cache(maxsize=TAMANHO_CACHE_NORMALIZACAO)(funcao)
+    return _FUNCOES_MEMORIZADAS[funcao]
+
+def normalizar_por_valores_unicos(serie, funcao):
+    """
+    Aplica `funcao` uma vez por valor distinto da série (com cache LRU entre
+    reruns) e devolve o resultado como coluna categórica alinhada à série.
+    """
+    codigos, unicos = pd.factorize(serie)
+    funcao_memo = _memorizada(funcao)
+    resultados = [funcao_memo(valor) for valor in unicos]
+
+    # Nulos (código -1) usam a última posição
+    nulos = np.flatnonzero(codigos == -1)
+    resultados.append(funcao(serie.iloc[nulos[0]]) if len(nulos) else None)
+
+    posicoes, categorias = pd.factorize(pd.Series(resultados, dtype=object))
+    return pd.Series(
+        pd.Categorical.from_codes(posicoes[codigos], categories=categorias),
+        index=serie.index, name=serie.name
+    )
+
+def remover_categorias_vazias(df):
+    """Remove categorias sem ocorrências (ex.: depois de filtros) para não aparecerem em rankings"""
+    colunas = df.select_dtypes('category').columns
+    if len(colunas) == 0:
+        return df
+    df = df.copy()
+    for col in colunas:
+        df[col] = df[col].cat.remove_unused_categories()
+    return df